@@ -0,0 +1,87 @@
+"""
+Per-step cost of meter scanning as an episode grows.
+
+Compares the old `SanskritMeterEnv.step` path (decode everything, then
+`calculate_reward` on the whole text) with `IncrementalMeterScanner`, timing the
+steps in each window of the episode. The incremental scanner only re-scans the
+current line, and carries the syllable-repetition state of the finished lines. What
+still grows with the poem is linear in its number of lines and small: the meter check
+over the line patterns, and the self-reference check over the text if `style` has a
+weight (components with weight 0 are skipped). The first 12 lines also pay for chandas
+identification of METER, which chandas gives up on past 12 lines.
+
+    python -m benchmarks.bench_incremental_scan --lines 24 --weight syllable=0.2
+"""
+import argparse
+import json
+import time
+
+from src.reward import calculate_reward
+from src.scanner import IncrementalMeterScanner
+from src.score import _parse_weight
+
+LINE = "कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः\n"
+METER = "Mandākrāntā"
+
+class CharTokenizer:
+    """One token per character; stands in for a real tokenizer without downloads."""
+
+    def __init__(self, text):
+        self.vocab = sorted(set(text))
+        self.ids = {ch: i for i, ch in enumerate(self.vocab)}
+
+    def encode(self, text):
+        return [self.ids[ch] for ch in text]
+
+    def decode(self, ids):
+        return "".join(self.vocab[i] for i in ids)
+
+    def batch_decode(self, sequences):
+        return [self.decode(ids) for ids in sequences]
+
+def full_rescan(tokenizer, ids, weights):
+    generated = []
+    for token_id in ids:
+        generated.append(token_id)
+        yield calculate_reward(tokenizer.decode(generated), METER, weights=weights)["total_score"]
+
+def incremental(tokenizer, ids, weights):
+    scanner = IncrementalMeterScanner(tokenizer, METER)
+    for token_id in ids:
+        scanner.push(token_id)
+        yield scanner.reward(weights=weights)["total_score"]
+
+def time_windows(steps, window):
+    """Mean microseconds per step over consecutive windows of `window` steps."""
+    means, start, n = [], time.perf_counter(), 0
+    for _ in steps:
+        n += 1
+        if n == window:
+            now = time.perf_counter()
+            means.append(round((now - start) / window * 1e6, 1))
+            start, n = now, 0
+    return means
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lines", type=int, default=24, help="poem length in lines")
+    parser.add_argument("--window", type=int, default=len(LINE), help="steps per timing window")
+    parser.add_argument("--weight", type=_parse_weight, action="append", default=[],
+                        help="reward component weight, e.g. syllable=0.2 (repeatable)")
+    args = parser.parse_args()
+    weights = {name: value for spec in args.weight for name, value in spec.items()}
+
+    poem = LINE * args.lines
+    tokenizer = CharTokenizer(poem)
+    ids = tokenizer.encode(poem)
+    results = {
+        "steps": len(ids),
+        "window": args.window,
+        "weights": weights,
+        "full_rescan_us_per_step": time_windows(full_rescan(tokenizer, ids, weights), args.window),
+        "incremental_us_per_step": time_windows(incremental(tokenizer, ids, weights), args.window),
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Step time of `SanskritMeterEnv` with instrumentation off and on.
+
+Feeds the same synthetic verses (see `benchmarks.corpus`) through an env per reward
+mode, once without instrumentation and once with histograms and no sinks, and reports
+microseconds per step and the per-section breakdown.
+
+    python -m benchmarks.bench_instrumentation --verses 4
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from src.env import SanskritMeterEnv
+from src.instrumentation import Instrumentation
+from src.scanner import REWARD_MODES
+
+from .corpus import ByteTokenizer, metered_corpus
+
+def run(env, ids, episodes):
+    start = time.perf_counter()
+    for episode in range(episodes):
+        env.reset(seed=episode)
+        for token_id in ids:
+            env.step(token_id)
+    return (time.perf_counter() - start) / (episodes * len(ids)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--verses", type=int, default=4)
+    parser.add_argument("--episodes", type=int, default=5)
+    args = parser.parse_args()
+
+    tokenizer = ByteTokenizer()
+    ids = tokenizer.encode("\n".join(poem for _, poem in metered_corpus(args.verses)) + "\n")
+    config = SimpleNamespace(max_position_embeddings=len(ids) + 1)
+
+    results = {"steps": len(ids)}
+    for mode in REWARD_MODES:
+        off = SanskritMeterEnv(tokenizer=tokenizer, config=config, reward_mode=mode)
+        instrumentation = Instrumentation()
+        on = SanskritMeterEnv(tokenizer=tokenizer, config=config, reward_mode=mode,
+                              instrumentation=instrumentation)
+        results[mode] = {
+            "off_us_per_step": round(run(off, ids, args.episodes), 1),
+            "on_us_per_step": round(run(on, ids, args.episodes), 1),
+            "sections_mean_us": {name: round(stats["mean"] * 1e6, 1)
+                                 for name, stats in instrumentation.summary().items()},
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
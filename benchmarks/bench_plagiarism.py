@@ -0,0 +1,68 @@
+"""
+Build time, size and per-poem query latency of the plagiarism index.
+
+Indexes a synthetic corpus of verses (see `benchmarks.corpus`) and scores fresh poems
+and verbatim copies against it, as `calculate_reward` does per rollout.
+
+    python -m benchmarks.bench_plagiarism --verses 30000 --queries 1000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.plagiarism import PlagiarismIndex, load_plagiarism_index
+
+from .corpus import TEMPLATES, synthetic_poem
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--verses", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    meters = list(TEMPLATES)
+    corpus = [synthetic_poem(rng.choice(meters), rng) for _ in range(args.verses)]
+    fresh = [synthetic_poem(rng.choice(meters), rng) for _ in range(args.queries)]
+    copies = rng.sample(corpus, min(args.queries, len(corpus)))
+
+    start = time.perf_counter()
+    index = PlagiarismIndex.build(corpus)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        size = sum(p.stat().st_size for p in Path(tmp).iterdir())
+        start = time.perf_counter()
+        index = load_plagiarism_index(tmp)
+        load_s = time.perf_counter() - start
+
+        results = {}
+        for name, poems in (("fresh", fresh), ("copies", copies)):
+            latencies, scores = [], []
+            for poem in poems:
+                start = time.perf_counter()
+                scores.append(index.score(poem))
+                latencies.append(time.perf_counter() - start)
+            results[name] = {
+                "p50_ms": round(1000 * float(np.percentile(latencies, 50)), 3),
+                "p99_ms": round(1000 * float(np.percentile(latencies, 99)), 3),
+                "mean_score": round(float(np.mean(scores)), 3),
+            }
+
+    print(json.dumps({
+        "verses": len(corpus),
+        "build_s": round(build_s, 2),
+        "load_s": round(load_s, 4),
+        "index_mb": round(size / 2**20, 1),
+        "automaton_states": len(index.arrays["sam_len"]),
+        **results,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
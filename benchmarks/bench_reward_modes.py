@@ -0,0 +1,53 @@
+"""
+Full reward evaluations and step time per episode under each reward mode.
+
+Feeds a synthetic poem (see `benchmarks.corpus`) token by token through
+`IncrementalMeterScanner.scheduled_reward`, as `SanskritMeterEnv.step` does, with
+one token per character.
+
+    python -m benchmarks.bench_reward_modes --verses 4
+"""
+import argparse
+import json
+import random
+import time
+
+from src.scanner import REWARD_MODES, IncrementalMeterScanner
+
+from .bench_incremental_scan import CharTokenizer
+from .corpus import synthetic_poem
+
+METER = "मन्दाक्रान्ता"
+
+def run(tokenizer, ids, mode, shaping):
+    scanner = IncrementalMeterScanner(tokenizer, METER)
+    evaluations = 0
+    start = time.perf_counter()
+    for step, token_id in enumerate(ids, start=1):
+        boundaries = scanner.boundaries
+        scanner.push(token_id)
+        _, evaluated = scanner.scheduled_reward(mode, scanner.boundaries != boundaries,
+                                                step == len(ids), shaping)
+        evaluations += evaluated
+    return evaluations, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--verses", type=int, default=4)
+    parser.add_argument("--shaping", type=float, default=0.1)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    poem = "\n".join(synthetic_poem(METER, rng) for _ in range(args.verses)) + "\n"
+    tokenizer = CharTokenizer(poem)
+    ids = tokenizer.encode(poem)
+
+    results = {"steps": len(ids)}
+    for mode in REWARD_MODES:
+        evaluations, seconds = run(tokenizer, ids, mode, args.shaping)
+        results[mode] = {"evaluations": evaluations,
+                         "us_per_step": round(seconds / len(ids) * 1e6, 1)}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
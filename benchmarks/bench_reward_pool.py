@@ -0,0 +1,46 @@
+"""
+Throughput of `RewardPool.verify_meter_many` with 1..N workers.
+
+Scores one synthetic poem per prompt in prompts.jsonl (see `benchmarks.corpus`) and
+reports poems per second for the serial in-process path and each pool size. The
+verifier caches are left on, as in training.
+
+    python -m benchmarks.bench_reward_pool --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import time
+
+from src.meters import CHANDAS_NAMES
+from src.reward_pool import RewardPool, verify_meter_many
+
+from .corpus import prompt_poems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--chunksize", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the prompt set")
+    args = parser.parse_args()
+
+    # Chandas names, so that verification runs the full chandas identification
+    pairs = [(row["poem"], CHANDAS_NAMES[row["meter"]][0]) for row in prompt_poems()] * args.repeat
+
+    start = time.perf_counter()
+    expected = verify_meter_many(pairs)
+    results = {"poems": len(pairs), "serial_poems_per_s": round(len(pairs) / (time.perf_counter() - start), 1)}
+
+    for n in args.workers:
+        with RewardPool(num_workers=n, chunksize=args.chunksize) as pool:
+            pool.warm_up()
+            start = time.perf_counter()
+            got = pool.verify_meter_many(pairs)
+            elapsed = time.perf_counter() - start
+        assert got == expected
+        results[f"pool_{n}_poems_per_s"] = round(len(pairs) / elapsed, 1)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Episodes per second with the asyncio rollout driver against a synchronous loop.
+
+A stub policy writes synthetic verses (see `benchmarks.corpus`) in chunks of tokens,
+with a fixed latency per batch, as a remote inference server would. The synchronous
+loop calls it, then steps every env with `reward_mode="line"`; `RolloutDriver` steps
+envs with `reward_mode="external"` and scores the lines in a thread or a `RewardPool`
+while the next batch is generated.
+
+    python -m benchmarks.bench_rollout --envs 8 --episodes 32 --latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from src.env import SanskritMeterEnv
+from src.reward_pool import RewardPool
+from src.rollout import collect_rollouts
+
+from .corpus import ByteTokenizer, metered_corpus
+
+def make_envs(tokenizer, ids, n, mode):
+    config = SimpleNamespace(max_position_embeddings=len(ids))
+    return [SanskritMeterEnv(tokenizer=tokenizer, config=config, reward_mode=mode) for _ in range(n)]
+
+def sync_loop(envs, ids, episodes, chunk, latency):
+    start = time.perf_counter()
+    for _ in range(0, episodes, len(envs)):
+        for env in envs:
+            env.reset()
+        for pos in range(0, len(ids), chunk):
+            time.sleep(latency)
+            for env in envs:
+                for token_id in ids[pos:pos + chunk]:
+                    env.step(token_id)
+    return episodes / (time.perf_counter() - start)
+
+def driver(envs, ids, episodes, chunk, latency, pool):
+    async def policy(requests):
+        await asyncio.sleep(latency)
+        return [ids[len(envs[r.slot].generated_ids):][:chunk] for r in requests]
+
+    start = time.perf_counter()
+    collect_rollouts(envs, policy, episodes, reward_pool=pool, score="line")
+    return episodes / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--envs", type=int, default=8)
+    parser.add_argument("--episodes", type=int, default=32)
+    parser.add_argument("--chunk", type=int, default=16, help="tokens per policy call")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="policy latency per batch")
+    parser.add_argument("--workers", type=int, default=0, help="RewardPool workers (0: a thread)")
+    args = parser.parse_args()
+
+    tokenizer = ByteTokenizer()
+    ids = tokenizer.encode("\n".join(poem for _, poem in metered_corpus(2)) + "\n")
+    latency = args.latency_ms / 1e3
+    results = {"tokens_per_episode": len(ids), "policy_calls_per_episode": -(-len(ids) // args.chunk)}
+    results["sync_episodes_per_s"] = round(
+        sync_loop(make_envs(tokenizer, ids, args.envs, "line"), ids, args.episodes, args.chunk, latency), 2)
+    pool = RewardPool(num_workers=args.workers) if args.workers else None
+    try:
+        results["driver_episodes_per_s"] = round(
+            driver(make_envs(tokenizer, ids, args.envs, "external"), ids, args.episodes, args.chunk, latency, pool), 2)
+    finally:
+        if pool is not None:
+            pool.close()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Lines per second of the native scansion engine against chandas.
+
+Scans synthetic metrical lines (see `benchmarks.corpus`) with the verifier caches
+disabled, so every line is scanned from scratch, and checks both give the same patterns.
+
+    python -m benchmarks.bench_scansion --lines 5000
+"""
+import argparse
+import json
+import logging
+import random
+import time
+
+import chandas
+
+from src import scansion
+
+from .corpus import TEMPLATES, synthetic_line
+
+def rate(fn, lines):
+    start = time.perf_counter()
+    patterns = fn(lines)
+    return patterns, round(len(lines) / (time.perf_counter() - start), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=256, help="lines per native call")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(0)
+    templates = [p for pats in TEMPLATES.values() for p in pats]
+    lines = [synthetic_line(rng.choice(templates), rng) for _ in range(args.lines)]
+
+    expected, chandas_rate = rate(chandas.to_pattern_lines, lines)
+    per_line, native_rate = rate(lambda ls: [scansion.to_pattern_lines([ln])[0] for ln in ls], lines)
+    batched, batched_rate = rate(
+        lambda ls: [p for i in range(0, len(ls), args.batch)
+                    for p in scansion.to_pattern_lines(ls[i:i + args.batch])], lines)
+    assert expected == per_line == batched
+
+    print(json.dumps({
+        "lines": len(lines),
+        "chandas_lines_per_s": chandas_rate,
+        "native_lines_per_s": native_rate,
+        f"native_batch{args.batch}_lines_per_s": batched_rate,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
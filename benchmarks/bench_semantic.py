@@ -0,0 +1,43 @@
+"""
+Per-poem latency of the semantic scorer by batch size.
+
+Scores synthetic poems (see `benchmarks.corpus`) against their prompts' topics with
+the hashing encoder, or with a sentence-transformers model given by `--model`.
+
+    python -m benchmarks.bench_semantic --poems 512
+    python -m benchmarks.bench_semantic --model sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2
+"""
+import argparse
+import json
+import time
+
+from src.semantic import HashingEncoder, SemanticScorer, SentenceTransformerEncoder
+
+from .corpus import prompt_poems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--poems", type=int, default=512)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+
+    rows = prompt_poems(args.poems)
+    encoder = SentenceTransformerEncoder(args.model) if args.model else HashingEncoder()
+    start = time.perf_counter()
+    scorer = SemanticScorer(encoder, cache_dir=None)
+    topics_s = time.perf_counter() - start
+
+    results = {}
+    for batch in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(rows), batch):
+            chunk = rows[i:i + batch]
+            scorer.score([r["poem"] for r in chunk], [r["topic"] for r in chunk])
+        results[f"batch_{batch}_ms_per_poem"] = round(1000 * (time.perf_counter() - start) / len(rows), 3)
+
+    print(json.dumps({"encoder": encoder.name, "poems": len(rows),
+                      "topic_embedding_s": round(topics_s, 3), **results}, indent=2))
+
+if __name__ == "__main__":
+    main()
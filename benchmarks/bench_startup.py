@@ -0,0 +1,58 @@
+"""
+Import time and resident memory of the package entry points.
+
+Each case runs in a fresh interpreter, so module caches from one case do not hide the
+cost of another. With `--model`, also measures building one `SanskritMeterEnv` and N
+envs sharing the cached tokenizer and config (this needs the model's tokenizer files).
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --model google/gemma-2b --envs 8
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": round(elapsed, 4),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "chandas_loaded": "chandas" in sys.modules,
+    "transformers_loaded": "transformers" in sys.modules,
+}}))
+"""
+
+CASES = {
+    "python": "pass",
+    "import src": "import src",
+    "verify_meter native": "import src\nsrc.verify_meter('धर्मो रक्षति रक्षितः', 'अनुष्टुप्', backend='native')",
+    "verify_meter chandas": "import src\nsrc.verify_meter('धर्मो रक्षति रक्षितः', 'अनुष्टुप्')",
+    "import src.env": "import src.env",
+}
+
+def probe(code):
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(code=code)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=None, help="also build envs for this model")
+    parser.add_argument("--envs", type=int, default=8)
+    args = parser.parse_args()
+
+    cases = dict(CASES)
+    if args.model:
+        cases["1 env"] = "from src.env import SanskritMeterEnv\nSanskritMeterEnv(model_name=%r)" % args.model
+        cases["%d envs" % args.envs] = (
+            "from src.env import SanskritMeterEnv\n"
+            "envs = [SanskritMeterEnv(model_name=%r) for _ in range(%d)]" % (args.model, args.envs))
+
+    print(json.dumps({name: probe(code) for name, code in cases.items()}, indent=2))
+
+if __name__ == "__main__":
+    main()
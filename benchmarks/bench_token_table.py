@@ -0,0 +1,90 @@
+"""
+Step cost with the per-token syllable table against decoding and re-scanning.
+
+Feeds synthetic verses (see `benchmarks.corpus`) through `IncrementalMeterScanner`
+and `TableMeterScanner`, pushing tokens alone and under each reward mode, with a
+tokenizer of Devanāgarī aksharas padded with Latin filler pieces to a realistic
+vocabulary size. Reports microseconds per step, the one-time table build and the cost
+of one `logits_mask`.
+
+    python -m benchmarks.bench_token_table --verses 4 --vocab 256000
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from src.scanner import REWARD_MODES, IncrementalMeterScanner
+from src.token_table import MeterState, TableMeterScanner, TokenTable
+
+from .corpus import template_poem
+
+METER = "मन्दाक्रान्ता"
+AKSHARA_RE = re.compile("(?:[क-ह]्)*[क-हअ-औ][ा-ौ]?[ंः]?|.", re.DOTALL)
+
+class AksharaTokenizer:
+    """One token per akshara of `text`, plus filler pieces up to `vocab_size`."""
+
+    def __init__(self, text, vocab_size):
+        pieces = sorted(set(AKSHARA_RE.findall(text)))
+        self.pieces = pieces + [f"w{i}" for i in range(vocab_size - len(pieces))]
+        self.ids = {p: i for i, p in enumerate(pieces)}
+        self.vocab_size = len(self.pieces)
+
+    def encode(self, text):
+        return [self.ids[p] for p in AKSHARA_RE.findall(text)]
+
+    def decode(self, ids):
+        return "".join(self.pieces[i] for i in ids)
+
+    def batch_decode(self, sequences):
+        return [self.decode(ids) for ids in sequences]
+
+def run(scanner, ids, mode, repeats, shaping=0.1):
+    """Best of `repeats` episodes, in microseconds per step; mode None only pushes."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scanner.reset(METER)
+        for step, token_id in enumerate(ids, start=1):
+            boundaries = scanner.boundaries
+            scanner.push(token_id)
+            if mode is not None:
+                scanner.scheduled_reward(mode, scanner.boundaries != boundaries, step == len(ids), shaping)
+        best = min(best, time.perf_counter() - start)
+    return best / len(ids) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--verses", type=int, default=4)
+    parser.add_argument("--vocab", type=int, default=256000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    poem = "\n".join(template_poem(METER, rng) for _ in range(args.verses)) + "\n"
+    tokenizer = AksharaTokenizer(poem, args.vocab)
+    ids = tokenizer.encode(poem)
+
+    start = time.perf_counter()
+    table = TokenTable.build(tokenizer)
+    results = {"steps": len(ids), "vocab": tokenizer.vocab_size,
+               "build_s": round(time.perf_counter() - start, 2), "classes": table.class_next.shape[1]}
+    for name, mode in [("push", None)] + [(mode, mode) for mode in REWARD_MODES]:
+        results[name] = {
+            "decode_us_per_step": round(run(IncrementalMeterScanner(tokenizer), ids, mode, args.repeats), 1),
+            "table_us_per_step": round(run(TableMeterScanner(tokenizer, table), ids, mode, args.repeats), 1),
+        }
+
+    state = MeterState(table, tokenizer)
+    for token_id in ids[:len(ids) // 3]:
+        state.push(token_id)
+    start = time.perf_counter()
+    for _ in range(20):
+        table.logits_mask(state, METER)
+    results["logits_mask_ms"] = round((time.perf_counter() - start) / 20 * 1e3, 2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Roman-script input: `sanscript.transliterate` vs the compiled transliterators, and
+scanning SLP1 weights directly.
+
+Poems are the synthetic corpus converted to each script. Reported per poem:
+sanscript, `transliteration.transliterate`, `transliterate_many` over the whole batch,
+and for SLP1, Devanāgarī conversion + native scan vs `slp1_pattern_lines`.
+
+    python -m benchmarks.bench_transliteration --poems 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from indic_transliteration import sanscript
+
+from src import scansion, transliteration
+from src.verifier import split_lines
+
+from .corpus import TEMPLATES, synthetic_poem
+
+def per_poem_us(fn, poems):
+    start = time.perf_counter()
+    results = [fn(poem) for poem in poems]
+    return results, (time.perf_counter() - start) / len(poems) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--poems", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    meters = list(TEMPLATES)
+    deva = [synthetic_poem(rng.choice(meters), rng) for _ in range(args.poems)]
+
+    report = {"poems": args.poems}
+    for script in transliteration.SCHEMES:
+        poems = [sanscript.transliterate(p, sanscript.DEVANAGARI, script) for p in deva]
+        transliteration.get_transliterator(script)   # build outside the timing
+        expected, baseline_us = per_poem_us(lambda p: sanscript.transliterate(p, script, sanscript.DEVANAGARI), poems)
+        fast, fast_us = per_poem_us(lambda p: transliteration.transliterate(p, script), poems)
+        start = time.perf_counter()
+        batch = transliteration.transliterate_many(poems, script)
+        batch_us = (time.perf_counter() - start) / len(poems) * 1e6
+        assert fast == expected and batch == expected
+        report[script] = {"sanscript_us": round(baseline_us, 1), "compiled_us": round(fast_us, 1),
+                          "batch_us": round(batch_us, 1), "speedup": round(baseline_us / fast_us, 1)}
+
+    poems = [sanscript.transliterate(p, sanscript.DEVANAGARI, sanscript.SLP1) for p in deva]
+    via_deva, via_deva_us = per_poem_us(
+        lambda p: scansion.to_pattern_lines(split_lines(transliteration.transliterate(p, "slp1"))), poems)
+    direct, direct_us = per_poem_us(lambda p: transliteration.slp1_pattern_lines(split_lines(p)), poems)
+    assert direct == via_deva
+    report["slp1_scan"] = {"via_devanagari_us": round(via_deva_us, 1), "direct_us": round(direct_us, 1)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Verifier CPU time with and without the line/identification caches.
+
+Simulates rollouts where many samples for the same prompt share pādas: each poem is
+assembled from a small pool of lines per meter, so lines repeat across poems.
+
+    python -m benchmarks.bench_verifier_cache --poems 2000 --pool 8
+"""
+import argparse
+import json
+import random
+import time
+
+from src import verifier
+from src.meters import CHANDAS_NAMES
+
+from .corpus import TEMPLATES, synthetic_line
+
+def rollout_poems(n, pool_size, seed=0):
+    rng = random.Random(seed)
+    pools = {m: [[synthetic_line(p, rng) for _ in range(pool_size)] for p in pats]
+             for m, pats in TEMPLATES.items()}
+    meters = list(TEMPLATES)
+    poems = []
+    for _ in range(n):
+        meter = rng.choice(meters)
+        poems.append(("\n".join(rng.choice(lines) for lines in pools[meter]), CHANDAS_NAMES[meter][0]))
+    return poems
+
+def run(poems):
+    start = time.perf_counter()
+    results = [verifier.verify_meter(poem, meter) for poem, meter in poems]
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--poems", type=int, default=2000)
+    parser.add_argument("--pool", type=int, default=8, help="distinct lines per pāda position")
+    args = parser.parse_args()
+    poems = rollout_poems(args.poems, args.pool)
+
+    verifier.configure_cache(lines=0, patterns=0)
+    verifier.cache_clear()
+    uncached, uncached_s = run(poems)
+
+    verifier.configure_cache(lines=65536, patterns=16384)
+    verifier.cache_clear()
+    cached, cached_s = run(poems)
+    assert cached == uncached
+
+    print(json.dumps({
+        "poems": len(poems),
+        "uncached_poems_per_s": round(len(poems) / uncached_s, 1),
+        "cached_poems_per_s": round(len(poems) / cached_s, 1),
+        "cache": verifier.cache_info(),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
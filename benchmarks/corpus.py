@@ -0,0 +1,110 @@
+"""
+Reproducible synthetic poems for benchmarks.
+
+Each line is built from plain consonant+vowel syllables, so its scansion is exactly the
+laghu/guru template it was generated from (no conjuncts to make a short vowel heavy).
+"""
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.data.generate_dataset import METERS
+from src.meters import METER_TEMPLATES
+
+PROMPTS_PATH = Path(__file__).parent.parent / "src" / "data" / "prompts.jsonl"
+
+# Pāda templates of the target meters in `generate_dataset.METERS`.
+TEMPLATES: Dict[str, List[str]] = {
+    "अनुष्टुप्": ["GLGGLGGL", "LGGLLGLG", "GGLGLGGG", "LLGGLGLG"],
+    "मन्दाक्रान्ता": ["GGGGLLLLLGGLGGLGG"] * 4,
+    "शार्दूलविक्रीडितम्": ["GGGLLGLGLLLGGGLGGLG"] * 4,
+    "वसन्ततिलका": ["GGLGLLLGLLGLGG"] * 4,
+    "त्रिष्टुप्": ["GGLGGLLGLGG"] * 4,
+    "जगती": ["LGLGGLLGLGLG"] * 4,
+}
+
+CONSONANTS = "कखगघचजतदधनपबभमयरलवशसह"
+SHORT_MATRAS = ["", "ि", "ु"]
+LONG_MATRAS = ["ा", "ी", "ू", "े", "ो"]
+
+def syllables_for(pattern: str, rng: random.Random) -> List[str]:
+    return [rng.choice(CONSONANTS) + rng.choice(SHORT_MATRAS if w == "L" else LONG_MATRAS)
+            for w in pattern]
+
+def synthetic_line(pattern: str, rng: random.Random) -> str:
+    """A line scanning as `pattern`, split into words of two to four syllables."""
+    syllables = syllables_for(pattern, rng)
+    words, i = [], 0
+    while i < len(syllables):
+        n = rng.randint(2, 4)
+        words.append("".join(syllables[i:i + n]))
+        i += n
+    return " ".join(words)
+
+def synthetic_poem(meter: str, rng: random.Random) -> str:
+    return "\n".join(synthetic_line(p, rng) for p in TEMPLATES[meter])
+
+def prompt_poems(limit: Optional[int] = None, seed: int = 0) -> List[Dict[str, str]]:
+    """One synthetic poem per prompt in prompts.jsonl whose meter has a template."""
+    rng = random.Random(seed)
+    rows = []
+    with PROMPTS_PATH.open("r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["meter"] in TEMPLATES:
+                rows.append({**entry, "poem": synthetic_poem(entry["meter"], rng)})
+            if limit is not None and len(rows) >= limit:
+                break
+    return rows
+
+def template_poem(meter: str, rng: random.Random) -> str:
+    """A verse of `meter` from its `meters.METER_TEMPLATES` entry, with each free ('.')
+    position drawn at random."""
+    verse = rng.choice(METER_TEMPLATES[meter])
+    return "\n".join(synthetic_line("".join(w if w != "." else rng.choice("LG") for w in pada), rng)
+                     for pada in verse)
+
+def metered_corpus(n: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """`n` (meter, poem) pairs over the `generate_dataset.METERS` that have a template."""
+    rng = random.Random(seed)
+    meters = [m for m in METERS if m in METER_TEMPLATES]
+    pairs = []
+    for _ in range(n):
+        meter = rng.choice(meters)
+        pairs.append((meter, template_poem(meter, rng)))
+    return pairs
+
+class ByteTokenizer:
+    """One token per UTF-8 byte, with the Hugging Face calls `SanskritMeterEnv` makes;
+    stands in for a real tokenizer without downloads, here and in the tests. Id 256 is
+    EOS, 257 padding.
+
+    Devanāgarī characters span several tokens, which exercises the incomplete-character
+    handling of incremental decoding.
+    """
+
+    vocab_size = 258
+    eos_token_id = 256
+    pad_token_id = 257
+    name_or_path = "bytes"
+
+    def encode(self, text):
+        return list(text.encode("utf-8"))
+
+    def decode(self, ids):
+        return bytes(i for i in ids if i < 256).decode("utf-8", errors="replace")
+
+    def batch_decode(self, sequences):
+        return [self.decode(ids) for ids in sequences]
+
+    def __call__(self, texts, return_tensors="np", padding="max_length", max_length=None, truncation=False):
+        import numpy as np
+        batch = [texts] if isinstance(texts, str) else texts
+        input_ids = np.full((len(batch), max_length), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(batch), max_length), dtype=np.int64)
+        for row, text in enumerate(batch):
+            ids = self.encode(text)[:max_length]
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
@@ -0,0 +1,222 @@
+"""
+Throughput and latency suite for the verifier, the reward and the env, as JSON.
+
+Runs on a reproducible corpus of poems generated from the `generate_dataset.METERS`
+templates (see `benchmarks.corpus.metered_corpus`) and reports:
+
+- `verify_meter` lines per second, with each scansion backend, caches off
+- `calculate_reward` calls per second, caches off
+- `SanskritMeterEnv.step` latency per window of steps, i.e. as the episode grows,
+  for each reward mode
+- `SanskritMeterEnv.reset` latency
+- resident memory per additional env, in a fresh interpreter
+
+`--out` writes the report to a file; `--compare` checks it against an earlier report
+and exits with status 1 if a metric got worse by more than `--tolerance`. Compared are
+throughputs (`_per_s`, higher is better), median latencies (`p50_us`) and memory
+(`_mb`, lower is better); means and tails are reported but too noisy to gate on.
+
+    python -m benchmarks.suite --out bench.json
+    python -m benchmarks.suite --compare bench.json --tolerance 0.15
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+from src import verifier
+from src.env import SanskritMeterEnv
+from src.reward import calculate_reward
+from src.scanner import REWARD_MODES
+
+from .corpus import ByteTokenizer, metered_corpus
+
+def _percentiles(samples_s: List[float]) -> Dict[str, float]:
+    us = np.asarray(samples_s) * 1e6
+    return {"mean_us": round(float(us.mean()), 1), "p50_us": round(float(np.percentile(us, 50)), 1),
+            "p95_us": round(float(np.percentile(us, 95)), 1)}
+
+def _caches_off() -> None:
+    verifier.configure_cache(lines=0, patterns=0, syllables=0, transliterations=0)
+    verifier.cache_clear()
+
+def _caches_on() -> None:
+    verifier.configure_cache(lines=65536, patterns=16384, syllables=65536, transliterations=16384)
+
+def bench_verify(corpus) -> Dict[str, Dict[str, float]]:
+    lines = sum(len(verifier.split_lines(poem)) for _, poem in corpus)
+    results = {}
+    for backend in ("native", "chandas"):
+        start = time.perf_counter()
+        for meter, poem in corpus:
+            verifier.verify_meter(poem, meter, backend=backend)
+        results[backend] = {"lines_per_s": round(lines / (time.perf_counter() - start), 1)}
+    return results
+
+def bench_reward(corpus) -> Dict[str, float]:
+    start = time.perf_counter()
+    for meter, poem in corpus:
+        calculate_reward(poem, meter, topic="वसन्तः (spring)")
+    return {"calls_per_s": round(len(corpus) / (time.perf_counter() - start), 1)}
+
+def _episode_ids(tokenizer, corpus, length: int) -> List[int]:
+    ids: List[int] = []
+    for _, poem in corpus:
+        ids.extend(tokenizer.encode(poem + "\n"))
+        if len(ids) >= length:
+            break
+    return ids[:length]
+
+def bench_step(tokenizer, config, corpus, length: int, window: int, episodes: int) -> Dict[str, Dict]:
+    ids = _episode_ids(tokenizer, corpus, length)
+    results = {}
+    for mode in REWARD_MODES:
+        env = SanskritMeterEnv(tokenizer=tokenizer, config=config, max_length=len(ids) + 1, reward_mode=mode)
+        times = np.zeros((episodes, len(ids)))
+        for episode in range(episodes):
+            env.reset(seed=episode)
+            for step, token_id in enumerate(ids):
+                start = time.perf_counter()
+                env.step(token_id)
+                times[episode, step] = time.perf_counter() - start
+        windows = {}
+        for lo in range(0, len(ids), window):
+            windows[f"{lo}-{min(lo + window, len(ids))}"] = _percentiles(times[:, lo:lo + window].ravel())
+        results[mode] = {"overall": _percentiles(times.ravel()), "by_step": windows}
+    return results
+
+def bench_reset(tokenizer, config, n: int) -> Dict[str, float]:
+    env = SanskritMeterEnv(tokenizer=tokenizer, config=config, max_length=256)
+    env.reset(seed=0)
+    times = []
+    for seed in range(n):
+        start = time.perf_counter()
+        env.reset(seed=seed)
+        times.append(time.perf_counter() - start)
+    return _percentiles(times)
+
+_RSS_PROBE = """
+import json
+from types import SimpleNamespace
+from benchmarks.corpus import ByteTokenizer
+from src.env import SanskritMeterEnv, load_config, load_tokenizer
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * {page} / 2**20
+
+model = {model!r}
+tokenizer = load_tokenizer(model) if model else ByteTokenizer()
+config = load_config(model) if model else SimpleNamespace(max_position_embeddings=256)
+envs = [SanskritMeterEnv(tokenizer=tokenizer, config=config)]
+envs[0].reset(seed=0)
+base = rss_mb()
+for i in range(1, {n}):
+    envs.append(SanskritMeterEnv(tokenizer=tokenizer, config=config))
+    envs[-1].reset(seed=i)
+print(json.dumps({{"first_env_mb": round(base, 1), "per_env_mb": round((rss_mb() - base) / ({n} - 1), 3)}}))
+"""
+
+def bench_rss(model, n: int) -> Dict[str, float]:
+    """Resident memory after one env, and per env added after it, in a fresh process."""
+    if not os.path.exists("/proc/self/statm"):
+        return {}
+    code = _RSS_PROBE.format(model=model, n=n, page=os.sysconf("SC_PAGE_SIZE"))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _flatten(report, prefix=""):
+    for key, value in report.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+def compare(report, baseline, tolerance: float) -> List[str]:
+    """Metrics of `report` worse than in `baseline` by more than `tolerance` (relative)."""
+    old = dict(_flatten(baseline["results"]))
+    regressions = []
+    for name, value in _flatten(report["results"]):
+        if name not in old or not old[name]:
+            continue
+        change = (value - old[name]) / old[name]
+        if name.endswith("_per_s"):
+            change = -change
+        elif not name.endswith(("p50_us", "_mb")):
+            continue
+        if change > tolerance:
+            regressions.append(f"{name}: {old[name]} -> {value} ({change:+.0%} worse)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--poems", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--episode-length", type=int, default=512, help="steps per episode, in tokens")
+    parser.add_argument("--window", type=int, default=128, help="steps per latency bucket")
+    parser.add_argument("--episodes", type=int, default=3)
+    parser.add_argument("--resets", type=int, default=500)
+    parser.add_argument("--envs", type=int, default=16, help="envs built for the memory measurement")
+    parser.add_argument("--model", default=None,
+                        help="use this model's tokenizer and config (default: a byte tokenizer)")
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    parser.add_argument("--compare", default=None, help="baseline JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    corpus = metered_corpus(args.poems, args.seed)
+    if args.model:
+        from src.env import load_config, load_tokenizer
+        tokenizer, config = load_tokenizer(args.model), load_config(args.model)
+    else:
+        tokenizer, config = ByteTokenizer(), SimpleNamespace(max_position_embeddings=args.episode_length)
+
+    report = {
+        "meta": {"timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                 "commit": _git_commit(), "python": platform.python_version(),
+                 "platform": platform.platform(), "cpus": os.cpu_count(),
+                 "tokenizer": getattr(tokenizer, "name_or_path", None), "args": vars(args)},
+        "results": {},
+    }
+    _caches_off()
+    report["results"]["verify_meter"] = bench_verify(corpus)
+    report["results"]["calculate_reward"] = bench_reward(corpus)
+    _caches_on()
+    report["results"].update({
+        "step": bench_step(tokenizer, config, corpus, args.episode_length, args.window, args.episodes),
+        "reset": bench_reset(tokenizer, config, args.resets),
+        "rss": bench_rss(args.model, args.envs),
+    })
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print("regression:", line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
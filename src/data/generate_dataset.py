@@ -2,9 +2,15 @@
 Produces prompts.jsonl in repo root.
 
 Each line: {"topic": "...", "meter": "..."}
+
+With --tokenizer, also writes a pre-tokenized, memory-mapped prompt store
+(see src/prompt_store.py) that SanskritMeterEnv can sample from:
+
+    python -m src.data.generate_dataset --tokenizer google/gemma-2b
+    python -m src.data.generate_dataset --tokenizer google/gemma-2b --store-only
 """
 from __future__ import annotations
-import json, itertools, random
+import argparse, json, itertools, random
 from pathlib import Path
 
 TOPICS = [
@@ -86,23 +92,49 @@ Please write a Sanskrit poem in {entry['meter']} meter on the theme of "{entry['
 Return only the poem in Devanagari script, without any explanation.
 """
 
-def main() -> None:
-    # Create all combinations of topics and meters
-    base_entries = [{"topic": t, "meter": m}
-                   for t, m in itertools.product(TOPICS, METERS)]
-    random.shuffle(base_entries)
-    
-    # Add formatted prompts
-    entries = [{
-        **entry,
-        "prompt": format_prompt(entry)
-    } for entry in base_entries]
+def load_entries(path: Path) -> list:
+    with path.open("r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def main(tokenizer: str | None = None, store: Path | None = None, store_only: bool = False) -> None:
+    """Write prompts.jsonl and, given a tokenizer name, a prompt store built from it.
 
+    With `store_only`, the store is built from the existing prompts.jsonl instead.
+    """
     out = Path(__file__).parent / "prompts.jsonl"
-    with out.open("w", encoding="utf-8") as f:
-        for entry in entries:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-    print(f"✔  Wrote {len(entries)} prompts to {out}")
+    if store_only:
+        entries = load_entries(out)
+    else:
+        # Create all combinations of topics and meters
+        base_entries = [{"topic": t, "meter": m}
+                       for t, m in itertools.product(TOPICS, METERS)]
+        random.shuffle(base_entries)
+        
+        # Add formatted prompts
+        entries = [{
+            **entry,
+            "prompt": format_prompt(entry)
+        } for entry in base_entries]
+
+        with out.open("w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"✔  Wrote {len(entries)} prompts to {out}")
+
+    if tokenizer:
+        from src.env import load_tokenizer
+        from src.prompt_store import DEFAULT_STORE_PATH, write_prompt_store
+        written = write_prompt_store(entries, load_tokenizer(tokenizer), store or DEFAULT_STORE_PATH)
+        print(f"✔  Wrote {len(written)} tokenized prompts to {written.path}")
+
+def cli() -> None:
+    parser = argparse.ArgumentParser(description="Generate the meter/topic prompt dataset.")
+    parser.add_argument("--tokenizer", help="also write a prompt store tokenized with this tokenizer")
+    parser.add_argument("--store", type=Path, default=None, help="prompt store directory")
+    parser.add_argument("--store-only", action="store_true",
+                        help="build the store from the existing prompts.jsonl instead of regenerating it")
+    args = parser.parse_args()
+    main(args.tokenizer, args.store, args.store_only)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
\ No newline at end of file
@@ -5,104 +5,263 @@ A Gym environment for training language models to generate Sanskrit poetry in sp
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Literal, Union
 from pathlib import Path
 import json
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from .reward import calculate_reward
+from functools import lru_cache
+from time import perf_counter
+from .instrumentation import Instrumentation, lap, make_instrumentation
+from .meters import METER_TEMPLATES
+from .prompt_store import PromptStore, load_prompt_store
+from .scanner import REWARD_MODES, IncrementalMeterScanner, RewardMode
+from .token_table import TableMeterScanner, TokenTable, load_token_table
+
+DEFAULT_PROMPTS_PATH = Path(__file__).parent / "data" / "prompts.jsonl"
+
+ObservationMode = Literal["copy", "view", "delta"]
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+@lru_cache(maxsize=None)
+def load_prompts(path: Path = DEFAULT_PROMPTS_PATH) -> Tuple[Dict[str, str], ...]:
+    """Load the prompt table once per process; env instances share the result.
+
+    Prompts for meters without a `meters.METER_TEMPLATES` entry (प्रियदर्शिनी) are left
+    out: no poem can be verified in them, so they would only ever earn 0.
+    """
+    prompts = []
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            prompt = json.loads(line)
+            if prompt["meter"] in METER_TEMPLATES:
+                prompts.append(prompt)
+    return tuple(prompts)
+
+@lru_cache(maxsize=None)
+def load_tokenizer(model_name: str) -> Any:
+    """Load a tokenizer once per process; env instances share it."""
+    # transformers (and through it torch) is imported only when an env is built
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name)
+
+@lru_cache(maxsize=None)
+def load_config(model_name: str) -> Any:
+    """Load a model config (not its weights) once per process."""
+    from transformers import AutoConfig
+    return AutoConfig.from_pretrained(model_name)
 
 class SanskritMeterEnv(gym.Env):
     """Environment for generating Sanskrit poetry in specific meters."""
     
     metadata = {"render_modes": ["human"]}
     
-    def __init__(self, render_mode: Optional[str] = None, model_name: str = "google/gemma-2b"):
+    def __init__(self, render_mode: Optional[str] = None, model_name: str = "google/gemma-2b",
+                 tokenizer: Any = None, config: Any = None, max_length: Optional[int] = None,
+                 observation_mode: ObservationMode = "copy",
+                 prompt_store: Union[PromptStore, str, Path, None] = None,
+                 reward_mode: RewardMode = "token", shaping: float = 0.0,
+                 instrumentation: Union[bool, Instrumentation, None] = None,
+                 token_table: Union[bool, TokenTable, str, Path, None] = None):
+        """
+        Args:
+            max_length: Length of the prompt and generation buffers, and the episode
+                length limit; defaults to the model's `max_position_embeddings`
+            observation_mode: "copy" returns fresh arrays each step, "view" returns
+                read-only views of the env's buffers (valid until the next step or
+                reset), and "delta" returns only the newly appended token and its
+                position, with the full prompt in the `reset` info
+            prompt_store: A pre-tokenized `PromptStore` (or its directory) built for
+                this tokenizer; `reset` then samples from it with no JSON parsing or
+                tokenization. By default prompts come from `prompts.jsonl`.
+            reward_mode: When the full reward is computed: every token ("token"), when
+                a line ends at a newline or daṇḍa ("line"), or at the end of the
+                episode ("terminal"); the final step is always scored. "external"
+                never computes it, for drivers that score elsewhere (`src.rollout`)
+            shaping: Weight of the cheap meter-prefix signal returned as the reward on
+                steps that are not fully scored (0 means those steps get 0)
+            instrumentation: True, or an `Instrumentation` with sinks, to time each
+                step's sections into `info["timings"]` and the histograms of
+                `self.instrumentation` (see `src.instrumentation`); off by default
+            token_table: True (built or loaded from the default cache for this
+                tokenizer), a `TokenTable` or its directory, to advance the meter
+                patterns on token ids by table lookup and only decode when the full
+                reward is computed (see `src.token_table`); best with `reward_mode`
+                "line" or "terminal". Also enables `logits_mask`.
+        """
         super().__init__()
+        if observation_mode not in ("copy", "view", "delta"):
+            raise ValueError(f"Unknown observation_mode {observation_mode!r}")
+        if reward_mode not in REWARD_MODES:
+            raise ValueError(f"Unknown reward_mode {reward_mode!r}")
+        self.reward_mode = reward_mode
+        self.shaping = shaping
+        self.instrumentation = make_instrumentation(instrumentation)
         
-        # Load Gemma tokenizer and model
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(model_name)
+        # Load Gemma tokenizer and config; pass pre-built ones to share them between envs.
+        # Only the config is needed, so the model weights are never loaded.
+        self.tokenizer = tokenizer if tokenizer is not None else load_tokenizer(model_name)
+        if max_length is None:
+            self.config = config if config is not None else load_config(model_name)
+            max_length = self.config.max_position_embeddings
+        else:
+            self.config = config
         
-        # Load the prompts
-        data_path = Path(__file__).parent / "data" / "prompts.jsonl"
-        self.prompts = []
-        with data_path.open("r", encoding="utf-8") as f:
-            for line in f:
-                self.prompts.append(json.loads(line))
+        # Load the prompts, or map the pre-tokenized store
+        if prompt_store is not None:
+            if not isinstance(prompt_store, PromptStore):
+                prompt_store = load_prompt_store(Path(prompt_store))
+            prompt_store.check_tokenizer(self.tokenizer)
+            self.prompts = None
+        else:
+            self.prompts = load_prompts()
+        self.prompt_store = prompt_store
         
         # Action space is Gemma's vocabulary
         self.action_space = spaces.Discrete(self.tokenizer.vocab_size)
         
-        # Define observation space based on model's config
-        self.max_seq_len = self.model.config.max_position_embeddings
-        self.observation_space = spaces.Dict({
-            "prompt_ids": spaces.Box(low=0, high=self.tokenizer.vocab_size, shape=(self.max_seq_len,), dtype=np.int32),
-            "generated_ids": spaces.Box(low=0, high=self.tokenizer.vocab_size, shape=(self.max_seq_len,), dtype=np.int32),
-            "attention_mask": spaces.Box(low=0, high=1, shape=(self.max_seq_len,), dtype=np.int32)
-        })
+        # Define observation space based on the buffer length
+        self.max_seq_len = max_length
+        self.observation_mode = observation_mode
+        vocab_size = self.tokenizer.vocab_size
+        if observation_mode == "delta":
+            self.observation_space = spaces.Dict({
+                "token_id": spaces.Box(low=0, high=vocab_size, shape=(1,), dtype=np.int32),
+                "position": spaces.Box(low=0, high=self.max_seq_len, shape=(1,), dtype=np.int32)
+            })
+        else:
+            self.observation_space = spaces.Dict({
+                "prompt_ids": spaces.Box(low=0, high=vocab_size, shape=(self.max_seq_len,), dtype=np.int32),
+                "generated_ids": spaces.Box(low=0, high=vocab_size, shape=(self.max_seq_len,), dtype=np.int32),
+                "attention_mask": spaces.Box(low=0, high=1, shape=(self.max_seq_len,), dtype=np.int32)
+            })
+        
+        # Observations are written in place into these buffers; "view" mode hands out
+        # read-only views of them, so nothing is allocated per step
+        self._buffers = {
+            key: np.zeros(self.max_seq_len, dtype=np.int32)
+            for key in ("prompt_ids", "generated_ids", "attention_mask")
+        }
+        self._views = {key: _read_only(buf) for key, buf in self._buffers.items()}
+        self._delta = {key: np.zeros(1, dtype=np.int32) for key in ("token_id", "position")}
+        self._delta_views = {key: _read_only(buf) for key, buf in self._delta.items()}
+        self._length = 0
         
         self.render_mode = render_mode
         self.current_prompt = None
-        self.current_generated = []
+        if token_table is True:
+            token_table = load_token_table(self.tokenizer)
+        elif isinstance(token_table, (str, Path)):
+            token_table = TokenTable.load(token_table)
+        self.token_table = token_table or None
+        if self.token_table is not None:
+            self.scanner = TableMeterScanner(self.tokenizer, self.token_table)
+        else:
+            self.scanner = IncrementalMeterScanner(self.tokenizer)
         
     def reset(self, seed: Optional[int] = None, options: Optional[Dict] = None) -> Tuple[Dict, Dict]:
         super().reset(seed=seed)
         
-        # Select a random prompt
-        self.current_prompt = self.np_random.choice(self.prompts)
-        self.current_generated = []
+        # Select a random prompt and write its ids into the prompt buffers
+        if self.prompt_store is not None:
+            scorable = self.prompt_store.scorable
+            index = int(scorable[self.np_random.integers(len(scorable))])
+            self.current_prompt = self.prompt_store.entry(index)
+            self._write_prompt(self.prompt_store.ids(index))
+        else:
+            self.current_prompt = self.np_random.choice(self.prompts)
+            encoded = self.tokenizer(self.current_prompt['prompt'], return_tensors="np", padding="max_length",
+                                     truncation=True, max_length=self.max_seq_len)
+            self._buffers["prompt_ids"][:] = encoded["input_ids"][0]
+            self._buffers["attention_mask"][:] = encoded["attention_mask"][0]
+        self.scanner.reset(self.current_prompt["meter"])
+        self._buffers["generated_ids"][:self._length] = 0
+        self._length = 0
         
-        # Get the formatted prompt
-        prompt_text = self.current_prompt['prompt']
-        
-        # Encode prompt
-        encoded = self.tokenizer(prompt_text, return_tensors="np", padding="max_length", max_length=self.max_seq_len)
-        
-        obs = {
-            "prompt_ids": encoded["input_ids"][0],
-            "generated_ids": np.zeros(self.max_seq_len, dtype=np.int32),
-            "attention_mask": encoded["attention_mask"][0]
-        }
-        
-        return obs, {}
+        if self.observation_mode == "delta":
+            self._delta["token_id"][0] = 0
+            self._delta["position"][0] = 0
+            return self._observation(), {"prompt_ids": self._views["prompt_ids"],
+                                         "attention_mask": self._views["attention_mask"]}
+        return self._observation(), {}
         
     def step(self, action: int) -> Tuple[Dict, float, bool, bool, Dict]:
-        # Add token to generated sequence
-        self.current_generated.append(action)
-        
-        # Create full sequence (prompt + generated)
-        generated_array = np.array(self.current_generated)
-        padded_generated = np.pad(generated_array, 
-                                 (0, self.max_seq_len - len(generated_array)),
-                                 mode='constant')
+        timings = {} if self.instrumentation is not None else None
+        start = perf_counter() if timings is not None else 0.0
         
-        # Update observation
-        obs = {
-            "prompt_ids": self.observation_space["prompt_ids"].low.copy(),  # Keep original prompt
-            "generated_ids": padded_generated,
-            "attention_mask": np.ones(self.max_seq_len, dtype=np.int32)  # All tokens visible
-        }
-        
-        # Convert generated tokens to text
-        generated_text = self.tokenizer.decode(self.current_generated)
+        # Add token to generated sequence
+        action = int(action)
+        self._buffers["generated_ids"][self._length] = action
+        self._delta["token_id"][0] = action
+        self._delta["position"][0] = self._length
+        self._length += 1
         
-        # Calculate reward using the meter from the prompt
-        reward_info = calculate_reward(generated_text, self.current_prompt["meter"])
-        reward = reward_info["reward"]
+        # Decode the new token and re-scan only the line it extends
+        boundaries = self.scanner.boundaries
+        self.scanner.push(action, timings)
         
         # Episode is done if we hit max length or generate EOS token
-        done = (len(self.current_generated) >= self.max_seq_len or
+        done = (self._length >= self.max_seq_len or
                 action == self.tokenizer.eos_token_id)
         
-        return obs, reward, done, False, {}
+        # Calculate reward using the meter from the prompt, when the schedule says so
+        reward, evaluated = self.scanner.scheduled_reward(
+            self.reward_mode, self.scanner.boundaries != boundaries, done, self.shaping,
+            timings=timings)
+        
+        if timings is None:
+            return self._observation(), reward, done, False, {"reward_evaluated": evaluated}
+        t = perf_counter()
+        obs = self._observation()
+        lap(timings, "observation", t)
+        lap(timings, "step", start)
+        self.instrumentation.record(timings)
+        return obs, reward, done, False, {"reward_evaluated": evaluated, "timings": timings}
+    
+    def _write_prompt(self, ids: np.ndarray) -> None:
+        """Pad (or truncate) pre-tokenized prompt ids into the prompt buffers, as the
+        tokenizer's `padding="max_length"` would."""
+        n = min(len(ids), self.max_seq_len)
+        pad_id = self.tokenizer.pad_token_id or 0
+        prompt_ids, mask = self._buffers["prompt_ids"], self._buffers["attention_mask"]
+        if getattr(self.tokenizer, "padding_side", "right") == "left":
+            prompt_ids[:self.max_seq_len - n] = pad_id
+            prompt_ids[self.max_seq_len - n:] = ids[:n]
+            mask[:self.max_seq_len - n] = 0
+            mask[self.max_seq_len - n:] = 1
+        else:
+            prompt_ids[:n] = ids[:n]
+            prompt_ids[n:] = pad_id
+            mask[:n] = 1
+            mask[n:] = 0
+    
+    def _observation(self) -> Dict[str, np.ndarray]:
+        if self.observation_mode == "delta":
+            return dict(self._delta_views)
+        if self.observation_mode == "view":
+            return dict(self._views)
+        return {key: buf.copy() for key, buf in self._buffers.items()}
+    
+    def logits_mask(self) -> np.ndarray:
+        """Boolean mask over the vocabulary of the tokens that keep the poem on the
+        target meter (`TokenTable.logits_mask`); needs `token_table`."""
+        if self.token_table is None:
+            raise ValueError("logits_mask needs an env created with token_table")
+        return self.scanner.logits_mask()
+    
+    @property
+    def generated_ids(self) -> np.ndarray:
+        """The tokens generated so far this episode, as a read-only view."""
+        return self._views["generated_ids"][:self._length]
     
     def render(self):
         if self.render_mode == "human":
             print(f"Prompt Topic: {self.current_prompt['topic']}")
             print(f"Target Meter: {self.current_prompt['meter']}")
             print("Generated Text:")
-            if self.current_generated:
-                text = self.tokenizer.decode(self.current_generated)
-                print(text)
+            if self._length:
+                print(self.scanner.text)
             else:
                 print("<no text generated yet>")
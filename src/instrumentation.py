@@ -0,0 +1,192 @@
+"""
+Opt-in timing of the env's hot path.
+
+With `SanskritMeterEnv(instrumentation=True)` (or an `Instrumentation` instance), each
+step times its sections, decode, scansion, meter identification, each reward
+component and observation construction, and returns them in seconds as
+`info["timings"]`. The same timings are aggregated into one histogram per section and
+passed to the configured sinks:
+
+- any callable, called with each step's timings (`CallbackSink`)
+- `CSVSink`, one row per step
+- `PrometheusSink`, the histograms in the Prometheus text format, rewritten every
+  `flush_every` steps (e.g. for node_exporter's textfile collector)
+
+When instrumentation is off, nothing is timed or allocated: the hot-path functions
+take `timings=None` and only check that once per section.
+"""
+
+import bisect
+import csv
+import os
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, IO, Iterable, List, Optional, Sequence, Union
+
+# Sections in the order they run in a step; "reward" includes the reward components
+# after it, and "step" is the whole step.
+SECTIONS = ("decode", "scansion", "reward", "meter", "syllable", "semantic", "style",
+            "originality", "observation", "step")
+
+# Histogram bucket upper bounds, in seconds: 1-2.5-5 steps from 1 us to 1 s
+DEFAULT_BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 0) for m in (1.0, 2.5, 5.0)) + (1.0,)
+
+Timings = Dict[str, float]
+
+def lap(timings: Timings, section: str, start: float) -> float:
+    """Record the time since `start` as `section` and return the current time."""
+    now = perf_counter()
+    timings[section] = timings.get(section, 0.0) + now - start
+    return now
+
+class Histogram:
+    """Counts of observations per bucket, plus their count and sum (as in Prometheus)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the `q` quantile, interpolating linearly within its bucket."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = self.buckets[i - 1] if i else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+class CallbackSink:
+    """Calls `fn(timings)` after every step."""
+
+    def __init__(self, fn: Callable[[Timings], Any]):
+        self.fn = fn
+
+    def write(self, timings: Timings) -> None:
+        self.fn(timings)
+
+    def flush(self, instrumentation: "Instrumentation") -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class CSVSink:
+    """Appends one row of section timings (in seconds) per step to a CSV file."""
+
+    def __init__(self, path: Union[str, Path], sections: Sequence[str] = SECTIONS):
+        self.path = Path(path)
+        self.sections = tuple(sections)
+        new = not self.path.exists() or self.path.stat().st_size == 0
+        self._file: IO[str] = self.path.open("a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        if new:
+            self._writer.writerow(self.sections)
+
+    def write(self, timings: Timings) -> None:
+        self._writer.writerow([f"{timings[s]:.9f}" if s in timings else "" for s in self.sections])
+
+    def flush(self, instrumentation: "Instrumentation") -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+class PrometheusSink:
+    """Writes the histograms to `path` in the Prometheus text exposition format.
+
+    The file is replaced atomically, so a collector never reads a partial one.
+    """
+
+    def __init__(self, path: Union[str, Path], name: str = "sanskrit_rl_step_section_seconds"):
+        self.path = Path(path)
+        self.name = name
+
+    def write(self, timings: Timings) -> None:
+        pass
+
+    def flush(self, instrumentation: "Instrumentation") -> None:
+        lines = [f"# HELP {self.name} Time spent in each section of SanskritMeterEnv.step.",
+                 f"# TYPE {self.name} histogram"]
+        for section, hist in instrumentation.histograms.items():
+            cumulative = 0
+            for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{section="{section}",le="{le}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{section="{section}"}} {hist.sum!r}')
+            lines.append(f'{self.name}_count{{section="{section}"}} {hist.count}')
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        pass
+
+class Instrumentation:
+    """Aggregates per-step timings into histograms and forwards them to sinks.
+
+    Args:
+        sinks: Sink objects (`write`, `flush`, `close`), or plain callables taking a
+            step's timings
+        buckets: Histogram bucket upper bounds in seconds
+        flush_every: Flush the sinks every this many steps; `flush` flushes now
+    """
+
+    def __init__(self, sinks: Iterable[Any] = (), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 flush_every: int = 1000):
+        self.sinks: List[Any] = [s if hasattr(s, "write") else CallbackSink(s) for s in sinks]
+        self.buckets = tuple(buckets)
+        self.flush_every = flush_every
+        self.histograms: Dict[str, Histogram] = {}
+        self.steps = 0
+
+    def record(self, timings: Timings) -> None:
+        """Add one step's timings."""
+        for section, seconds in timings.items():
+            hist = self.histograms.get(section)
+            if hist is None:
+                hist = self.histograms[section] = Histogram(self.buckets)
+            hist.observe(seconds)
+        for sink in self.sinks:
+            sink.write(timings)
+        self.steps += 1
+        if self.flush_every and self.steps % self.flush_every == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush(self)
+
+    def close(self) -> None:
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean and estimated p50/p95/p99 (in seconds) of each section."""
+        return {section: {"count": hist.count, "mean": hist.sum / hist.count if hist.count else 0.0,
+                          "p50": hist.quantile(0.5), "p95": hist.quantile(0.95), "p99": hist.quantile(0.99)}
+                for section, hist in self.histograms.items()}
+
+    def reset(self) -> None:
+        """Drop the aggregated histograms (sinks are left as they are)."""
+        self.histograms.clear()
+        self.steps = 0
+
+def make_instrumentation(instrumentation: Union[bool, Instrumentation, None]) -> Optional[Instrumentation]:
+    """The `instrumentation` argument of the envs: True for a sink-less
+    `Instrumentation`, an instance as is, and False/None for none."""
+    if instrumentation is True:
+        return Instrumentation()
+    return instrumentation or None
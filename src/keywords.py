@@ -0,0 +1,162 @@
+"""
+Multi-pattern phrase matching for the reward's keyword and self-reference checks.
+
+Both checks scan a poem for a list of phrases. Instead of one regex per phrase, each
+phrase list is compiled once into an Aho–Corasick automaton that finds every
+occurrence of every phrase in a single pass over the text. Matchers are plain Python
+objects, so they pickle, and the per-topic and self-reference matchers are cached per
+process, so pool workers build each one at most once.
+
+Text and phrases are normalized the same way before matching: NFC, no zero-width
+joiners, homorganic nasal + consonant written as anusvāra ('वसन्त' = 'वसंत'), single
+spaces, and case-folded Latin. Self-references are matched as whole words only, so
+that a phrase inside an ordinary word (पद्य in अनुपद्यते) does not count.
+"""
+
+import re
+import string
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Mapping, Tuple, Union
+
+from .data.generate_dataset import METERS, TOPICS
+
+_ZERO_WIDTH_RE = re.compile("[\u200b-\u200d\u2060]")
+_NASAL_RE = re.compile("[ङञणनम]्(?=[क-ह])")
+_SPACE_RE = re.compile(r"\s+")
+# Characters that end a word, in normalized text (where all whitespace is a space)
+WORD_BOUNDARIES = frozenset(" ।॥" + string.punctuation)
+
+def normalize(text: str) -> str:
+    """The form text and phrases are matched in (see the module docstring)."""
+    text = unicodedata.normalize("NFC", text)
+    text = _NASAL_RE.sub("ं", _ZERO_WIDTH_RE.sub("", text))
+    return _SPACE_RE.sub(" ", text).casefold()
+
+class AhoCorasick:
+    """An Aho–Corasick automaton over a fixed set of phrases.
+
+    `phrases` may be a mapping from phrase to a weight (`values`, default 1.0); phrases
+    equal after normalization are merged, keeping the larger weight. With
+    `whole_words`, only occurrences delimited by `WORD_BOUNDARIES` or the ends of the
+    text are reported.
+    """
+
+    def __init__(self, phrases: Union[Iterable[str], Mapping[str, float]], whole_words: bool = False):
+        self.whole_words = whole_words
+        weights = phrases if isinstance(phrases, Mapping) else dict.fromkeys(phrases, 1.0)
+        merged: Dict[str, float] = {}
+        for phrase, weight in weights.items():
+            phrase = normalize(phrase).strip()
+            if phrase:
+                merged[phrase] = max(weight, merged.get(phrase, weight))
+        self.phrases: Tuple[str, ...] = tuple(merged)
+        self.values: Tuple[float, ...] = tuple(merged.values())
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for k, phrase in enumerate(self.phrases):
+            state = 0
+            for ch in phrase:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (k,)
+
+        # Failure links, breadth first; each state also reports its suffix states' phrases
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start, phrase index) for every occurrence of every phrase, with
+        `start` an offset into `normalize(text)`."""
+        goto, fail, out, phrases = self._goto, self._fail, self._out, self.phrases
+        text = normalize(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for k in out[state]:
+                start = i + 1 - len(phrases[k])
+                if self.whole_words and not ((start == 0 or text[start - 1] in WORD_BOUNDARIES) and
+                                             (i + 1 == len(text) or text[i + 1] in WORD_BOUNDARIES)):
+                    continue
+                yield start, k
+
+    def counts(self, text: str) -> List[int]:
+        """Number of occurrences of each phrase in `text`."""
+        counts = [0] * len(self.phrases)
+        for _, k in self.finditer(text):
+            counts[k] += 1
+        return counts
+
+def _headword(topic: str) -> str:
+    # "वसन्तः (spring)" -> "वसन्तः"
+    return topic.split(" (")[0].strip()
+
+def _stem(word: str) -> str:
+    """Strip a nominative ending so the keyword also matches other case forms."""
+    for ending in ("ाः", "ः", "म्", "ं"):
+        if word.endswith(ending):
+            return word[:-len(ending)]
+    if word[-1:] in ("ा", "ी") and len(word) > 3:
+        return word[:-1]
+    return word
+
+def topic_keywords(topic: str) -> FrozenSet[str]:
+    """Keywords for one of `generate_dataset.TOPICS`: its Sanskrit headword and stem."""
+    word = _headword(topic)
+    return frozenset({word, _stem(word)})
+
+@lru_cache(maxsize=len(TOPICS))
+def topic_matcher(topic: str, extra_keywords: FrozenSet[str] = frozenset()) -> AhoCorasick:
+    """The compiled keyword matcher for `topic`, plus any `extra_keywords`."""
+    return AhoCorasick(sorted(topic_keywords(topic) | extra_keywords))
+
+# Target meters whose names are also ordinary words (जगती, "the world"), so naming
+# them is not a self-reference
+PLAIN_WORD_METERS = frozenset({"जगती", "प्रियदर्शिनी"})
+
+# Whole words and phrases that refer to the poem, its meter or its evaluation rather
+# than the topic, with the penalty for each occurrence. Words are listed in their
+# common case forms, since they only match whole words; stems that are also ordinary
+# words (पद्य, छन्द, सहृदय, निर्दोष) are left out.
+SELF_REFERENCES: Dict[str, float] = {
+    # The poem itself
+    **dict.fromkeys(["श्लोकः", "श्लोकम्", "श्लोकेन", "श्लोके", "श्लोकाः", "श्लोकान्"], 0.5),
+    **dict.fromkeys(["काव्यम्", "काव्येन", "काव्ये", "काव्यस्य", "काव्यानि"], 0.5),
+    **dict.fromkeys(["कविता", "कविताम्", "कवितया", "कवितायाम्", "कवितायाः"], 0.5),
+    "अयं श्लोकः": 0.5, "इदं पद्यम्": 0.5, "मम कविता": 0.5,
+    # Self-praise and critics
+    "उत्तमं काव्यम्": 0.5, "सुन्दरं काव्यम्": 0.5,
+    **dict.fromkeys(["परीक्षकः", "परीक्षकाः", "निर्णायकः", "निर्णायकाः", "पुरस्कारः", "पुरस्कारम्"], 0.5),
+    # Latin-script leakage from the prompt or the grader
+    **dict.fromkeys(["poem", "poems", "verse", "verses", "meter", "metre"], 0.5),
+    "reward": 1.0, "score": 1.0,
+    # Naming the target meter
+    **{meter: 0.5 for meter in METERS if meter not in PLAIN_WORD_METERS},
+}
+
+@lru_cache(maxsize=1)
+def self_reference_matcher() -> AhoCorasick:
+    return AhoCorasick(SELF_REFERENCES, whole_words=True)
+
+def self_reference_penalty(text: str) -> float:
+    """Sum of `SELF_REFERENCES` penalties over all matches in `text`."""
+    matcher = self_reference_matcher()
+    return sum(matcher.values[k] for _, k in matcher.finditer(text))
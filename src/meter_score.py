@@ -0,0 +1,120 @@
+"""
+Dense partial-credit meter scores.
+
+A binary "is it in the meter" check gives the policy almost no signal, so this scores
+how close a poem's syllable weights are to the target meter's template: each pāda is
+compared with its template by edit distance (a free '.' position matches either
+weight), and the pāda scores are averaged. Distances for a whole batch of candidates
+are computed together in NumPy.
+"""
+
+from math import ceil
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .meters import METER_TEMPLATES, MeterIndex
+
+_CODES = {"L": 0, "G": 1, ".": 2}
+_PAD = -1
+
+def _encode(strings: Sequence[str], width: int) -> np.ndarray:
+    out = np.full((len(strings), width), _PAD, dtype=np.int8)
+    for row, s in enumerate(strings):
+        out[row, :len(s)] = [_CODES[c] for c in s]
+    return out
+
+def levenshtein_batch(patterns: Sequence[str], templates: Sequence[str]) -> np.ndarray:
+    """Edit distances between `patterns[i]` and `templates[i]`, vectorized over i.
+
+    Unit-cost insertions, deletions and substitutions; a '.' in a template matches
+    either weight. Rows of the DP table are computed for all pairs at once, with the
+    insertion recurrence done as a running minimum along the row.
+    """
+    n_pairs = len(patterns)
+    if not n_pairs:
+        return np.zeros(0, dtype=np.int64)
+    a_len = np.array([len(p) for p in patterns])
+    b_len = np.array([len(t) for t in templates])
+    a = _encode(patterns, max(int(a_len.max()), 1))
+    b = _encode(templates, max(int(b_len.max()), 1))
+    cols = np.arange(b.shape[1] + 1)
+
+    row = np.broadcast_to(cols, (n_pairs, len(cols))).astype(np.int64)
+    dist = row[np.arange(n_pairs), b_len].copy()   # patterns of length 0
+    for i in range(a.shape[1]):
+        match = (a[:, i:i + 1] == b) | (b == _CODES["."])
+        diag = row[:, :-1] + ~match
+        up = row[:, 1:] + 1
+        cand = np.empty_like(row)
+        cand[:, 0] = i + 1
+        cand[:, 1:] = np.minimum(diag, up)
+        # D[j] = min(cand[j], D[j-1] + 1) == min over k <= j of cand[k] + (j - k)
+        row = np.minimum.accumulate(cand - cols, axis=1) + cols
+        done = a_len == i + 1
+        dist[done] = row[done, b_len[done]]
+    return dist
+
+def _segment(lines: List[str], verse: Tuple[str, ...], per_line: int) -> List[str]:
+    """Cut `lines` into pāda-sized chunks under a layout of `per_line` pādas per line.
+
+    Returns one chunk per template pāda, for as many verses as the lines cover; the
+    last pāda on a line takes the rest of the line, and pādas with no line are empty.
+    """
+    n_padas = 4 * max(1, ceil(len(lines) * per_line / 4))
+    chunks = [""] * n_padas
+    for i, line in enumerate(lines):
+        first = i * per_line
+        pos = 0
+        for k in range(per_line):
+            pada = first + k
+            if pada >= n_padas:
+                break
+            if k == per_line - 1:
+                chunks[pada] = line[pos:]
+            else:
+                width = len(verse[pada % 4])
+                chunks[pada] = line[pos:pos + width]
+                pos += width
+    return chunks
+
+def dense_meter_scores(
+    poems: Sequence[Sequence[str]], target_meter: str
+) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Partial-credit scores of scanned poems against one target meter.
+
+    Args:
+        poems: Per-line 'L'/'G' patterns of each candidate poem
+        target_meter: A meter in `meters.METER_TEMPLATES`
+
+    Returns:
+        (scores, pada_scores): `scores[i]` in [0, 1] for candidate i, and
+        `pada_scores[i]` its per-pāda scores, `1 - distance / len(template)` clipped
+        at 0. Each candidate is scored under its best line layout (pāda, half-verse or
+        verse per line) and template alternative.
+    """
+    verses = METER_TEMPLATES[target_meter]
+    chunks: List[str] = []
+    templates: List[str] = []
+    options = []   # (candidate, start, n_padas) per (layout, verse alternative)
+    for b, patterns in enumerate(poems):
+        lines = [p for p in patterns if p]
+        for per_line in MeterIndex.LAYOUTS:
+            for verse in verses:
+                segs = _segment(lines, verse, per_line)
+                options.append((b, len(chunks), len(segs)))
+                chunks.extend(segs)
+                templates.extend(verse[k % 4] for k in range(len(segs)))
+
+    dist = levenshtein_batch(chunks, templates)
+    lengths = np.array([len(t) for t in templates])
+    pada = np.clip(1.0 - dist / np.maximum(lengths, 1), 0.0, 1.0)
+
+    best = np.full(len(poems), -1.0)
+    breakdown = [np.zeros(4) for _ in poems]
+    for b, start, n in options:
+        score = float(pada[start:start + n].mean())
+        if score > best[b]:
+            best[b] = score
+            breakdown[b] = pada[start:start + n]
+    return np.maximum(best, 0.0), breakdown
@@ -0,0 +1,167 @@
+"""
+Precompiled laghu/guru automata for the target meters in `generate_dataset.METERS`.
+
+The env only ever asks whether a poem is in one known meter, so instead of asking
+chandas to identify the meter from scratch, each target's pāda templates are compiled
+once into small DFAs over {'L', 'G'}. Checking a poem is then a single linear pass
+over its syllable weights with early rejection, and a partial poem can be scored by
+how far its lines get before the automaton rejects them.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Pāda templates per meter: 'L'/'G' are fixed weights and '.' is free. As in chandas,
+# the last syllable of every pāda is free (pādānta-laghu counts as guru). A meter can
+# list several alternative verses; each verse is four pādas.
+METER_TEMPLATES: Dict[str, List[Tuple[str, str, str, str]]] = {
+    # Śloka: the 5th-7th syllables are LGL in even pādas. Odd pādas are free, since
+    # chandas accepts their vipulā variants too.
+    "अनुष्टुप्": [("........", "....LGL.", "........", "....LGL.")],
+    "मन्दाक्रान्ता": [("GGGGLLLLLGGLGGLG.",) * 4],
+    "शार्दूलविक्रीडितम्": [("GGGLLGLGLLLGGGLGGL.",) * 4],
+    "वसन्ततिलका": [("GGLGLLLGLLGLG.",) * 4],
+    # Triṣṭubh and Jagatī name syllable counts; the classical meters of those counts
+    # are the Indravajrā/Upendravajrā and Vaṃśastha/Indravaṃśā mixtures (upajāti).
+    "त्रिष्टुप्": [(".GLGGLLGLG.",) * 4],
+    "जगती": [(".GLGGLLGLGL.",) * 4],
+    # प्रियदर्शिनी has no chandas entry or agreed pattern, so it has no template, and
+    # `env.load_prompts` and `PromptStore.scorable` leave its prompts out.
+}
+
+# Chandas' names for the same meters, for callers that identify with chandas.
+CHANDAS_NAMES: Dict[str, Tuple[str, ...]] = {
+    "अनुष्टुप्": ("Anuṣṭup (Śloka)",),
+    "मन्दाक्रान्ता": ("Mandākrāntā",),
+    "शार्दूलविक्रीडितम्": ("Śārdūlavikrīḍitam",),
+    "वसन्ततिलका": ("Vasantatilakā",),
+    "त्रिष्टुप्": ("Upajāti", "indravajrā", "upendravajrā"),
+    "जगती": ("vaṃśastham", "indravaṃśā", "upameyā"),
+}
+
+REJECT = -1
+_SYMBOLS = {"L": 0, "G": 1}
+
+class PatternDFA:
+    """A DFA over 'L'/'G' accepting any of a set of templates.
+
+    Built by subset construction over the (template, position) NFA, so alternatives
+    sharing a prefix share states (a trie with wildcard edges merged).
+    """
+
+    def __init__(self, templates: Sequence[str]):
+        self.templates = tuple(templates)
+        start = frozenset((t, 0) for t in range(len(templates)))
+        index = {start: 0}
+        self.delta: List[List[int]] = []
+        self.accepting: List[bool] = []
+        queue = [start]
+        while queue:
+            state = queue.pop(0)
+            self.accepting.append(any(pos == len(self.templates[t]) for t, pos in state))
+            row = []
+            for symbol in "LG":
+                nxt = frozenset(
+                    (t, pos + 1) for t, pos in state
+                    if pos < len(self.templates[t]) and self.templates[t][pos] in (symbol, ".")
+                )
+                if not nxt:
+                    row.append(REJECT)
+                    continue
+                if nxt not in index:
+                    index[nxt] = len(index)
+                    queue.append(nxt)
+                row.append(index[nxt])
+            self.delta.append(row)
+
+    def run(self, pattern: str) -> Tuple[int, int]:
+        """Return (final state or REJECT, number of symbols consumed before rejection)."""
+        state, delta = 0, self.delta
+        for i, symbol in enumerate(pattern):
+            state = delta[state][_SYMBOLS[symbol]]
+            if state == REJECT:
+                return REJECT, i
+        return state, len(pattern)
+
+    def accepts(self, pattern: str) -> bool:
+        state, _ = self.run(pattern)
+        return state != REJECT and self.accepting[state]
+
+    def viable(self, pattern: str) -> bool:
+        """Whether `pattern` is a prefix of some accepted pattern."""
+        return self.run(pattern)[0] != REJECT
+
+class MeterIndex:
+    """Compiled automata for the target meters, keyed by their `METERS` names.
+
+    A poem may be written one pāda, one half-verse or one whole verse per line, for any
+    number of verses. Each layout maps line i to the DFA for the pādas it should hold,
+    and a poem matches if it matches under some layout.
+    """
+
+    LAYOUTS = (1, 2, 4)   # pādas per line
+
+    def __init__(self, templates: Optional[Dict[str, List[Tuple[str, str, str, str]]]] = None):
+        templates = METER_TEMPLATES if templates is None else templates
+        self._dfas: Dict[Tuple[str, int, int], PatternDFA] = {}
+        for meter, verses in templates.items():
+            for per_line in self.LAYOUTS:
+                for start in range(0, 4, per_line):
+                    self._dfas[(meter, start, per_line)] = PatternDFA(
+                        ["".join(verse[start:start + per_line]) for verse in verses]
+                    )
+        self.meters = tuple(templates)
+
+    def __contains__(self, meter: str) -> bool:
+        return meter in self.meters
+
+    def line_dfas(self, meter: str, n_lines: int, per_line: int) -> List[PatternDFA]:
+        """The DFA each of `n_lines` lines is checked against, with `per_line` pādas per line."""
+        return [self._dfas[(meter, (i * per_line) % 4, per_line)] for i in range(n_lines)]
+
+    def match(self, meter: str, patterns: Sequence[str]) -> bool:
+        """Whether the line `patterns` form complete verses of `meter`."""
+        patterns = [p for p in patterns if p]
+        if not patterns:
+            return False
+        return any(
+            len(patterns) * per_line % 4 == 0 and
+            all(dfa.accepts(p) for dfa, p in zip(self.line_dfas(meter, len(patterns), per_line), patterns))
+            for per_line in self.LAYOUTS
+        )
+
+    def viable(self, meter: str, patterns: Sequence[str]) -> bool:
+        """Whether a partial poem can still be completed: every line but the last is a
+        complete line of the meter and the last one is a viable prefix."""
+        patterns = [p for p in patterns if p]
+        if not patterns:
+            return True
+        for per_line in self.LAYOUTS:
+            dfas = self.line_dfas(meter, len(patterns), per_line)
+            if (all(dfa.accepts(p) for dfa, p in zip(dfas[:-1], patterns[:-1]))
+                    and dfas[-1].viable(patterns[-1])):
+                return True
+        return False
+
+    def prefix_score(self, meter: str, patterns: Sequence[str]) -> float:
+        """Fraction of the syllables written so far that fit the meter, in [0, 1].
+
+        Each line contributes the symbols its DFA consumes before rejecting; lines
+        before the last must also be complete, or lose their final symbol. Scored under
+        the best layout; 1.0 means the partial poem is still viable.
+        """
+        patterns = [p for p in patterns if p]
+        total = sum(len(p) for p in patterns)
+        if not total:
+            return 1.0
+        best = 0
+        for per_line in self.LAYOUTS:
+            good = 0
+            for k, (dfa, p) in enumerate(zip(self.line_dfas(meter, len(patterns), per_line), patterns)):
+                state, consumed = dfa.run(p)
+                if k < len(patterns) - 1 and (state == REJECT or not dfa.accepting[state]):
+                    consumed = min(consumed, len(p) - 1)
+                good += consumed
+            best = max(best, good)
+        return best / total
+
+METER_INDEX = MeterIndex()
@@ -0,0 +1,271 @@
+"""
+Prebuilt index for the originality (plagiarism) check.
+
+Comparing every rollout against every known verse is far too slow for a corpus of tens
+of thousands of ślokas, so the corpus is indexed once, at the syllable level:
+
+- MinHash signatures of each verse's syllable n-grams, banded into an LSH table, find
+  near-duplicates of a poem with a few binary searches and estimate their Jaccard
+  similarity.
+- A suffix automaton over all verses gives the longest run of syllables a poem shares
+  with any verse, in one pass over the poem.
+
+An index is saved as a directory of `.npy` arrays plus `meta.json`, and loaded with
+`mmap_mode="r"` so reward workers share its pages (as with `prompt_store`):
+
+    python -m src.plagiarism corpus.txt plagiarism.index   # verses separated by blank lines
+"""
+
+import argparse
+import json
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from .scansion import syllables
+
+_ARRAYS = ("seeds", "signatures", "band_keys", "band_docs",
+           "sam_link", "sam_len", "sam_offsets", "sam_symbols", "sam_targets")
+_UNKNOWN = -2     # a syllable not in the corpus; matches nothing
+_SEPARATOR = -1   # between verses in the suffix automaton
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, elementwise on uint64 (wrapping arithmetic)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _ngram_hashes(ids: np.ndarray, n: int) -> np.ndarray:
+    count = len(ids) - n + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.uint64)
+    symbols = ids.astype(np.int64).astype(np.uint64)
+    h = np.zeros(count, dtype=np.uint64)
+    for k in range(n):
+        h = _mix(h ^ symbols[k:k + count])
+    return h
+
+def _band_keys(signatures: np.ndarray, bands: int) -> np.ndarray:
+    """Hash each band of rows of `signatures` (..., num_perm) to one key, (..., bands)."""
+    rows = signatures.reshape(signatures.shape[:-1] + (bands, signatures.shape[-1] // bands))
+    keys = np.zeros(rows.shape[:-1], dtype=np.uint64)
+    for r in range(rows.shape[-1]):
+        keys = _mix(keys ^ rows[..., r])
+    return keys
+
+def _suffix_automaton(sequence: Sequence[int]) -> Dict[str, np.ndarray]:
+    """Build a suffix automaton and flatten its transitions into sorted CSR arrays."""
+    link, length, trans = [-1], [0], [{}]
+    last = 0
+    for c in sequence:
+        cur = len(length)
+        link.append(-1)
+        length.append(length[last] + 1)
+        trans.append({})
+        p = last
+        while p != -1 and c not in trans[p]:
+            trans[p][c] = cur
+            p = link[p]
+        if p == -1:
+            link[cur] = 0
+        else:
+            q = trans[p][c]
+            if length[p] + 1 == length[q]:
+                link[cur] = q
+            else:
+                clone = len(length)
+                link.append(link[q])
+                length.append(length[p] + 1)
+                trans.append(dict(trans[q]))
+                while p != -1 and trans[p].get(c) == q:
+                    trans[p][c] = clone
+                    p = link[p]
+                link[q] = link[cur] = clone
+        last = cur
+
+    counts = np.fromiter((len(t) for t in trans), dtype=np.int64, count=len(trans))
+    offsets = np.zeros(len(trans) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    symbols = np.fromiter(chain.from_iterable(trans), dtype=np.int32, count=offsets[-1])
+    targets = np.fromiter(chain.from_iterable(t.values() for t in trans), dtype=np.int32, count=offsets[-1])
+    order = np.lexsort((symbols, np.repeat(np.arange(len(trans)), counts)))
+    symbols, targets = symbols[order], targets[order]
+    return {"sam_link": np.array(link, dtype=np.int32), "sam_len": np.array(length, dtype=np.int32),
+            "sam_offsets": offsets, "sam_symbols": symbols, "sam_targets": targets}
+
+class PlagiarismIndex:
+    """Near-duplicate and shared-passage lookups against a fixed corpus of verses.
+
+    Build with `PlagiarismIndex.build(corpus)`, persist with `save`, and reopen with
+    `load_plagiarism_index`. Pickles as its path when loaded from disk, so it can be
+    passed to reward worker processes cheaply.
+    """
+
+    def __init__(self, vocab: Sequence[str], arrays: Dict[str, np.ndarray], ngram: int,
+                 min_copy: int, path: Union[str, Path, None] = None):
+        self.vocab = {syllable: i for i, syllable in enumerate(vocab)}
+        self.arrays = arrays
+        self.ngram = ngram
+        self.min_copy = min_copy
+        self.path = None if path is None else Path(path)
+        self.seeds = arrays["seeds"]
+        self.signatures = arrays["signatures"]
+        self.band_keys = arrays["band_keys"]
+        self.band_docs = arrays["band_docs"]
+        # The automaton is walked one syllable at a time; memoryviews give plain-int
+        # indexing without per-element NumPy scalar overhead
+        self._link = memoryview(arrays["sam_link"])
+        self._len = memoryview(arrays["sam_len"])
+        self._offsets = memoryview(arrays["sam_offsets"])
+        self._symbols = memoryview(arrays["sam_symbols"])
+        self._targets = memoryview(arrays["sam_targets"])
+
+    @classmethod
+    def build(cls, corpus: Iterable[str], ngram: int = 4, num_perm: int = 64, bands: int = 16,
+              min_copy: int = 8, seed: int = 0) -> "PlagiarismIndex":
+        """Index `corpus`, an iterable of Devanāgarī verses.
+
+        Args:
+            ngram: Syllables per shingle for MinHash
+            num_perm: MinHash signature length; must be a multiple of `bands`
+            bands: LSH bands; verses with estimated Jaccard similarity above about
+                `(1 / bands) ** (bands / num_perm)` are likely to be candidates
+            min_copy: Shortest shared run of syllables that counts as copying; shorter
+                runs are common phrases
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        vocab: Dict[str, int] = {}
+        docs = [np.array([vocab.setdefault(s, len(vocab)) for s in syllables(verse)], dtype=np.int32)
+                for verse in corpus]
+        seeds = np.random.default_rng(seed).integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+        signatures = np.full((len(docs), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for i, ids in enumerate(docs):
+            hashes = _ngram_hashes(ids, ngram)
+            if len(hashes):
+                signatures[i] = _mix(hashes[:, None] ^ seeds[None, :]).min(axis=0)
+        keys = _band_keys(signatures, bands).T          # (bands, docs)
+        order = np.argsort(keys, axis=1, kind="stable")
+
+        sequence: List[int] = []
+        for ids in docs:
+            sequence.extend(ids.tolist())
+            sequence.append(_SEPARATOR)
+        arrays = {"seeds": seeds, "signatures": signatures,
+                  "band_keys": np.take_along_axis(keys, order, axis=1),
+                  "band_docs": order.astype(np.int32), **_suffix_automaton(sequence)}
+        return cls(list(vocab), arrays, ngram, min_copy)
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(path / f"{name}.npy", np.asarray(self.arrays[name]))
+        with (path / "meta.json").open("w", encoding="utf-8") as f:
+            json.dump({"ngram": self.ngram, "min_copy": self.min_copy, "vocab": list(self.vocab)},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PlagiarismIndex":
+        path = Path(path)
+        with (path / "meta.json").open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        return cls(meta["vocab"], arrays, meta["ngram"], meta["min_copy"], path=path)
+
+    def __reduce__(self):
+        if self.path is not None:
+            return load_plagiarism_index, (self.path,)
+        arrays = {name: np.asarray(a) for name, a in self.arrays.items()}
+        return PlagiarismIndex, (list(self.vocab), arrays, self.ngram, self.min_copy)
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def encode(self, text: str) -> np.ndarray:
+        """Syllable ids of `text`; syllables not in the corpus get an id matching nothing."""
+        return np.array([self.vocab.get(s, _UNKNOWN) for s in syllables(text)], dtype=np.int32)
+
+    def near_duplicate(self, ids: np.ndarray) -> float:
+        """Highest estimated Jaccard similarity (of syllable n-gram sets) between the
+        poem `ids` and an LSH candidate verse; 0.0 if there is no candidate."""
+        hashes = _ngram_hashes(ids, self.ngram)
+        if not len(hashes) or not len(self):
+            return 0.0
+        signature = _mix(hashes[:, None] ^ self.seeds[None, :]).min(axis=0)
+        keys = _band_keys(signature, self.band_keys.shape[0])
+        candidates = set()
+        for band, key in enumerate(keys):
+            row = self.band_keys[band]
+            lo, hi = np.searchsorted(row, key, "left"), np.searchsorted(row, key, "right")
+            candidates.update(self.band_docs[band, lo:hi].tolist())
+        if not candidates:
+            return 0.0
+        agree = self.signatures[sorted(candidates)] == signature
+        return float(agree.mean(axis=1).max())
+
+    def longest_common(self, ids: Sequence[int]) -> int:
+        """Length in syllables of the longest run of `ids` found in some verse."""
+        link, length, offsets = self._link, self._len, self._offsets
+        symbols, targets = self._symbols, self._targets
+        state = matched = best = 0
+        for c in ids:
+            c = int(c)
+            while True:
+                lo, hi = offsets[state], offsets[state + 1]
+                k = bisect_left(symbols, c, lo, hi)
+                if k < hi and symbols[k] == c:
+                    state, matched = targets[k], matched + 1
+                    break
+                if state == 0:
+                    matched = 0
+                    break
+                state = link[state]
+                matched = length[state]
+            best = max(best, matched)
+        return best
+
+    def score(self, text: str) -> float:
+        """Originality of `text` in [0, 1]: 1 minus the larger of its near-duplicate
+        similarity and the fraction of its syllables in the longest copied run
+        (counted only from `min_copy` syllables)."""
+        ids = self.encode(text)
+        if not len(ids):
+            return 1.0
+        copied = self.longest_common(ids)
+        copied_fraction = copied / len(ids) if copied >= self.min_copy else 0.0
+        return 1.0 - max(self.near_duplicate(ids), copied_fraction)
+
+@lru_cache(maxsize=None)
+def load_plagiarism_index(path: Union[str, Path]) -> PlagiarismIndex:
+    """Open a saved index once per process."""
+    return PlagiarismIndex.load(path)
+
+def read_corpus(path: Union[str, Path]) -> List[str]:
+    """Verses of a text file, separated by blank lines."""
+    text = Path(path).read_text(encoding="utf-8")
+    return [verse.strip() for verse in text.split("\n\n") if verse.strip()]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build a plagiarism index over a verse corpus.")
+    parser.add_argument("corpus", help="text file with verses separated by blank lines")
+    parser.add_argument("out", help="index directory to write")
+    parser.add_argument("--ngram", type=int, default=4)
+    parser.add_argument("--num-perm", type=int, default=64)
+    parser.add_argument("--bands", type=int, default=16)
+    parser.add_argument("--min-copy", type=int, default=8)
+    args = parser.parse_args()
+    index = PlagiarismIndex.build(read_corpus(args.corpus), ngram=args.ngram, num_perm=args.num_perm,
+                                  bands=args.bands, min_copy=args.min_copy)
+    index.save(args.out)
+    print(f"✔  Indexed {len(index)} verses into {args.out}")
+
+if __name__ == "__main__":
+    main()
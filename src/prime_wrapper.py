@@ -5,9 +5,9 @@ from typing import Dict, Any, Optional
 
 import gymnasium as gym
 import numpy as np
-from transformers import AutoTokenizer
 
 from .env import SanskritMeterEnv
+from .scanner import RewardMode
 
 class PrimeSanskritMeterEnv(gym.Wrapper):
     """
@@ -23,9 +23,13 @@ class PrimeSanskritMeterEnv(gym.Wrapper):
         self,
         model_name: str = "google/gemma-2b",
         max_length: int = 256,
+        reward_mode: RewardMode = "token",
+        shaping: float = 0.0,
         **kwargs
     ):
-        env = SanskritMeterEnv(model_name=model_name, max_length=max_length)
+        # reward_mode/shaping select when the full reward is computed, see SanskritMeterEnv
+        env = SanskritMeterEnv(model_name=model_name, max_length=max_length,
+                               reward_mode=reward_mode, shaping=shaping, **kwargs)
         super().__init__(env)
         
         # Prime-RL expects these attributes
@@ -66,6 +70,10 @@ class PrimeSanskritMeterEnv(gym.Wrapper):
                     "l": np.mean(self._episode_lengths[-100:]),
                 }
             })
+            # With instrumentation=True, also the per-section step time histograms so far
+            instrumentation = self.env.unwrapped.instrumentation
+            if instrumentation is not None:
+                info["timing_summary"] = instrumentation.summary()
         
         return obs, scaled_reward, terminated, truncated, info
     
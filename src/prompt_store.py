@@ -0,0 +1,114 @@
+"""
+Pre-tokenized, memory-mapped prompt table.
+
+`prompts.jsonl` has to be parsed and each sampled prompt tokenized on every `reset`.
+A prompt store holds the same prompts already tokenized for one tokenizer, as flat
+`.npy` arrays that are opened with `mmap_mode="r"`: every worker process maps the same
+file pages instead of holding its own copy. Written by `generate_dataset.py`.
+
+Layout of a store directory:
+
+    token_ids.npy   int32, all prompts' token ids concatenated
+    offsets.npy     int64, prompt i is token_ids[offsets[i]:offsets[i + 1]]
+    topic_ids.npy   int16, index into meta.json "topics"
+    meter_ids.npy   int8, index into meta.json "meters"
+    meta.json       topic and meter names, and the tokenizer the ids belong to
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+
+from .meters import METER_TEMPLATES
+
+DEFAULT_STORE_PATH = Path(__file__).parent / "data" / "prompts.store"
+
+class PromptStore:
+    """A read-only view of a prompt store directory (see the module docstring)."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        with (self.path / "meta.json").open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.topics = tuple(meta["topics"])
+        self.meters = tuple(meta["meters"])
+        self.tokenizer_name: Optional[str] = meta.get("tokenizer")
+        self.vocab_size: int = meta["vocab_size"]
+        self.token_ids = np.load(self.path / "token_ids.npy", mmap_mode="r")
+        self.offsets = np.load(self.path / "offsets.npy", mmap_mode="r")
+        self.topic_ids = np.load(self.path / "topic_ids.npy", mmap_mode="r")
+        self.meter_ids = np.load(self.path / "meter_ids.npy", mmap_mode="r")
+        # Indices of the prompts the env samples: as in `env.load_prompts`, those for
+        # meters without a template can never be verified and are skipped
+        self.scorable = np.flatnonzero(np.isin(
+            self.meter_ids, [i for i, meter in enumerate(self.meters) if meter in METER_TEMPLATES]))
+
+    def __len__(self) -> int:
+        return len(self.meter_ids)
+
+    def ids(self, index: int) -> np.ndarray:
+        """Token ids of prompt `index`, as a view into the mapped file."""
+        return self.token_ids[self.offsets[index]:self.offsets[index + 1]]
+
+    def topic(self, index: int) -> str:
+        return self.topics[self.topic_ids[index]]
+
+    def meter(self, index: int) -> str:
+        return self.meters[self.meter_ids[index]]
+
+    def entry(self, index: int) -> Dict[str, str]:
+        """The {"topic", "meter"} entry of prompt `index`."""
+        return {"topic": self.topic(index), "meter": self.meter(index)}
+
+    def check_tokenizer(self, tokenizer: Any) -> None:
+        """Raise ValueError if the store was not tokenized with `tokenizer`."""
+        name = getattr(tokenizer, "name_or_path", None)
+        if tokenizer.vocab_size != self.vocab_size or (name and self.tokenizer_name and name != self.tokenizer_name):
+            raise ValueError(
+                f"Prompt store {self.path} was built for tokenizer {self.tokenizer_name!r} "
+                f"(vocab size {self.vocab_size}), not {name!r} (vocab size {tokenizer.vocab_size})"
+            )
+
+@lru_cache(maxsize=None)
+def load_prompt_store(path: Union[str, Path] = DEFAULT_STORE_PATH) -> PromptStore:
+    """Open a prompt store once per process; env instances share the mapping."""
+    return PromptStore(path)
+
+def write_prompt_store(
+    entries: Iterable[Dict[str, str]],
+    tokenizer: Any,
+    path: Union[str, Path] = DEFAULT_STORE_PATH,
+) -> PromptStore:
+    """Tokenize the "prompt" of each entry and write a store to the directory `path`.
+
+    Ids are produced with `tokenizer.encode`, i.e. with the tokenizer's special tokens,
+    as the env's tokenizer call would add them.
+    """
+    entries = list(entries)
+    topics = sorted({e["topic"] for e in entries})
+    meters = sorted({e["meter"] for e in entries})
+    topic_index = {t: i for i, t in enumerate(topics)}
+    meter_index = {m: i for i, m in enumerate(meters)}
+
+    encoded = [tokenizer.encode(e["prompt"]) for e in entries]
+    offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+    np.cumsum([len(ids) for ids in encoded], out=offsets[1:])
+    token_ids = np.fromiter((t for ids in encoded for t in ids), dtype=np.int32, count=int(offsets[-1]))
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "token_ids.npy", token_ids)
+    np.save(path / "offsets.npy", offsets)
+    np.save(path / "topic_ids.npy", np.array([topic_index[e["topic"]] for e in entries], dtype=np.int16))
+    np.save(path / "meter_ids.npy", np.array([meter_index[e["meter"]] for e in entries], dtype=np.int8))
+    with (path / "meta.json").open("w", encoding="utf-8") as f:
+        json.dump({
+            "topics": topics,
+            "meters": meters,
+            "tokenizer": getattr(tokenizer, "name_or_path", None),
+            "vocab_size": tokenizer.vocab_size,
+        }, f, ensure_ascii=False, indent=1)
+    return PromptStore(path)
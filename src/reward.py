@@ -3,36 +3,136 @@ Reward calculation for Sanskrit meter verification.
 Uses the existing verifier to determine if the generated text matches the target meter.
 """
 
-from typing import Dict, List, Set, Tuple
-from src.verifier import verify_meter
+from time import perf_counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from src.instrumentation import Timings, lap
+from src.keywords import self_reference_penalty, topic_matcher
+from src.meter_score import dense_meter_scores
+from src.meters import METER_TEMPLATES
+from src.plagiarism import PlagiarismIndex
+from src.scansion import ScannedLine
+from src.semantic import SemanticScorer
+from src.verifier import split_lines, syllabify_lines, verify_patterns
 
-def check_syllable_patterns(text: str) -> float:
+# A syllable may repeat this many times in a row (e.g. 'ततत' is rare but real); a
+# run longer than that is penalized per extra syllable.
+MAX_SYLLABLE_RUN = 2
+# Length in syllables of the substrings compared for repetition
+REPEAT_NGRAM = 4
+
+_HASH_MOD = (1 << 61) - 1
+_HASH_BASE = 1_000_003
+
+class SyllableRepetition:
+    """The repetition measures of `check_syllable_patterns` over a syllable sequence
+    that grows at its end.
+
+    The state of one linear pass (current run, rolling hash, n-grams seen, syllables
+    covered) is kept for the syllables committed with `extend`, so a poem whose last
+    line is still being rewritten is scored in time proportional to that line
+    (`score(tail)`), not to the whole poem.
+    """
+
+    def __init__(self, n: int = REPEAT_NGRAM):
+        self.n = n
+        self._top = pow(_HASH_BASE, n - 1, _HASH_MOD)
+        self._ids: Dict[str, int] = {}
+        self._seen: Set[int] = set()
+        # (syllables, run excess, run length, last syllable, hash, covered, covered
+        # until, last n syllable ids)
+        self._state: Tuple = (0, 0, 0, None, 0, 0, 0, ())
+
+    def _advance(self, syllables: Iterable[str], ids: Dict[str, int], seen: Set[int]) -> Tuple:
+        """The state after `syllables`; new syllable ids and n-gram hashes go to `ids`
+        and `seen` instead of the committed ones."""
+        n, top = self.n, self._top
+        count, excess, run, last, h, covered, covered_until, window = self._state
+        window = list(window)
+        for syllable in syllables:
+            run = run + 1 if count and syllable == last else 1
+            if run > MAX_SYLLABLE_RUN:
+                excess += 1
+            last = syllable
+            x = self._ids.get(syllable) or ids.setdefault(syllable, len(self._ids) + len(ids) + 1)
+            window.append(x)
+            if count >= n:
+                h = (h - window.pop(0) * top) % _HASH_MOD
+            h = (h * _HASH_BASE + x) % _HASH_MOD
+            count += 1
+            if count < n:
+                continue
+            if h in self._seen or h in seen:
+                start = max(count - n, covered_until)
+                covered += count - start
+                covered_until = count
+            else:
+                seen.add(h)
+        return count, excess, run, last, h, covered, covered_until, tuple(window)
+
+    def extend(self, syllables: Iterable[str]) -> None:
+        """Commit `syllables` to the end of the sequence."""
+        ids: Dict[str, int] = {}
+        seen: Set[int] = set()
+        self._state = self._advance(syllables, ids, seen)
+        self._ids.update(ids)
+        self._seen |= seen
+
+    def measures(self, tail: Iterable[str] = ()) -> Tuple[int, float, float]:
+        """(number of syllables, fraction in excess runs, fraction covered by repeated
+        n-grams) of the committed syllables followed by `tail`, which is not committed."""
+        count, excess, _, _, _, covered, _, _ = self._advance(tail, {}, set())
+        return (count, excess / count, covered / count) if count else (0, 0.0, 0.0)
+
+    def score(self, tail: Iterable[str] = ()) -> float:
+        """`check_syllable_patterns` of the committed syllables followed by `tail`."""
+        _, excess, repeated = self.measures(tail)
+        return 1.0 - max(excess, repeated)
+
+def _repeated_fraction(syllables: Sequence[str], n: int = REPEAT_NGRAM) -> float:
+    """Fraction of syllables covered by an n-gram that already occurred earlier."""
+    return SyllableRepetition(n).measures(syllables)[2]
+
+def check_syllable_patterns(text: str, scans: Optional[List[ScannedLine]] = None) -> float:
     """Reward Hacking Part 1: Check for repetitive syllable patterns that might indicate low-quality generation.
     
     Implementation:
-    1. Split text into syllables using Sanskrit phonological rules
-    2. Look for repetitive patterns like:
-       - Same syllable repeated multiple times (e.g., 'गा गा गा')
-       - Same morpheme repeated unnaturally
-    3. Calculate a penalty score based on repetition ratio
+    1. Syllables come from the shared scansion intermediate (`scans`, as produced for
+       the meter check), so the text is not syllabified a second time
+    2. Look for repetitive patterns, in one linear pass each:
+       - Same syllable repeated more than `MAX_SYLLABLE_RUN` times (e.g. 'गा गा गा')
+       - Repeated `REPEAT_NGRAM`-syllable substrings, found with a rolling hash
+    3. Penalty is the larger of the excess-run ratio and the repeated-substring ratio
+       (`SyllableRepetition`, which `IncrementalMeterScanner` keeps across steps)
     
     Returns:
         float: Score between 0-1, where 1 means no problematic patterns
     """
-    # TODO: Implement syllable pattern checking
-    return 1.0
+    if scans is None:
+        scans = syllabify_lines(split_lines(text))
+    return SyllableRepetition().score(s for scanned in scans for s in scanned.syllables)
+
+# More keyword occurrences than this in one poem is keyword stuffing, and the keyword
+# score falls off in proportion.
+MAX_KEYWORD_HITS = 3
 
-def check_semantic_relevance(text: str, topic: str, topic_keywords: Set[str]) -> float:
+def check_semantic_relevance(text: str, topic: str, topic_keywords: Optional[Set[str]] = None,
+                             scorer: Optional[SemanticScorer] = None) -> float:
     """Reward Hacking Part 2: Verify semantic relevance to the topic using multiple approaches.
     
     Implementation:
     1. Keyword density check:
-       - Define topic-specific keyword sets (e.g., for 'spring': ['कुसुम', 'मधु', 'वसन्त', ...])
-       - Check for presence of multiple related terms
+       - Topic keywords are the topic's headword and stem (`keywords.topic_keywords`),
+         plus any `topic_keywords` given, compiled once per topic into an
+         Aho–Corasick automaton (`keywords.topic_matcher`)
+       - No keyword scores 0; more than `MAX_KEYWORD_HITS` occurrences are penalized
+         as keyword stuffing
        
-    2. LLM-based semantic similarity:
-       - Use embeddings to compute similarity between text and topic description
-       - Ensure multiple topic-related concepts are present
+    2. Embedding similarity (if a `semantic.SemanticScorer` is given):
+       - Cosine similarity between the poem and the topic, with the topic embeddings
+         precomputed; the score is the mean of the keyword and embedding scores
+       - To amortize the encoder over many poems, call `scorer.score` or
+         `scorer.submit` on batches instead of scoring here one poem at a time
        
     3. Coherence check:
        - Verify logical flow and connection between ideas
@@ -41,58 +141,107 @@ def check_semantic_relevance(text: str, topic: str, topic_keywords: Set[str]) ->
     Returns:
         float: Score between 0-1 based on semantic relevance
     """
-    # TODO: Implement semantic relevance checking
-    return 1.0
+    matcher = topic_matcher(topic, frozenset(topic_keywords or ()))
+    hits = sum(matcher.counts(text))
+    keyword_score = min(1.0, MAX_KEYWORD_HITS / hits) if hits else 0.0
+    if scorer is None:
+        return keyword_score
+    return 0.5 * (keyword_score + float(scorer.score([text], [topic])[0]))
 
 def check_self_references(text: str) -> float:
     """ Reward Hacking Part 3: Detect and penalize self-referential or critic-baiting content.
     
     Implementation:
-    1. Maintain a list of self-referential patterns:
+    1. A lexicon of self-referential patterns (`keywords.SELF_REFERENCES`):
        - References to the poem itself
        - Self-praise or quality claims
-       - Direct addresses to critics/readers
+       - Direct addresses to critics/readers, and naming the meter
        
-    2. Text cleaning:
-       - Strip or mask self-referential phrases
-       - Focus scoring on actual poetic content
-       
-    3. Pattern matching:
-       - Use regex or token patterns to identify problematic phrases
-       - Apply penalties based on severity and frequency
+    2. Pattern matching:
+       - All phrases are matched as whole words in one pass with a cached
+         Aho–Corasick automaton, on Unicode-normalized text
+       - Each occurrence costs its phrase's penalty
     
     Returns:
         float: Score between 0-1, where 1 means no self-references found
     """
-    # TODO: Implement self-reference checking
-    return 1.0
+    return max(0.0, 1.0 - self_reference_penalty(text))
 
-def check_plagiarism(text: str, known_corpus: List[str]) -> float:
+def check_plagiarism(text: str, known_corpus: PlagiarismIndex) -> float:
     """Reward Hacking Part 3: Check for excessive similarity with known Sanskrit verses.
     
-    Implementation:
-    1. N-gram comparison:
-       - Generate n-grams from input text (n=3,4,5)
-       - Compare against n-grams from known corpus
-       - Calculate overlap ratios
+    Implementation (see `src.plagiarism`):
+    1. Near-duplicates:
+       - MinHash signatures of syllable 4-grams, looked up in an LSH table
+       - Estimated Jaccard similarity with the closest candidate verse
        
-    2. Sequence alignment:
-       - Look for longest common subsequences
-       - Identify partial matches and adaptations
+    2. Copied passages:
+       - Suffix automaton over the corpus gives the longest shared run of syllables
+       - Runs shorter than a pāda (`min_copy` syllables) are common phrases and allowed
        
-    3. Similarity thresholds:
-       - Set acceptable levels of similarity
-       - Consider legitimate reuse of common phrases
-       - Penalize based on extent of overlap
+    3. Penalty:
+       - 1 minus the larger of the near-duplicate similarity and the copied fraction
+    
+    Args:
+        known_corpus: A prebuilt `PlagiarismIndex` (see `load_plagiarism_index`)
     
     Returns:
         float: Score between 0-1, where 1 means no concerning similarity
     """
-    # TODO: Implement plagiarism checking
-    return 1.0
+    if not isinstance(known_corpus, PlagiarismIndex):
+        # Indexing the corpus costs far more than scoring one poem against it
+        raise TypeError(f"known_corpus must be a PlagiarismIndex, not {type(known_corpus).__name__}; "
+                        f"build it once with PlagiarismIndex.build(verses) and reuse it")
+    return known_corpus.score(text)
+
+def score_meter(patterns: List[str], target_meter: str) -> float:
+    """Meter score of a scanned poem: 1.0 if it is in `target_meter`, otherwise partial
+    credit for how close its syllable weights are to the meter's template (0-1).
+
+    Partial credit is capped below 1.0 so that only a verified poem gets full credit.
+    Targets without a template (plain chandas names) get no partial credit.
+    """
+    if verify_patterns(patterns, target_meter):
+        return 1.0
+    if target_meter in METER_TEMPLATES:
+        scores, _ = dense_meter_scores([patterns], target_meter)
+        return float(min(scores[0], 0.99))
+    return 0.0
+
+def score_meters(poems: Sequence[List[str]], target_meter: str) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """`score_meter` for a batch of scanned poems in one target meter, with the
+    per-pāda breakdown of each.
+
+    The partial credit of the whole batch is computed in one `dense_meter_scores` call.
+    Returns (scores, pada_scores); `pada_scores[i]` are poem i's per-pāda scores (all
+    1.0 for a verified poem), and empty for targets without a template.
+    """
+    scores = np.array([1.0 if verify_patterns(patterns, target_meter) else 0.0 for patterns in poems])
+    if target_meter not in METER_TEMPLATES or not len(poems):
+        return scores, [np.zeros(0) for _ in poems]
+    dense, padas = dense_meter_scores(poems, target_meter)
+    padas = [np.ones_like(pada) if verified else pada for verified, pada in zip(scores == 1.0, padas)]
+    return np.where(scores == 1.0, 1.0, np.minimum(dense, 0.99)), padas
+
+# Weight of each component in `total_score`; `calculate_reward(weights=...)` overrides them
+REWARD_WEIGHTS: Dict[str, float] = {
+    'meter': 1.0,      # Meter accuracy is crucial
+    'syllable': 0,   # Penalize repetitive patterns
+    'semantic': 0,    # Ensure topic relevance
+    'style': 0,       # Avoid self-reference
+    'originality': 0 # Prevent plagiarism
+}
 
 def calculate_reward(text: str, target_meter: str, topic: str = None, 
-                    topic_keywords: Set[str] = None, known_corpus: List[str] = None) -> Dict[str, float]:
+                    topic_keywords: Set[str] = None,
+                    known_corpus: Optional[PlagiarismIndex] = None,
+                    patterns: Optional[List[str]] = None,
+                    scans: Optional[List[ScannedLine]] = None,
+                    semantic_scorer: Optional[SemanticScorer] = None,
+                    weights: Optional[Dict[str, float]] = None,
+                    timings: Optional[Timings] = None,
+                    meter_score: Optional[float] = None,
+                    syllable_score: Optional[float] = None) -> Dict[str, Optional[float]]:
     """Calculate comprehensive reward for generated text.
     
     Args:
@@ -100,52 +249,110 @@ def calculate_reward(text: str, target_meter: str, topic: str = None,
         target_meter: Target meter name
         topic: Topic of the poem
         topic_keywords: Set of related keywords for the topic
-        known_corpus: List of known Sanskrit verses for plagiarism check
+        known_corpus: Prebuilt `PlagiarismIndex` of known Sanskrit verses for the
+            plagiarism check (see `check_plagiarism`)
+        patterns: Per-line laghu/guru patterns of `text`, if the caller has already
+            scanned it; skips re-scanning the poem for the meter check
+        scans: Per-line syllables and patterns of `text` (e.g. from
+            `IncrementalMeterScanner`); shared by the meter and syllable checks. If
+            neither this nor `patterns` is given, the poem is syllabified once here.
+        semantic_scorer: Embedding scorer for the semantic check (keywords only if None)
+        weights: Component weights for `total_score`, overriding `REWARD_WEIGHTS`
+            (e.g. {'syllable': 0.2})
+        timings: If given, the seconds spent scanning and in each check are added to
+            it under "scansion", "meter", "syllable", "semantic", "style" and
+            "originality" (see `src.instrumentation`)
+        meter_score: The meter score of `text`, if the caller has already computed it
+            (e.g. with `score_meters`); skips the meter check
+        syllable_score: The syllable score of `text`, if the caller has already
+            computed it (e.g. `IncrementalMeterScanner.syllable_score`)
         
     Returns:
-        Dict[str, float]: Detailed reward breakdown with components:
+        Dict[str, Optional[float]]: Detailed reward breakdown with components:
         {
-            'meter_score': float,  # Basic meter matching (0-1)
+            'meter_score': float,  # Meter match, with partial credit (0-1)
             'syllable_score': float,  # Quality of syllable patterns (0-1)
             'semantic_score': float,  # Topic relevance and coherence (0-1)
             'originality_score': float,  # Plagiarism check result (0-1)
             'style_score': float,  # Self-reference check result (0-1)
             'total_score': float  # Weighted combination of all scores
         }
+        A component whose weight is 0 is not computed, and is None. Pass nonzero
+        `weights` for every component that should be reported.
     """
-    # Check meter (base reward)
-    result = verify_meter(text)
-    meter_score = 1.0 if result == target_meter else (0.5 if result else 0.0)
-    
-    # Quality checks
-    syllable_score = check_syllable_patterns(text)
-    semantic_score = check_semantic_relevance(text, topic, topic_keywords) if topic else 1.0
-    style_score = check_self_references(text)
-    originality_score = check_plagiarism(text, known_corpus) if known_corpus else 1.0
-    
-    # Calculate weighted total (can adjust weights based on importance)
-    weights = {
-        'meter': 1.0,      # Meter accuracy is crucial
-        'syllable': 0,   # Penalize repetitive patterns
-        'semantic': 0,    # Ensure topic relevance
-        'style': 0,       # Avoid self-reference
-        'originality': 0 # Prevent plagiarism
-    }
+    weights = {**REWARD_WEIGHTS, **(weights or {})}
+
+    # Syllabify once for all checks, then check meter (base reward)
+    t = perf_counter() if timings is not None else 0.0
+    if scans is None and patterns is None and (
+            (weights['meter'] and meter_score is None) or (weights['syllable'] and syllable_score is None)):
+        scans = syllabify_lines(split_lines(text))
+        if timings is not None:
+            t = lap(timings, 'scansion', t)
+    if not weights['meter']:
+        meter_score = None
+    elif meter_score is None:
+        if patterns is None:
+            patterns = [scanned.pattern for scanned in scans]
+        meter_score = score_meter(patterns, target_meter)
+    if timings is not None:
+        t = lap(timings, 'meter', t)
     
-    total_score = (
-        weights['meter'] * meter_score +
-        weights['syllable'] * syllable_score +
-        weights['semantic'] * semantic_score +
-        weights['style'] * style_score +
-        weights['originality'] * originality_score
-    )
+    # Quality checks; those with weight 0 are skipped and reported as None
+    if not weights['syllable']:
+        syllable_score = None
+    elif syllable_score is None:
+        syllable_score = check_syllable_patterns(text, scans)
+    if timings is not None:
+        t = lap(timings, 'syllable', t)
+    if not weights['semantic']:
+        semantic_score = None
+    else:
+        semantic_score = check_semantic_relevance(text, topic, topic_keywords, semantic_scorer) if topic else 1.0
+    if timings is not None:
+        t = lap(timings, 'semantic', t)
+    style_score = check_self_references(text) if weights['style'] else None
+    if timings is not None:
+        t = lap(timings, 'style', t)
+    if not weights['originality']:
+        originality_score = None
+    else:
+        originality_score = check_plagiarism(text, known_corpus) if known_corpus else 1.0
+    if timings is not None:
+        lap(timings, 'originality', t)
     
-    return {
+    scores = {
         'meter_score': meter_score,
         'syllable_score': syllable_score,
         'semantic_score': semantic_score,
         'style_score': style_score,
         'originality_score': originality_score,
-        'total_score': total_score
     }
+    # Weighted combination of the computed components
+    scores['total_score'] = sum(weights[name[:-len('_score')]] * score
+                                for name, score in scores.items() if score is not None)
+    return scores
     return {"reward": 0.0}
+
+def calculate_rewards(texts: Sequence[str], target_meters: Sequence[str],
+                      scans: Sequence[List[ScannedLine]], syllable_scores: Optional[Sequence[float]] = None,
+                      **kwargs) -> List[Dict[str, Optional[float]]]:
+    """`calculate_reward` for a batch of scanned poems, in order.
+
+    The meter scores of all poems with the same target meter are computed in one
+    `score_meters` call; the other checks run per poem, except the syllable check if
+    `syllable_scores` are given. Keyword arguments are passed through to every
+    `calculate_reward` call.
+    """
+    meter_scores = [0.0] * len(texts)
+    for target_meter in set(target_meters):
+        batch = [i for i, meter in enumerate(target_meters) if meter == target_meter]
+        scores, _ = score_meters([[scanned.pattern for scanned in scans[i]] for i in batch], target_meter)
+        for i, score in zip(batch, scores):
+            meter_scores[i] = float(score)
+    if syllable_scores is None:
+        syllable_scores = [None] * len(texts)
+    return [calculate_reward(text, target_meter, scans=poem_scans, meter_score=score, syllable_score=syllables,
+                             **kwargs)
+            for text, target_meter, poem_scans, score, syllables
+            in zip(texts, target_meters, scans, meter_scores, syllable_scores)]
@@ -0,0 +1,111 @@
+"""
+Process-pool meter verification and reward scoring.
+
+Scanning and scoring are pure Python, so running them in the trainer's thread holds
+the GIL and stalls the policy loop. `RewardPool` keeps a set of long-lived worker
+processes, dispatches batches to them in chunks, and returns results in input order. `submit`
+and `submit_reward` return `concurrent.futures.Future`s so that callers can overlap
+scoring with the next generation step.
+"""
+
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .reward import calculate_reward
+from .verifier import Script, verify_meter
+
+def _verify_chunk(chunk: Sequence[Tuple[str, str]], script: Script, strict_match: bool) -> List[bool]:
+    return [verify_meter(poem, meter, script=script, strict_match=strict_match) for poem, meter in chunk]
+
+def _reward_chunk(chunk: Sequence[Tuple[str, str]], kwargs: Dict[str, Any]) -> List[Dict[str, float]]:
+    return [calculate_reward(text, meter, **kwargs) for text, meter in chunk]
+
+def _reward_rows(rows: Sequence[Dict[str, Any]], kwargs: Dict[str, Any]) -> List[Dict[str, float]]:
+    return [calculate_reward(**row, **kwargs) for row in rows]
+
+def _chunks(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+class RewardPool:
+    """A pool of long-lived worker processes for `verify_meter` and `calculate_reward`.
+
+    Args:
+        num_workers: Number of worker processes (defaults to `os.cpu_count()`)
+        chunksize: Number of poems sent to a worker per task
+        mp_context: Optional `multiprocessing` context, e.g. `get_context("spawn")`
+
+    Use as a context manager, or call `close()` when done. Workers load chandas only
+    when a task first needs it (e.g. identifying a meter outside `METER_INDEX`), so a
+    pool scoring target meters with the native backend never pays for it.
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, chunksize: int = 32, mp_context=None):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers, mp_context=mp_context
+        )
+
+    def warm_up(self) -> None:
+        """Block until every worker has started."""
+        futures = [self._executor.submit(os.getpid) for _ in range(self.num_workers)]
+        for future in futures:
+            future.result()
+
+    def verify_meter_many(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        script: Script = "devanagari",
+        strict_match: bool = True,
+    ) -> List[bool]:
+        """`verify_meter` over (poem, expected_meter) pairs, in order."""
+        chunks = _chunks(list(pairs), self.chunksize)
+        results = self._executor.map(_verify_chunk, chunks, [script] * len(chunks), [strict_match] * len(chunks))
+        return [ok for chunk in results for ok in chunk]
+
+    def calculate_reward_many(self, items: Iterable[Tuple[str, str]], **kwargs) -> List[Dict[str, float]]:
+        """`calculate_reward` over (text, target_meter) pairs, in order.
+
+        Keyword arguments are passed through to every `calculate_reward` call.
+        """
+        chunks = _chunks(list(items), self.chunksize)
+        results = self._executor.map(_reward_chunk, chunks, [kwargs] * len(chunks))
+        return [info for chunk in results for info in chunk]
+
+    def submit(self, poem: str, expected_meter: str, script: Script = "devanagari",
+               strict_match: bool = True) -> "Future[bool]":
+        """Schedule one `verify_meter` call and return its future."""
+        return self._executor.submit(verify_meter, poem, expected_meter, script, strict_match)
+
+    def submit_reward(self, text: str, target_meter: str, **kwargs) -> "Future[Dict[str, float]]":
+        """Schedule one `calculate_reward` call and return its future."""
+        return self._executor.submit(calculate_reward, text, target_meter, **kwargs)
+
+    def submit_reward_batch(self, rows: Sequence[Dict[str, Any]], **kwargs) -> "Future[List[Dict[str, float]]]":
+        """Schedule `calculate_reward(**row, **kwargs)` for each row as one task, and
+        return the future of the list of results."""
+        return self._executor.submit(_reward_rows, list(rows), kwargs)
+
+    def close(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "RewardPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def verify_meter_many(
+    pairs: Iterable[Tuple[str, str]],
+    script: Script = "devanagari",
+    strict_match: bool = True,
+    pool: Optional[RewardPool] = None,
+) -> List[bool]:
+    """`verify_meter` over (poem, expected_meter) pairs, in order.
+
+    Runs in `pool` if given, otherwise serially in this process.
+    """
+    if pool is not None:
+        return pool.verify_meter_many(pairs, script=script, strict_match=strict_match)
+    return _verify_chunk(list(pairs), script, strict_match)
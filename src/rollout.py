@@ -0,0 +1,250 @@
+"""
+Asyncio rollout driver that overlaps generation with reward scoring.
+
+Stepping `SanskritMeterEnv` scores the poem in the caller's thread, so a loop of
+generate, step, score leaves the CPU idle while the policy generates and the policy
+idle while the CPU scores. `RolloutDriver` keeps many episodes in flight as asyncio
+tasks, one per env, with the envs created with `reward_mode="external"`:
+
+- An episode that needs tokens queues a `PolicyRequest`; batcher tasks gather up to
+  `batch_size` requests and await the async `policy` on them. The policy may answer
+  each request with one token id or a chunk of them.
+- Stepping an env only decodes and updates the scan (plus the shaping signal). The
+  full reward of each completed line (`score="line"`) or of each episode
+  (`score="episode"`) is queued for reward workers, which run `calculate_reward` in a
+  `RewardPool` or an executor while the episodes keep generating.
+- Everything in flight is bounded, which gives backpressure. When scoring falls
+  behind, episodes wait to enqueue their rewards (`max_pending_rewards`). When the
+  consumer falls behind, episodes wait to hand over their rollouts (`max_finished`).
+  Either way generation slows down rather than buffering without limit.
+
+    driver = RolloutDriver(envs, policy, reward_pool=RewardPool(), score="line")
+    async for rollout in driver.run(num_episodes=1024):
+        ...
+
+or, from synchronous code, `collect_rollouts(envs, policy, 1024)`.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import (Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Literal, NamedTuple,
+                    Optional, Sequence, Set, Tuple, Union)
+
+import numpy as np
+
+from .reward import calculate_reward
+from .reward_pool import RewardPool
+
+Score = Literal["line", "episode"]
+
+class PolicyRequest(NamedTuple):
+    """One episode waiting for its next token(s)."""
+    slot: int                           # index of the episode's env
+    observation: Dict[str, np.ndarray]  # as returned by the env's reset / step
+    prompt: Dict[str, str]              # the env's current prompt (topic, meter, ...)
+
+# Takes a batch of requests and returns, in order, a token id or a sequence of token
+# ids for each
+Policy = Callable[[List[PolicyRequest]], Awaitable[Sequence[Union[int, Sequence[int]]]]]
+
+class Rollout(NamedTuple):
+    """One finished episode."""
+    slot: int
+    prompt: Dict[str, str]
+    token_ids: np.ndarray
+    text: str
+    rewards: np.ndarray                 # per step: the env's reward (shaping), with
+                                        # the full reward on the scored steps
+    reward_info: Dict[str, float]       # `calculate_reward` of the whole episode
+
+class RolloutDriver:
+    """Runs episodes on `envs` with an async `policy`, scoring them concurrently.
+
+    Args:
+        envs: `SanskritMeterEnv`s (or wrappers of them, e.g. `PrimeSanskritMeterEnv`)
+            created with `reward_mode="external"`; one episode runs on each at a time
+        policy: Async callable from a batch of `PolicyRequest`s to their token(s)
+        reward_pool: Where rewards are computed: a `RewardPool`, any
+            `concurrent.futures.Executor`, or None for the event loop's default
+            executor
+        score: Score every completed line, as `reward_mode="line"` would ("line"), or
+            only whole episodes ("episode")
+        batch_size: Most requests per policy call (defaults to `len(envs)`)
+        max_wait: Seconds a batcher waits for a batch to fill up after its first
+            request (0 sends whatever is queued)
+        policy_tasks: Number of policy calls in flight at once
+        reward_workers: Number of rewards computed at once (defaults to the pool's
+            `num_workers`, else 1)
+        max_pending_rewards: Bound of the queue of rewards waiting for a worker
+        max_finished: Most rollouts waiting for their rewards or for the consumer
+        reward_kwargs: Passed to every `calculate_reward` call
+    """
+
+    def __init__(self, envs: Sequence[Any], policy: Policy,
+                 reward_pool: Union[RewardPool, Executor, None] = None, score: Score = "episode",
+                 batch_size: Optional[int] = None, max_wait: float = 0.0, policy_tasks: int = 1,
+                 reward_workers: Optional[int] = None, max_pending_rewards: int = 64,
+                 max_finished: int = 64, reward_kwargs: Optional[Dict[str, Any]] = None):
+        if score not in ("line", "episode"):
+            raise ValueError(f"Unknown score {score!r}")
+        for env in envs:
+            if env.unwrapped.reward_mode != "external":
+                raise ValueError("RolloutDriver scores episodes itself; create the envs with "
+                                 "reward_mode='external'")
+        self.envs = list(envs)
+        self.policy = policy
+        self.reward_pool = reward_pool
+        self.score = score
+        self.batch_size = batch_size or len(self.envs)
+        self.max_wait = max_wait
+        self.policy_tasks = policy_tasks
+        self.reward_workers = reward_workers or getattr(reward_pool, "num_workers", 1)
+        self.max_pending_rewards = max_pending_rewards
+        self.max_finished = max_finished
+        self.reward_kwargs = reward_kwargs or {}
+
+    async def run(self, num_episodes: int, seed: Optional[int] = None) -> AsyncIterator[Rollout]:
+        """Run `num_episodes` episodes and yield them as they finish (in that order).
+
+        Episode i is reset with `seed + i` if `seed` is given. Errors from the policy,
+        the envs or the reward workers are raised here.
+        """
+        self._requests: "asyncio.Queue[Tuple[PolicyRequest, asyncio.Future]]" = asyncio.Queue(len(self.envs))
+        self._rewards: "asyncio.Queue[Tuple[asyncio.Future, str, str, list]]" = asyncio.Queue(self.max_pending_rewards)
+        self._finished: "asyncio.Queue[Rollout]" = asyncio.Queue()
+        # Rollouts being finished or waiting for the consumer; episodes wait for one of
+        # these before handing theirs over
+        self._finished_slots = asyncio.Semaphore(self.max_finished)
+        self._tasks: Set[asyncio.Task] = set()
+        background = [asyncio.create_task(self._batcher()) for _ in range(self.policy_tasks)]
+        background += [asyncio.create_task(self._reward_worker()) for _ in range(self.reward_workers)]
+        episodes = iter(range(num_episodes))
+        self._tasks.update(background)
+        self._tasks.update(asyncio.create_task(self._episodes(slot, env, episodes, seed))
+                           for slot, env in enumerate(self.envs))
+        try:
+            for _ in range(num_episodes):
+                yield await self._next_finished()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def collect(self, num_episodes: int, seed: Optional[int] = None) -> List[Rollout]:
+        """`run`, as a list."""
+        return [rollout async for rollout in self.run(num_episodes, seed)]
+
+    async def _next_finished(self) -> Rollout:
+        """The next finished rollout, or the error of any task that failed meanwhile."""
+        getter = asyncio.ensure_future(self._finished.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait(self._tasks | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    self._finished_slots.release()
+                    return getter.result()
+                for task in done:
+                    self._tasks.discard(task)
+                    if task.exception() is not None:
+                        raise task.exception()
+        finally:
+            getter.cancel()
+
+    async def _episodes(self, slot: int, env: Any, episodes: Iterator[int], seed: Optional[int]) -> None:
+        """Run episodes on `env` until the shared budget `episodes` is used up."""
+        base = env.unwrapped
+        loop = asyncio.get_running_loop()
+        for episode in episodes:
+            obs, _ = env.reset(seed=None if seed is None else seed + episode)
+            prompt = dict(base.current_prompt)
+            meter = prompt["meter"]
+            rewards: List[float] = []
+            scored: List[Tuple[int, asyncio.Future]] = []
+            done = False
+            while not done:
+                future = loop.create_future()
+                await self._requests.put((PolicyRequest(slot, obs, prompt), future))
+                actions = await future
+                for action in ([actions] if np.ndim(actions) == 0 else actions):
+                    boundaries = base.scanner.boundaries
+                    obs, reward, terminated, truncated, _ = env.step(action)
+                    rewards.append(reward)
+                    done = terminated or truncated
+                    if done or (self.score == "line" and base.scanner.boundaries != boundaries):
+                        scored.append((len(rewards) - 1, await self._submit(base.scanner, meter)))
+                    if done:
+                        break
+            ids = np.array(base.generated_ids)
+            await self._finished_slots.acquire()
+            task = asyncio.create_task(self._finish(slot, prompt, ids, base.scanner.text, rewards, scored))
+            self._tasks.add(task)
+
+    async def _submit(self, scanner: Any, meter: str) -> asyncio.Future:
+        """Queue the reward of the scanner's poem as it stands; waits while the queue
+        is full."""
+        future = asyncio.get_running_loop().create_future()
+        await self._rewards.put((future, scanner.text, meter, list(scanner.scans)))
+        return future
+
+    async def _finish(self, slot: int, prompt: Dict[str, str], ids: np.ndarray, text: str,
+                      rewards: List[float], scored: List[Tuple[int, asyncio.Future]]) -> None:
+        infos = await asyncio.gather(*(future for _, future in scored))
+        rewards_array = np.array(rewards, dtype=np.float64)
+        for (step, _), info in zip(scored, infos):
+            rewards_array[step] = info["total_score"]
+        self._finished.put_nowait(Rollout(slot, prompt, ids, text, rewards_array, infos[-1]))
+
+    async def _batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._requests.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                if not self._requests.empty():
+                    batch.append(self._requests.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._requests.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                actions = await self.policy([request for request, _ in batch])
+                if len(actions) != len(batch):
+                    raise ValueError(f"Policy returned {len(actions)} actions for {len(batch)} requests")
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), action in zip(batch, actions):
+                if not future.done():
+                    future.set_result(action)
+
+    async def _reward_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            future, text, meter, scans = await self._rewards.get()
+            try:
+                if isinstance(self.reward_pool, RewardPool):
+                    pending = asyncio.wrap_future(self.reward_pool.submit_reward(
+                        text, meter, scans=scans, **self.reward_kwargs))
+                else:
+                    pending = loop.run_in_executor(self.reward_pool, functools.partial(
+                        calculate_reward, text, meter, scans=scans, **self.reward_kwargs))
+                result = await pending
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+def collect_rollouts(envs: Sequence[Any], policy: Policy, num_episodes: int, seed: Optional[int] = None,
+                     **kwargs) -> List[Rollout]:
+    """Run `RolloutDriver(envs, policy, **kwargs)` for `num_episodes` episodes in a new
+    event loop and return the rollouts in the order they finished."""
+    return asyncio.run(RolloutDriver(envs, policy, **kwargs).collect(num_episodes, seed))
@@ -0,0 +1,182 @@
+"""
+Incremental meter scanning for token-by-token generation.
+
+`SanskritMeterEnv.step` used to decode the whole generated sequence and re-scan every
+line of the poem on every token, which makes an episode quadratic in its length. The
+scanner here keeps the decode state, the finished lines and their laghu/guru patterns,
+and only re-scans the line that is currently being written.
+"""
+
+from time import perf_counter
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from .instrumentation import Timings, lap
+from .meters import METER_INDEX
+from .reward import REWARD_WEIGHTS, SyllableRepetition, calculate_reward
+from .scansion import ScannedLine
+from .verifier import syllabify_lines
+
+# When the full reward is computed: after every token, when a line or verse ends (a
+# newline or daṇḍa, see LINE_BOUNDARIES), only when the episode ends, or never, for
+# callers that score it elsewhere ("external", see `src.rollout`).
+RewardMode = Literal["token", "line", "terminal", "external"]
+REWARD_MODES = ("token", "line", "terminal", "external")
+LINE_BOUNDARIES = "\n।॥"
+
+def reward_due(mode: RewardMode, boundary: bool, done: bool) -> bool:
+    """Whether the full reward is computed on a step under a reward `mode` (see
+    `IncrementalMeterScanner.scheduled_reward`)."""
+    return mode == "token" or (done and mode != "external") or (mode == "line" and boundary)
+
+class IncrementalMeterScanner:
+    """Tracks the text and per-line weight patterns of a poem as tokens arrive.
+
+    Decoding follows the usual incremental-detokenization scheme: only the last few
+    token ids are decoded on each step, and text is emitted once it no longer ends in
+    an incomplete multi-byte character. The resulting text is identical to
+    `tokenizer.decode(ids)`, and `patterns` is identical to scanning that text with
+    `verifier.scan_lines(verifier.split_lines(text))`. Lines are kept syllabified
+    (`scans`), so the reward's syllable checks do not syllabify the poem again.
+    """
+
+    def __init__(self, tokenizer: Any, target_meter: Optional[str] = None):
+        self.tokenizer = tokenizer
+        self.reset(target_meter)
+
+    def reset(self, target_meter: Optional[str] = None) -> None:
+        """Start a new poem."""
+        self.target_meter = target_meter
+        self.ids: List[int] = []
+        self.text = ""
+        self.lines: List[str] = []      # finished, stripped, non-empty lines
+        self.line_scans: List[ScannedLine] = []
+        self.current_line = ""           # raw text after the last line break
+        self._current_scan = ScannedLine((), "")
+        self._scanned_line: Optional[str] = None
+        self._prefix_offset = 0
+        self._read_offset = 0
+        self.boundaries = 0              # newlines and daṇḍas seen so far
+        self._repetition = SyllableRepetition()
+        self._repetition_lines = 0       # finished lines committed to `_repetition`
+
+    @property
+    def scans(self) -> List[ScannedLine]:
+        """Syllables and weight patterns of all non-empty lines, including the one being written."""
+        if self.current_line.strip():
+            return self.line_scans + [self._current_scan]
+        return list(self.line_scans)
+
+    @property
+    def patterns(self) -> List[str]:
+        """Weight patterns of all non-empty lines, including the one being written."""
+        return [scanned.pattern for scanned in self.scans]
+
+    def push(self, token_id: int, timings: Optional[Timings] = None) -> None:
+        """Append one token, decoding and re-scanning only what it changed.
+
+        If `timings` is given, the time spent decoding and scanning is added to it
+        under "decode" and "scansion".
+        """
+        t = perf_counter() if timings is not None else 0.0
+        prefix_ids, window_ids = self.decode_window(token_id)
+        prefix_text, window_text = self.tokenizer.batch_decode([prefix_ids, window_ids])
+        self.advance(prefix_text, window_text)
+        if timings is not None:
+            t = lap(timings, "decode", t)
+        self.apply_scan(syllabify_lines(self.pending_lines()))
+        if timings is not None:
+            lap(timings, "scansion", t)
+
+    def decode_window(self, token_id: int) -> Tuple[List[int], List[int]]:
+        """Append `token_id` and return the (prefix, window) id lists to decode.
+
+        `push` is split into `decode_window` / `advance` / `pending_lines` / `apply_scan`
+        so that callers stepping many scanners can decode all the windows in one
+        `tokenizer.batch_decode` call and scan all the pending lines in one
+        `verifier.syllabify_lines` call.
+        """
+        self.ids.append(token_id)
+        return (self.ids[self._prefix_offset:self._read_offset],
+                self.ids[self._prefix_offset:])
+
+    def advance(self, prefix_text: str, window_text: str) -> None:
+        """Consume the decoded (prefix, window) texts returned by `decode_window`."""
+        if len(window_text) > len(prefix_text) and not window_text.endswith("\ufffd"):
+            self.feed_text(window_text[len(prefix_text):])
+            self._prefix_offset = self._read_offset
+            self._read_offset = len(self.ids)
+
+    def feed_text(self, delta: str) -> None:
+        """Append decoded text, splitting off any lines that it completes."""
+        self.text += delta
+        self.boundaries += sum(delta.count(c) for c in LINE_BOUNDARIES)
+        parts = (self.current_line + delta).splitlines(keepends=True)
+        self.current_line = ""
+        for part in parts:
+            if part.splitlines()[0] != part:
+                # Ends with a line break, so the line is complete
+                if part.strip():
+                    self.lines.append(part.strip())
+            else:
+                self.current_line = part
+
+    def pending_lines(self) -> List[str]:
+        """Lines still to be scanned: newly finished ones, then the current line if it changed."""
+        pending = self.lines[len(self.line_scans):]
+        if self.current_line.strip() != self._scanned_line:
+            pending.append(self.current_line.strip())
+        return pending
+
+    def apply_scan(self, scans: List[ScannedLine]) -> None:
+        """Record the scan of `pending_lines()`, in the same order."""
+        n_finished = len(self.lines) - len(self.line_scans)
+        self.line_scans.extend(scans[:n_finished])
+        if len(scans) > n_finished:
+            self._scanned_line = self.current_line.strip()
+            self._current_scan = scans[n_finished]
+
+    def syllable_score(self) -> float:
+        """`check_syllable_patterns` of the current text. The repetition state of the
+        finished lines is kept, so only the line being written is gone over."""
+        scans = self.scans
+        for scanned in self.line_scans[self._repetition_lines:]:
+            self._repetition.extend(scanned.syllables)
+        self._repetition_lines = len(self.line_scans)
+        return self._repetition.score(scans[-1].syllables if len(scans) > len(self.line_scans) else ())
+
+    def reward(self, **kwargs) -> Dict[str, Optional[float]]:
+        """`calculate_reward` for the current text, reusing the incremental scan and
+        syllable repetition state."""
+        weights = {**REWARD_WEIGHTS, **(kwargs.get("weights") or {})}
+        if weights["syllable"] and "syllable_score" not in kwargs:
+            kwargs["syllable_score"] = self.syllable_score()
+        return calculate_reward(self.text, self.target_meter, scans=self.scans, **kwargs)
+
+    def shaping_score(self) -> float:
+        """Cheap progress signal: the fraction of syllables so far that still fit the
+        target meter's automaton (`MeterIndex.prefix_score`); 0.0 for other meters."""
+        if self.target_meter not in METER_INDEX:
+            return 0.0
+        return METER_INDEX.prefix_score(self.target_meter, self.patterns)
+
+    def scheduled_reward(self, mode: RewardMode, boundary: bool, done: bool,
+                         shaping: float = 0.0, **kwargs) -> Tuple[float, bool]:
+        """The step reward under a reward `mode`, and whether the full reward was computed.
+
+        Args:
+            boundary: Whether the last token completed a line (see `boundaries`)
+            done: Whether the episode ends with this token; always fully scored,
+                except in "external" mode
+            shaping: Weight of `shaping_score()` on steps that are not fully scored
+            kwargs: Passed to `calculate_reward`; with `timings`, the whole reward is
+                also timed as "reward"
+        """
+        timings = kwargs.get("timings")
+        t = perf_counter() if timings is not None else 0.0
+        if reward_due(mode, boundary, done):
+            reward, evaluated = self.reward(**kwargs)["total_score"], True
+        else:
+            reward, evaluated = (shaping * self.shaping_score() if shaping else 0.0), False
+        if timings is not None:
+            lap(timings, "reward", t)
+        return reward, evaluated
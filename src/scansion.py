@@ -0,0 +1,141 @@
+"""
+Native Devanāgarī syllabifier and laghu/guru pattern engine.
+
+A drop-in replacement for `chandas.to_pattern_lines` built from precompiled character
+classes. It reproduces chandas' syllabification rules exactly (see
+`tests/test_scansion.py`), but scans a whole batch of lines with one cleaning pass and
+one `finditer` over the joined text instead of a per-syllable match-and-replace loop.
+
+Syllables are split as chandas does: any dead consonants (consonant + virāma), a vowel
+or consonant nucleus with its vowel sign, anusvāra/visarga/candrabindu and accents,
+then any dead consonants that close the syllable. A syllable is guru if it has a long
+vowel, anusvāra or visarga, or is closed by a consonant (which is how a short vowel
+before a conjunct becomes heavy); otherwise it is laghu.
+"""
+
+import re
+from typing import List, NamedTuple, Sequence, Tuple
+
+# Character classes, as regex class bodies
+INDEPENDENT_VOWEL = "ऄ-औॠॡॲ-ॷꣾ"
+CONSONANT = "क-हक़-य़ॸ-ॿ"
+DEPENDENT_VOWEL = "ऺ-ऻा-ौॎ-ॏॕ-ॗॢ-ॣꣿ"
+YOGAVAHA = "ऀ-ःᳩ-ᳶ"          # candrabindu, anusvāra, visarga, ...
+ACCENT = "॑-॔꣠-꣼᳐-᳿"
+NUKTA = "़"
+VIRAMA = "्"
+CANDRABINDU = "ँ"
+OM = "ॐꣽ"
+
+GURU_INDEPENDENT_VOWEL = "आईऊॠॡएऐओऔऍऑॴॵॷꣾ"
+GURU_DEPENDENT_VOWEL = "ऻाीूॄॗॣॎेैोौॕ"
+GURU_YOGAVAHA = "ंःᳩ-ᳶ"
+
+# Independent vowel -> vowel sign, for joining a final dead consonant to a following
+# initial vowel ("तत् अपि" scans like "तदपि"); अ has no sign.
+VOWEL_SIGNS = {
+    "अ": "", "आ": "ा", "इ": "ि", "ई": "ी", "उ": "ु", "ऊ": "ू", "ऋ": "ृ", "ॠ": "ॄ", "ऌ": "ॢ",
+    "ॡ": "ॣ", "ऎ": "ॆ", "ए": "े", "ऐ": "ै", "ऒ": "ॊ", "ओ": "ो", "औ": "ौ", "ऍ": "ॅ", "ऑ": "ॉ",
+}
+
+_DEAD_CONSONANT = "[%s]%s?%s" % (CONSONANT, NUKTA, VIRAMA)
+_OM_RE = re.compile("[%s]" % OM)
+# Everything that is not part of a syllable is dropped; newlines separate lines.
+_NOISE_RE = re.compile("[^%s%s%s%s%s%s%s\n]" % (
+    INDEPENDENT_VOWEL, CONSONANT, DEPENDENT_VOWEL, YOGAVAHA, ACCENT, NUKTA, VIRAMA))
+_JOIN_RE = re.compile("(%s)([%s])" % (_DEAD_CONSONANT, INDEPENDENT_VOWEL))
+_SYLLABLE_RE = re.compile("(?:%s)*[%s%s]%s?[%s]*[%s]*[%s]*(?P<coda>(?:%s%s?)*)" % (
+    _DEAD_CONSONANT, INDEPENDENT_VOWEL, CONSONANT, NUKTA, DEPENDENT_VOWEL, YOGAVAHA, ACCENT,
+    _DEAD_CONSONANT, CANDRABINDU))
+_GURU_RE = re.compile("[%s%s%s]" % (GURU_INDEPENDENT_VOWEL, GURU_DEPENDENT_VOWEL, GURU_YOGAVAHA))
+
+class ScannedLine(NamedTuple):
+    """One line's syllables and weight pattern: the intermediate shared by meter
+    verification and the reward's syllable checks, so a poem is syllabified once."""
+    syllables: Tuple[str, ...]
+    pattern: str   # 'L'/'G' per syllable; "" if the line cannot be syllabified
+
+class _Unjoinable(Exception):
+    pass
+
+def _join(match: "re.Match") -> str:
+    sign = VOWEL_SIGNS.get(match.group(2))
+    if sign is None:
+        raise _Unjoinable(match.group(0))
+    return match.group(1)[:-1] + sign
+
+def _join_line(line: str) -> str:
+    try:
+        return _JOIN_RE.sub(_join, line)
+    except _Unjoinable:
+        return "\x00"   # matches no syllable, so the line is unscannable
+
+def _clean(text: str) -> str:
+    """Chandas' normalization, applied to newline-separated lines in one pass."""
+    text = _NOISE_RE.sub("", _OM_RE.sub("ओम्", text))
+    try:
+        return _JOIN_RE.sub(_join, text)
+    except _Unjoinable:
+        # Chandas rejects just the offending line; redo the join line by line
+        return "\n".join(_join_line(ln) for ln in text.split("\n"))
+
+def _skip(cleaned: str, start: int, end: int, row: int, failed: List[bool]) -> int:
+    """Step over unmatched text, marking lines that contain anything but newlines."""
+    for ch in cleaned[start:end]:
+        if ch == "\n":
+            row += 1
+        else:
+            failed[row] = True
+    return row
+
+def syllabify(line: str) -> List[str]:
+    """Split one Devanāgarī line into syllables, ignoring spaces and punctuation.
+
+    Raises ValueError if the line has characters that do not form a syllable.
+    """
+    cleaned = _clean(line.replace("\n", ""))
+    syllables, pos = [], 0
+    for match in _SYLLABLE_RE.finditer(cleaned):
+        if match.start() != pos:
+            break
+        syllables.append(match.group(0))
+        pos = match.end()
+    if pos != len(cleaned):
+        raise ValueError("No syllable at %r in %r" % (cleaned[pos:], line))
+    return syllables
+
+def syllables(text: str) -> List[str]:
+    """All syllables of `text`, across lines, skipping anything that is not one."""
+    return [match.group(0) for match in _SYLLABLE_RE.finditer(_clean(text))]
+
+def syllable_weight(syllable: str) -> str:
+    """'G' (guru) or 'L' (laghu) for one syllable from `syllabify`."""
+    match = _SYLLABLE_RE.fullmatch(syllable)
+    return "G" if _GURU_RE.search(syllable) or (match and match.group("coda")) else "L"
+
+def syllabify_lines(lines: Sequence[str]) -> List[ScannedLine]:
+    """Syllables and 'L'/'G' pattern of each line, scanned in a single pass over the
+    joined text. A line chandas cannot syllabify (it raises ValueError) keeps the
+    syllables found in it but gets the empty pattern."""
+    cleaned = _clean("\n".join(ln.replace("\n", "") for ln in lines))
+    found: List[List[str]] = [[] for _ in lines]
+    weights: List[List[str]] = [[] for _ in lines]
+    failed = [False] * len(lines)
+    row, pos = 0, 0
+    for match in _SYLLABLE_RE.finditer(cleaned):
+        if match.start() != pos:
+            row = _skip(cleaned, pos, match.start(), row, failed)
+        syllable = match.group(0)
+        found[row].append(syllable)
+        weights[row].append("G" if match.group("coda") or _GURU_RE.search(syllable) else "L")
+        pos = match.end()
+    _skip(cleaned, pos, len(cleaned), row, failed)
+    return [ScannedLine(tuple(f), "" if bad else "".join(w)) for f, w, bad in zip(found, weights, failed)]
+
+def to_pattern_lines(lines: Sequence[str]) -> List[str]:
+    """Return the 'L'/'G' weight pattern of each line, like `chandas.to_pattern_lines`.
+
+    All lines are cleaned and scanned in a single pass over their joined text. Lines
+    chandas cannot syllabify (it raises ValueError) scan as the empty pattern here.
+    """
+    return [scanned.pattern for scanned in syllabify_lines(lines)]
@@ -0,0 +1,243 @@
+"""
+Offline scoring of logged generations.
+
+Streams a JSONL or Parquet file of rollouts in fixed-size chunks, scores each row with
+`calculate_reward` in a pool of worker processes, and writes the reward components as
+columnar part files, so memory stays bounded by a few chunks however large the input:
+
+    python -m src.score rollouts.jsonl scores/ --weight syllable=0.2 --workers 8
+
+The output directory holds `part-00000.parquet`, `part-00001.parquet`, ... (or `.npz`
+with `--format npz`) with the input row number, the id column if present, and one
+column per reward component (NaN for components with weight 0, which are not
+computed), plus `checkpoint.json`, which is updated after every part.
+Rerunning the same command after an interruption resumes after the last written part;
+`--restart` starts over. `load_scores` reads all parts back as one set of columns.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .plagiarism import load_plagiarism_index
+from .reward import REWARD_WEIGHTS, calculate_reward
+from .reward_pool import RewardPool
+
+SCORE_COLUMNS = ("meter_score", "syllable_score", "semantic_score", "style_score",
+                 "originality_score", "total_score")
+CHECKPOINT = "checkpoint.json"
+
+def _is_parquet(path: Path) -> bool:
+    return path.suffix in (".parquet", ".pq")
+
+def iter_rows(path: Union[str, Path], skip: int = 0, batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """The records of a JSONL or Parquet file, one dict at a time, from row `skip` on."""
+    path = Path(path)
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            yield from batch.slice(skip).to_pylist()
+            skip = 0
+        return
+    with path.open("r", encoding="utf-8") as f:
+        row = 0
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row += 1
+            if row <= skip:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{lineno}: invalid JSON ({e})") from None
+
+def _chunked(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _write_part(path: Path, columns: Dict[str, np.ndarray], fmt: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table(columns), tmp)
+    else:
+        with tmp.open("wb") as f:
+            np.savez(f, **columns)
+    os.replace(tmp, path)
+
+def _write_checkpoint(out: Path, state: Dict[str, Any]) -> None:
+    tmp = out / (CHECKPOINT + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, out / CHECKPOINT)
+
+def _columns(start: int, rows: Sequence[Dict[str, Any]], scores: Sequence[Dict[str, float]],
+             id_field: Optional[str]) -> Dict[str, np.ndarray]:
+    columns = {"row": np.arange(start, start + len(rows), dtype=np.int64)}
+    if id_field and any(id_field in row for row in rows):
+        columns[id_field] = np.array([str(row.get(id_field, "")) for row in rows])
+    for name in SCORE_COLUMNS:
+        columns[name] = np.array([s[name] for s in scores], dtype=np.float64)
+    return columns
+
+def score_file(
+    input_path: Union[str, Path],
+    output_dir: Union[str, Path],
+    chunk_size: int = 1024,
+    workers: Optional[int] = None,
+    fmt: str = "parquet",
+    text_field: str = "text",
+    meter_field: str = "meter",
+    topic_field: Optional[str] = "topic",
+    id_field: Optional[str] = "id",
+    weights: Optional[Dict[str, float]] = None,
+    plagiarism_index: Union[str, Path, None] = None,
+    restart: bool = False,
+    max_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Score every row of `input_path` into part files in `output_dir` (see the module
+    docstring), resuming from its checkpoint unless `restart`.
+
+    Args:
+        chunk_size: Rows per part file and per worker task
+        workers: Worker processes (defaults to `os.cpu_count()`); 0 scores in this process
+        fmt: "parquet" (needs pyarrow) or "npz"
+        text_field, meter_field, topic_field, id_field: Input columns; the topic and
+            id are optional
+        weights: Overrides of `reward.REWARD_WEIGHTS` for `total_score`
+        plagiarism_index: Saved `PlagiarismIndex` directory for the originality score
+        max_rows: Stop after this many rows in total (e.g. to score a sample)
+
+    Returns:
+        The checkpoint state: rows and parts written so far.
+    """
+    if fmt not in ("parquet", "npz"):
+        raise ValueError(f"Unknown output format {fmt!r}")
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    state = {"input": str(Path(input_path).resolve()), "format": fmt, "chunk_size": chunk_size,
+             "weights": {**REWARD_WEIGHTS, **(weights or {})}, "rows": 0, "parts": 0, "done": False}
+    if not restart and (out / CHECKPOINT).exists():
+        with (out / CHECKPOINT).open("r", encoding="utf-8") as f:
+            previous = json.load(f)
+        mismatched = [k for k in ("input", "format", "weights") if previous.get(k) != state[k]]
+        if mismatched:
+            raise ValueError(f"{out} holds scores with a different {', '.join(mismatched)}; "
+                             f"use restart=True (--restart) to overwrite them")
+        state.update(rows=previous["rows"], parts=previous["parts"], done=previous["done"])
+        if state["done"]:
+            return state
+
+    kwargs: Dict[str, Any] = {"weights": state["weights"]}
+    if plagiarism_index is not None:
+        kwargs["known_corpus"] = load_plagiarism_index(plagiarism_index)
+
+    def to_kwargs(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {"text": row.get(text_field) or "", "target_meter": row[meter_field],
+                "topic": row.get(topic_field) if topic_field else None}
+
+    rows = iter_rows(input_path, skip=state["rows"], batch_size=chunk_size)
+    if max_rows is not None:
+        rows = (row for _, row in zip(range(max(0, max_rows - state["rows"])), rows))
+
+    def finish(chunk: List[Dict[str, Any]], scores: List[Dict[str, float]]) -> None:
+        part = out / f"part-{state['parts']:05d}.{fmt}"
+        _write_part(part, _columns(state["rows"], chunk, scores, id_field), fmt)
+        state["rows"] += len(chunk)
+        state["parts"] += 1
+        _write_checkpoint(out, state)
+
+    if workers == 0:
+        for chunk in _chunked(rows, chunk_size):
+            finish(chunk, [calculate_reward(**to_kwargs(row), **kwargs) for row in chunk])
+    else:
+        # At most two chunks per worker in flight; parts are written in input order
+        with RewardPool(num_workers=workers) as pool:
+            pending: deque = deque()
+            for chunk in _chunked(rows, chunk_size):
+                pending.append((chunk, pool.submit_reward_batch([to_kwargs(row) for row in chunk], **kwargs)))
+                if len(pending) >= 2 * pool.num_workers:
+                    chunk, future = pending.popleft()
+                    finish(chunk, future.result())
+            while pending:
+                chunk, future = pending.popleft()
+                finish(chunk, future.result())
+
+    state["done"] = max_rows is None or state["rows"] < max_rows
+    _write_checkpoint(out, state)
+    return state
+
+def load_scores(output_dir: Union[str, Path]) -> Dict[str, np.ndarray]:
+    """All part files of a `score_file` output directory, concatenated per column."""
+    out = Path(output_dir)
+    with (out / CHECKPOINT).open("r", encoding="utf-8") as f:
+        state = json.load(f)
+    parts: List[Dict[str, np.ndarray]] = []
+    for i in range(state["parts"]):
+        path = out / f"part-{i:05d}.{state['format']}"
+        if state["format"] == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+            parts.append({name: table.column(name).to_numpy() for name in table.column_names})
+        else:
+            with np.load(path) as part:
+                parts.append({name: part[name] for name in part.files})
+    if not parts:
+        return {}
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+def _parse_weight(spec: str) -> Dict[str, float]:
+    name, _, value = spec.partition("=")
+    if name not in REWARD_WEIGHTS or not value:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE with NAME one of {', '.join(REWARD_WEIGHTS)}")
+    return {name: float(value)}
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score logged generations with calculate_reward.")
+    parser.add_argument("input", help="JSONL or Parquet (.parquet) file of generations")
+    parser.add_argument("output", help="directory for the score part files and checkpoint")
+    parser.add_argument("--format", choices=("parquet", "npz"), default="parquet")
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=None, help="0 scores in this process")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--meter-field", default="meter")
+    parser.add_argument("--topic-field", default="topic")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--weight", type=_parse_weight, action="append", default=[],
+                        help="component weight for total_score, e.g. syllable=0.2 (repeatable)")
+    parser.add_argument("--plagiarism-index", help="saved index directory (see src.plagiarism)")
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    weights = {name: value for spec in args.weight for name, value in spec.items()}
+    start = time.perf_counter()
+    state = score_file(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+                       fmt=args.format, text_field=args.text_field, meter_field=args.meter_field,
+                       topic_field=args.topic_field or None, id_field=args.id_field or None,
+                       weights=weights, plagiarism_index=args.plagiarism_index,
+                       restart=args.restart, max_rows=args.max_rows)
+    elapsed = time.perf_counter() - start
+    print(f"✔  Scored {state['rows']} rows into {state['parts']} parts in {args.output} "
+          f"({elapsed:.1f} s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
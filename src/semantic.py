@@ -0,0 +1,177 @@
+"""
+Embedding similarity between poems and their topics, for `check_semantic_relevance`.
+
+There are only ~140 `generate_dataset.TOPICS`, so their embeddings are computed once
+per encoder and persisted; poems are embedded in micro-batches, and all the cosine
+scores of a batch come from one matrix product. The encoder is pluggable: any object
+with a `name` and an `encode(texts) -> (n, dim) array` method. `HashingEncoder` needs
+no model (and is what the tests use); `SentenceTransformerEncoder` runs a small local
+multilingual model on CPU.
+"""
+
+import os
+import tempfile
+import threading
+import zlib
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple, Union
+
+import numpy as np
+
+from .data.generate_dataset import TOPICS
+from .keywords import normalize
+
+# Suggested `cache_dir`; scorers only persist topic embeddings when given one
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sanskrit-rl" / "topic-embeddings"
+
+class Encoder(Protocol):
+    name: str
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed `texts` as the rows of a (len(texts), dim) float array."""
+        ...
+
+class HashingEncoder:
+    """Bag of character n-grams, hashed into `dim` buckets (the hashing trick).
+
+    No model and no state, and stable across processes (n-grams are hashed with
+    CRC-32, not Python's salted `hash`), so it works as a fallback and in tests.
+    """
+
+    def __init__(self, dim: int = 1024, ngrams: Tuple[int, ...] = (2, 3, 4)):
+        self.dim = dim
+        self.ngrams = ngrams
+        self.name = f"hashing-{dim}-{'-'.join(map(str, ngrams))}"
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            text = normalize(text)
+            buckets = [zlib.crc32(text[i:i + n].encode("utf-8")) % self.dim
+                       for n in self.ngrams for i in range(len(text) - n + 1)]
+            np.add.at(out[row], buckets, 1.0)
+        return out
+
+class SentenceTransformerEncoder:
+    """A sentence-transformers model, on CPU by default. Imported and loaded lazily."""
+
+    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                 device: str = "cpu"):
+        self.name = model_name
+        self.device = device
+        self._model = None
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.name, device=self.device)
+        return np.asarray(self._model.encode(list(texts), batch_size=len(texts) or 1, convert_to_numpy=True))
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return (x / np.maximum(norms, 1e-12)).astype(np.float32)
+
+class SemanticScorer:
+    """Cosine similarity of poems to topics, with cached topic embeddings.
+
+    `score` embeds a batch of poems at once. Callers that produce poems one at a time
+    (e.g. several env instances) can `submit` them instead and get a Future; pending
+    poems are scored together once `batch_size` have been submitted, or on `flush`.
+
+    Args:
+        encoder: See `Encoder`; defaults to `HashingEncoder()`
+        topics: Topics to precompute; others are embedded the first time they are seen
+        cache_dir: Where topic embeddings are persisted per encoder, e.g.
+            `DEFAULT_CACHE_DIR` (None: not persisted)
+        batch_size: Micro-batch size for `submit`
+    """
+
+    def __init__(self, encoder: Optional[Encoder] = None, topics: Sequence[str] = TOPICS,
+                 cache_dir: Union[str, Path, None] = None, batch_size: int = 64):
+        self.encoder = encoder if encoder is not None else HashingEncoder()
+        self.batch_size = batch_size
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str, Future]] = []
+        self._topic_index: Dict[str, int] = {}
+        self._topic_embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._load_topics(list(dict.fromkeys(topics)))
+
+    @property
+    def cache_path(self) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / (self.encoder.name.replace("/", "--") + ".npz")
+
+    def _load_topics(self, topics: List[str]) -> None:
+        path = self.cache_path
+        if path is not None and path.exists():
+            with np.load(path) as cached:
+                if cached["topics"].tolist() == topics:
+                    self._topic_index = {t: i for i, t in enumerate(topics)}
+                    self._topic_embeddings = cached["embeddings"]
+                    return
+        self._add_topics(topics)
+        if path is not None:
+            # Written to a temporary file and renamed into place, so that processes
+            # starting together never read a partly written cache
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, topics=np.array(topics), embeddings=self._topic_embeddings)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def _add_topics(self, topics: List[str]) -> None:
+        with self._lock:
+            new = [t for t in dict.fromkeys(topics) if t not in self._topic_index]
+            if not new:
+                return
+            embeddings = _normalize_rows(self.encoder.encode(new))
+            if self._topic_embeddings.size:
+                embeddings = np.concatenate([self._topic_embeddings, embeddings])
+            for topic in new:
+                self._topic_index[topic] = len(self._topic_index)
+            self._topic_embeddings = embeddings
+
+    def similarities(self, texts: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of each text to every cached topic, (len(texts), n_topics)."""
+        return _normalize_rows(self.encoder.encode(texts)) @ self._topic_embeddings.T
+
+    def score(self, texts: Sequence[str], topics: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of `texts[i]` to `topics[i]`, clipped to [0, 1]."""
+        if not len(texts):
+            return np.zeros(0, dtype=np.float32)
+        self._add_topics(list(topics))
+        index = np.array([self._topic_index[t] for t in topics])
+        sims = self.similarities(texts)
+        return np.clip(sims[np.arange(len(texts)), index], 0.0, 1.0)
+
+    def submit(self, text: str, topic: str) -> "Future[float]":
+        """Queue one poem; its score is set when the batch is flushed."""
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((text, topic, future))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+        return future
+
+    def flush(self) -> None:
+        """Score all queued poems in one batch."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            scores = self.score([text for text, _, _ in pending], [topic for _, topic, _ in pending])
+        except Exception as e:
+            for _, _, future in pending:
+                future.set_exception(e)
+            raise
+        for (_, _, future), value in zip(pending, scores):
+            future.set_result(float(value))
@@ -0,0 +1,621 @@
+"""
+Per-token syllable-weight table over a tokenizer's vocabulary.
+
+Meter rewards depend only on the laghu/guru weights of the syllables, but the env
+decodes every token and re-scans the line it extends. Syllabification as done by
+`src.scansion` is a finite-state process over characters, so its effect of a whole
+token can be precomputed: for each carry-in state (where the current, unfinished
+syllable stands), the carry-out state and the weights of the syllables the token
+completes. A poem's patterns can then be advanced one token at a time with two table
+lookups (`MeterState.push`), and the same table gives the set of tokens that keep a
+poem on its meter (`TokenTable.logits_mask`), for constrained decoding.
+
+Tokens are grouped into classes by the character categories they contain (most of a
+multilingual vocabulary is noise to the scansion and shares a single class), and the
+table is stored per class. Tokens that contain a line break, or do not decode to whole
+characters on their own (byte-fallback pieces), are "complex": they are decoded and
+fed through the character automaton instead.
+
+The table is built once per tokenizer and cached on disk, keyed by a hash of the
+vocabulary (`load_token_table`); like the other stores it is a directory of `.npy`
+arrays plus `meta.json`, loaded with `mmap_mode="r"`. The directory is written under a
+temporary name and renamed into place, and never rewritten, so processes that build
+the same table at once cannot map a partly written one.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from . import scansion
+from .instrumentation import Timings, lap
+from .meters import METER_INDEX, REJECT, MeterIndex, PatternDFA
+from .scanner import LINE_BOUNDARIES, IncrementalMeterScanner
+from .verifier import syllabify_lines
+
+FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sanskrit-rl" / "token-tables"
+
+# --- Character categories -------------------------------------------------------------
+# A category is a tuple whose first element is its kind; the flags are what the
+# automaton needs to know about the character.
+
+def _in(ch: str, cls: str) -> bool:
+    return re.fullmatch("[%s]" % cls, ch) is not None
+
+_LINE_BREAKS = frozenset(ch for ch in map(chr, range(0x2030)) if len(("a" + ch + "a").splitlines()) == 2)
+_NOISE, _SPACE, _NL = ("NOISE",), ("SPACE",), ("NL",)
+
+@lru_cache(maxsize=None)
+def char_category(ch: str) -> Tuple:
+    """The category of one character for the syllable automaton."""
+    if ch in _LINE_BREAKS:
+        return _NL
+    if ch in scansion.OM:
+        return ("OM",)
+    if _in(ch, scansion.INDEPENDENT_VOWEL):
+        sign = scansion.VOWEL_SIGNS.get(ch)
+        return ("IV", ch in scansion.GURU_INDEPENDENT_VOWEL, sign is not None,
+                sign is not None and sign != "" and _in(sign, scansion.GURU_DEPENDENT_VOWEL), sign == "")
+    if _in(ch, scansion.CONSONANT):
+        return ("C",)
+    if ch == scansion.NUKTA:
+        return ("N",)
+    if ch == scansion.VIRAMA:
+        return ("V",)
+    if _in(ch, scansion.DEPENDENT_VOWEL):
+        return ("DV", _in(ch, scansion.GURU_DEPENDENT_VOWEL))
+    guru = _in(ch, scansion.GURU_YOGAVAHA)
+    if _in(ch, scansion.YOGAVAHA):
+        # Some Vedic signs are in both classes; they extend a syllable as either
+        return ("YOG", guru, ch == scansion.CANDRABINDU, _in(ch, scansion.ACCENT))
+    if _in(ch, scansion.ACCENT):
+        return ("ACC", guru)
+    return _SPACE if ch.isspace() else _NOISE
+
+_OM_CATEGORIES = tuple(char_category(ch) for ch in "ओम्")
+
+# --- The syllable automaton -----------------------------------------------------------
+# States, as tuples:
+#   ("S0", nonblank)      line start, no syllable yet (nonblank: the line has some text)
+#   ("S0C", nukta, x)     a consonant at line start that is an onset or a nucleus
+#   ("S0D", nukta, x)     onset dead consonant(s)
+#   ("STG", stage, guru)  in a syllable, after its nucleus / nukta / dv / yog / acc
+#   ("CODA", guru, k, last)  closed by k (1, or 2 for "2 or more") dead consonants, the
+#                         last one bare ("b"), bare with a nukta ("bn"), bare but not
+#                         joinable ("x") or with a candrabindu ("cb")
+#   ("PC", guru, k, nukta, x)  a consonant after a syllable: its coda if a virāma
+#                         follows, else the next nucleus
+#   ("F",)                the line cannot be syllabified
+# `guru` is whether the syllable has a heavy vowel or yogavāha so far; a syllable with
+# a coda is heavy regardless. A bare dead consonant joins a following independent
+# vowel, except one that was itself made by joining अ (x = 1): `scansion` joins in a
+# single `re.sub` pass. The automaton reproduces `scansion.syllabify_lines` (see
+# `tests/test_token_table.py`).
+
+BLANK = ("S0", False)
+FAILED = ("F",)
+
+def _weight(heavy: bool) -> str:
+    return "G" if heavy else "L"
+
+def step(state: Tuple, cat: Tuple) -> Tuple[Tuple, str]:
+    """Advance `state` by one character category (not a line break); returns the new
+    state and the weights of any syllables completed."""
+    kind = cat[0]
+    if kind == "SPACE":
+        return state, ""
+    if kind == "NOISE":
+        return (("S0", True) if state == BLANK else state), ""
+    if kind == "OM":
+        emitted = ""
+        for sub in _OM_CATEGORIES:
+            state, out = step(state, sub)
+            emitted += out
+        return state, emitted
+    tag = state[0]
+    if tag == "F":
+        return state, ""
+    if tag == "S0":
+        if kind == "C":
+            return ("S0C", 0, 0), ""
+        if kind == "IV":
+            return ("STG", "nuc", cat[1]), ""
+        return FAILED, ""
+    if tag == "S0C":
+        _, nukta, x = state
+        if kind == "N" and not nukta:
+            return ("S0C", 1, x), ""
+        if kind == "V":
+            return ("S0D", nukta, x), ""
+        return step(("STG", "nukta" if nukta else "nuc", False), cat)
+    if tag == "S0D":
+        _, nukta, x = state
+        if kind == "C":
+            return ("S0C", 0, 0), ""
+        if kind == "IV" and x:
+            return ("STG", "nuc", cat[1]), ""
+        if kind == "IV" and cat[4]:   # अ has no sign
+            return ("S0C", nukta, 1), ""
+        if kind == "IV" and cat[2]:
+            return ("STG", "dv", cat[3]), ""
+        return FAILED, ""
+    if tag == "STG":
+        _, stage, guru = state
+        if kind == "C":
+            return ("PC", guru, 0, 0, 0), ""
+        if kind == "IV":
+            return ("STG", "nuc", cat[1]), _weight(guru)
+        if kind == "N" and stage == "nuc":
+            return ("STG", "nukta", guru), ""
+        if kind == "DV" and stage in ("nuc", "nukta", "dv"):
+            return ("STG", "dv", guru or cat[1]), ""
+        if kind == "YOG" and stage != "acc":
+            return ("STG", "yog", guru or cat[1]), ""
+        if kind == "ACC" or (kind == "YOG" and cat[3]):
+            return ("STG", "acc", guru or cat[1]), ""
+        return FAILED, ""
+    if tag == "CODA":
+        _, guru, k, last = state
+        if kind == "C":
+            return ("PC", guru, k, 0, 0), ""
+        if kind == "YOG" and cat[2] and last != "cb":
+            return ("CODA", guru, k, "cb"), ""
+        if kind == "IV":
+            if last in ("cb", "x"):
+                return ("STG", "nuc", cat[1]), "G"
+            if cat[4]:
+                # The consonant leaves the coda; whether it is a nucleus is still open
+                return ("PC", guru, k - 1, int(last == "bn"), 1), ""
+            if cat[2]:
+                return ("STG", "dv", cat[3]), _weight(guru or k > 1)
+        return FAILED, ""
+    # "PC"
+    _, guru, k, nukta, x = state
+    if kind == "N" and not nukta:
+        return ("PC", guru, k, 1, x), ""
+    if kind == "V":
+        return ("CODA", guru, min(k + 1, 2), "x" if x else "bn" if nukta else "b"), ""
+    state, emitted = step(("STG", "nukta" if nukta else "nuc", False), cat)
+    return state, _weight(guru or k > 0) + emitted
+
+def end(state: Tuple) -> Optional[str]:
+    """Weights completed by ending the line in `state`, or None if the line fails."""
+    tag = state[0]
+    if tag == "S0":
+        return ""
+    if tag == "S0C":
+        return "L"
+    if tag == "STG":
+        return _weight(state[2])
+    if tag == "CODA":
+        return "G"
+    if tag == "PC":
+        return _weight(state[1] or state[2] > 0) + "L"
+    return None
+
+def _enumerate_states() -> List[Tuple]:
+    """All states reachable from `BLANK`, in a fixed order."""
+    cats = {char_category(chr(c)) for c in range(0x900, 0x980)} | {char_category(chr(c)) for c in range(0x1CD0, 0x1D00)}
+    cats |= {char_category(chr(c)) for c in range(0xA8E0, 0xA900)} | {_NOISE, _SPACE}
+    cats.discard(_NL)
+    states, queue = {BLANK: 0}, [BLANK]
+    while queue:
+        state = queue.pop(0)
+        for cat in sorted(cats):
+            nxt, _ = step(state, cat)
+            if nxt not in states:
+                states[nxt] = len(states)
+                queue.append(nxt)
+    return list(states)
+
+STATES = _enumerate_states()
+STATE_INDEX = {state: i for i, state in enumerate(STATES)}
+_BLANK_ID = STATE_INDEX[BLANK]
+_FAILED_ID = STATE_INDEX[FAILED]
+
+# Emitted weights are packed into a uint16: the count in the top 4 bits, bit i set if
+# syllable i is guru.
+MAX_EMIT = 12
+
+def _pack(weights: str) -> int:
+    return (len(weights) << MAX_EMIT) | sum(1 << i for i, w in enumerate(weights) if w == "G")
+
+def _unpack(packed: int) -> str:
+    return "".join("G" if packed >> i & 1 else "L" for i in range(packed >> MAX_EMIT))
+
+# --- Token classes --------------------------------------------------------------------
+
+def _class_key(text: str) -> Optional[Tuple]:
+    """Category sequence of a token's text, with spaces dropped and runs of noise
+    merged (neither changes the result); None if it has a line break."""
+    key: List[Tuple] = []
+    for ch in text:
+        cat = char_category(ch)
+        if cat is _NL:
+            return None
+        if cat is _SPACE or (cat is _NOISE and key and key[-1] is _NOISE):
+            continue
+        key.append(cat)
+    return tuple(key)
+
+def _surface(tokenizer: Any, token_id: int) -> Optional[str]:
+    """The token's text on its own, or None if it is not whole characters."""
+    text = tokenizer.decode([token_id])
+    return None if "\ufffd" in text else text
+
+def tokenizer_hash(tokenizer: Any) -> str:
+    """A key for the tokenizer's vocabulary (pieces and ids), to cache its table by."""
+    h = hashlib.sha256(f"v{FORMAT_VERSION}\t{type(tokenizer).__name__}\t{tokenizer.vocab_size}\n".encode())
+    if hasattr(tokenizer, "get_vocab"):
+        for piece, token_id in sorted(tokenizer.get_vocab().items(), key=lambda item: item[1]):
+            h.update(f"{token_id}\t{piece}\n".encode("utf-8", "surrogatepass"))
+    else:
+        for token_id in range(tokenizer.vocab_size):
+            h.update(tokenizer.decode([token_id]).encode("utf-8", "surrogatepass") + b"\x00")
+    return h.hexdigest()[:16]
+
+_ARRAYS = ("token_class", "boundary_count", "class_next", "class_emit", "surface_bytes", "surface_offsets")
+
+class TokenTable:
+    """The precomputed per-token automaton for one tokenizer (see the module docstring).
+
+    Arrays:
+        token_class: int32 (vocab,), the token's class, or -1 if it is complex
+        boundary_count: uint8 (vocab,), newlines and daṇḍas in the token's text
+        class_next: int8 (states, classes), carry-out state per carry-in state
+        class_emit: uint16 (states, classes), packed weights of the completed syllables
+        surface_bytes, surface_offsets: the UTF-8 text of token i is
+            surface_bytes[surface_offsets[i]:surface_offsets[i + 1]] ("" if not whole
+            characters)
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], tokenizer_hash: str, path: Union[str, Path, None] = None):
+        self.arrays = arrays
+        self.tokenizer_hash = tokenizer_hash
+        self.path = None if path is None else Path(path)
+        self.token_class = arrays["token_class"]
+        self.boundary_count = arrays["boundary_count"]
+        self.class_next = arrays["class_next"]
+        self.class_emit = arrays["class_emit"]
+        self._complex = np.flatnonzero(np.asarray(self.token_class) < 0)
+        self._deltas: Dict[int, Tuple[PatternDFA, np.ndarray, int]] = {}
+
+    @classmethod
+    def build(cls, tokenizer: Any) -> "TokenTable":
+        vocab_size = tokenizer.vocab_size
+        classes: Dict[Tuple, int] = {}
+        token_class = np.full(vocab_size, -1, dtype=np.int32)
+        boundary_count = np.zeros(vocab_size, dtype=np.uint8)
+        surfaces: List[bytes] = []
+        for token_id in range(vocab_size):
+            text = _surface(tokenizer, token_id)
+            surfaces.append(b"" if text is None else text.encode("utf-8", "surrogatepass"))
+            if text is None:
+                continue
+            boundary_count[token_id] = min(255, sum(text.count(c) for c in LINE_BOUNDARIES))
+            key = _class_key(text)
+            if key is not None:
+                token_class[token_id] = classes.setdefault(key, len(classes))
+
+        class_next = np.zeros((len(STATES), len(classes)), dtype=np.int8)
+        class_emit = np.zeros((len(STATES), len(classes)), dtype=np.uint16)
+        too_long = np.zeros(len(classes), dtype=bool)
+        for key, c in classes.items():
+            for s, state in enumerate(STATES):
+                emitted = ""
+                for cat in key:
+                    state, out = step(state, cat)
+                    emitted += out
+                if len(emitted) > MAX_EMIT:
+                    too_long[c] = True
+                    break
+                class_next[s, c] = STATE_INDEX[state]
+                class_emit[s, c] = _pack(emitted)
+        token_class[np.isin(token_class, np.flatnonzero(too_long))] = -1
+
+        offsets = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in surfaces], out=offsets[1:])
+        arrays = {"token_class": token_class, "boundary_count": boundary_count,
+                  "class_next": class_next, "class_emit": class_emit,
+                  "surface_bytes": np.frombuffer(b"".join(surfaces), dtype=np.uint8),
+                  "surface_offsets": offsets}
+        return cls(arrays, tokenizer_hash(tokenizer))
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the table to the new directory `path`, atomically.
+
+        Raises FileExistsError if `path` exists, e.g. because another process saved
+        the same table first.
+        """
+        path = Path(path)
+        if path.exists():
+            raise FileExistsError(f"Token table {path} already exists")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp"))
+        try:
+            for name in _ARRAYS:
+                np.save(tmp / f"{name}.npy", np.asarray(self.arrays[name]))
+            with (tmp / "meta.json").open("w", encoding="utf-8") as f:
+                json.dump({"version": FORMAT_VERSION, "tokenizer_hash": self.tokenizer_hash,
+                           "states": [list(s) for s in STATES]}, f)
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                if path.exists():
+                    raise FileExistsError(f"Token table {path} already exists") from None
+                raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TokenTable":
+        path = Path(path)
+        with (path / "meta.json").open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != FORMAT_VERSION or [tuple(s) for s in meta["states"]] != STATES:
+            raise ValueError(f"Token table {path} was built by a different version of the automaton")
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        return cls(arrays, meta["tokenizer_hash"], path=path)
+
+    def __len__(self) -> int:
+        return len(self.token_class)
+
+    def surface(self, token_id: int) -> str:
+        """The token's text on its own ("" if it is not whole characters)."""
+        lo, hi = self.arrays["surface_offsets"][token_id:token_id + 2]
+        return bytes(self.arrays["surface_bytes"][lo:hi]).decode("utf-8", "surrogatepass")
+
+    def logits_mask(self, meter_state: "MeterState", meter: str, index: MeterIndex = METER_INDEX) -> np.ndarray:
+        """Boolean (vocab,) mask of the tokens that keep the poem on `meter`.
+
+        A token is allowed if, under some line layout of the meter, every finished line
+        is a complete line of it, the syllables completed so far on the current line are
+        a viable prefix, and no line becomes unscannable. The syllable still being
+        written is not judged until it is complete. Tokens that are not whole characters
+        on their own are always allowed, and so is everything if the meter has no
+        template or the current line is already unscannable.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if meter not in index or meter_state.state == _FAILED_ID or meter_state._window:
+            return mask
+        finished = [p for p in meter_state.finished if p]
+        emit = np.asarray(self.class_emit[meter_state.state]).astype(np.int64)
+        lengths, bits = emit >> MAX_EMIT, emit & ((1 << MAX_EMIT) - 1)
+        allowed = np.zeros(len(emit), dtype=bool)
+        for per_line in index.LAYOUTS:
+            dfas = index.line_dfas(meter, len(finished) + 1, per_line)
+            if not all(dfa.accepts(p) for dfa, p in zip(dfas, finished)):
+                continue
+            q, _ = dfas[-1].run(meter_state.current)
+            if q == REJECT:
+                continue
+            delta, dead = self._delta(dfas[-1])
+            states = np.full(len(emit), q, dtype=np.int32)
+            for i in range(int(lengths.max(initial=0))):
+                states = np.where(lengths > i, delta[states, (bits >> i) & 1], states)
+            allowed |= states != dead
+        allowed &= np.asarray(self.class_next[meter_state.state]) != _FAILED_ID
+        if len(allowed):
+            mask = allowed[np.maximum(np.asarray(self.token_class), 0)]
+        for token_id in self._complex:
+            text = self.surface(int(token_id))
+            if text:
+                after = meter_state.copy()
+                after.feed_text(text)
+                mask[token_id] = (after.state != _FAILED_ID and "" not in after.finished[len(meter_state.finished):]
+                                  and after.viable(meter, index))
+            else:
+                mask[token_id] = True
+        return mask
+
+    def _delta(self, dfa: PatternDFA) -> Tuple[np.ndarray, int]:
+        """`dfa.delta` as an array, with REJECT as an absorbing last state."""
+        cached = self._deltas.get(id(dfa))
+        if cached is None or cached[0] is not dfa:
+            dead = len(dfa.delta)
+            delta = np.array(dfa.delta + [[REJECT, REJECT]], dtype=np.int32)
+            delta[delta == REJECT] = dead
+            cached = self._deltas[id(dfa)] = (dfa, delta, dead)
+        return cached[1], cached[2]
+
+_TABLES: Dict[str, TokenTable] = {}
+
+def load_token_table(tokenizer: Any, cache_dir: Union[str, Path, None] = DEFAULT_CACHE_DIR) -> TokenTable:
+    """The table for `tokenizer`: loaded from `cache_dir`, or built and saved there
+    (not saved if `cache_dir` is None). Tables are shared within a process."""
+    key = tokenizer_hash(tokenizer)
+    table = _TABLES.get(key)
+    if table is not None:
+        return table
+    path = None if cache_dir is None else Path(cache_dir) / key
+    if path is not None and (path / "meta.json").exists():
+        try:
+            table = TokenTable.load(path)
+        except ValueError:
+            table = None
+    if table is None:
+        table = TokenTable.build(tokenizer)
+        if path is not None and not path.exists():
+            try:
+                table.save(path)
+            except FileExistsError:
+                pass   # saved by another process meanwhile
+    _TABLES[key] = table
+    return table
+
+
+class MeterState:
+    """The laghu/guru patterns of a poem, advanced on token ids with a `TokenTable`.
+
+    `patterns` equals `verifier.scan_lines(verifier.split_lines(tokenizer.decode(ids)))`.
+    Complex tokens, and any tokens after one until its characters are complete, are
+    decoded and fed through the character automaton.
+    """
+
+    def __init__(self, table: TokenTable, tokenizer: Any):
+        self.table = table
+        self.tokenizer = tokenizer
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = _BLANK_ID
+        self.finished: List[str] = []   # patterns of the finished non-blank lines
+        self.current = ""               # weights of the completed syllables of the current line
+        self.boundaries = 0             # newlines and daṇḍas seen so far
+        self._window: List[int] = []    # ids not yet decoded to whole characters
+
+    def copy(self) -> "MeterState":
+        other = MeterState.__new__(MeterState)
+        other.__dict__.update(self.__dict__)
+        other.finished = list(self.finished)
+        other._window = list(self._window)
+        return other
+
+    def push(self, token_id: int) -> None:
+        table = self.table
+        c = int(table.token_class[token_id])
+        if c >= 0 and not self._window:
+            packed = int(table.class_emit[self.state, c])
+            if packed:
+                self.current += _unpack(packed)
+            self.state = int(table.class_next[self.state, c])
+            self.boundaries += int(table.boundary_count[token_id])
+            return
+        self._window.append(token_id)
+        text = self.tokenizer.decode(self._window)
+        if not text.endswith("\ufffd"):
+            self._window = []
+            self.boundaries += sum(text.count(c) for c in LINE_BOUNDARIES)
+            self.feed_text(text)
+
+    def feed_text(self, text: str) -> None:
+        """Advance over decoded text, character by character."""
+        state = STATES[self.state]
+        for ch in text:
+            cat = char_category(ch)
+            if cat is _NL:
+                self.state = STATE_INDEX[state]
+                self._end_line()
+                state = BLANK
+                continue
+            state, emitted = step(state, cat)
+            self.current += emitted
+        self.state = STATE_INDEX[state]
+
+    def _line_pattern(self) -> Optional[str]:
+        """Pattern of the current line if it ended now; None if it is blank."""
+        state = STATES[self.state]
+        if state == BLANK:
+            return None
+        tail = end(state)
+        return "" if tail is None else self.current + tail
+
+    def _end_line(self) -> None:
+        pattern = self._line_pattern()
+        if pattern is not None:
+            self.finished.append(pattern)
+        self.state = _BLANK_ID
+        self.current = ""
+
+    @property
+    def patterns(self) -> List[str]:
+        """Weight patterns of all non-empty lines, including the one being written."""
+        pattern = self._line_pattern()
+        return self.finished + ([] if pattern is None else [pattern])
+
+    def viable(self, meter: str, index: MeterIndex = METER_INDEX) -> bool:
+        """Whether, under some layout, every finished line is a complete line of `meter`
+        and the completed syllables of the current line are a viable prefix (the
+        `TokenTable.logits_mask` criterion; unscannable lines are skipped, as in
+        `MeterIndex`)."""
+        if meter not in index:
+            return True
+        finished = [p for p in self.finished if p]
+        for per_line in index.LAYOUTS:
+            dfas = index.line_dfas(meter, len(finished) + 1, per_line)
+            if all(dfa.accepts(p) for dfa, p in zip(dfas, finished)) and dfas[-1].viable(self.current):
+                return True
+        return False
+
+class TableMeterScanner(IncrementalMeterScanner):
+    """An `IncrementalMeterScanner` that advances on token ids with a `TokenTable`.
+
+    `push` only looks the token up; `patterns`, `boundaries` and `shaping_score` come
+    from the table. The text and syllables (`text`, `scans`, `reward`) are decoded and
+    scanned only when asked for, so this pays off with `reward_mode="line"` or
+    `"terminal"`, where the full reward is computed on a few steps only.
+    """
+
+    def __init__(self, tokenizer: Any, table: TokenTable, target_meter: Optional[str] = None):
+        self.table = table
+        self.meter_state = MeterState(table, tokenizer)
+        super().__init__(tokenizer, target_meter)
+
+    def reset(self, target_meter: Optional[str] = None) -> None:
+        super().reset(target_meter)
+        self.meter_state.reset()
+        self._decoded = 0
+
+    @property
+    def text(self) -> str:
+        self._sync()
+        return self._text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._text = value
+
+    def _sync(self) -> None:
+        """Bring the decoded text and the line scans up to date with `ids`.
+
+        Only the ids since the last sync are decoded, with the prefix and read offsets
+        of `IncrementalMeterScanner`. Trailing ids that do not decode to whole
+        characters yet are left for the next sync.
+        """
+        if self._decoded == len(self.ids):
+            return
+        self._decoded = end = len(self.ids)
+        prefix_text, window_text = self.tokenizer.batch_decode(
+            [self.ids[self._prefix_offset:self._read_offset], self.ids[self._prefix_offset:]])
+        # A character is at most 4 bytes, so at most 3 ids are incomplete
+        while window_text.endswith("\ufffd") and end > max(self._read_offset + 1, len(self.ids) - 3):
+            end -= 1
+            window_text = self.tokenizer.decode(self.ids[self._prefix_offset:end])
+        if len(window_text) > len(prefix_text) and not window_text.endswith("\ufffd"):
+            boundaries = self.boundaries
+            self.feed_text(window_text[len(prefix_text):])
+            self.boundaries = boundaries
+            self._prefix_offset, self._read_offset = self._read_offset, end
+        self.apply_scan(syllabify_lines(self.pending_lines()))
+
+    def push(self, token_id: int, timings: Optional[Timings] = None) -> None:
+        t = perf_counter() if timings is not None else 0.0
+        self.ids.append(token_id)
+        self.meter_state.push(token_id)
+        self.boundaries = self.meter_state.boundaries
+        if timings is not None:
+            lap(timings, "scansion", t)
+
+    @property
+    def scans(self):
+        self._sync()
+        return super().scans
+
+    @property
+    def patterns(self) -> List[str]:
+        return self.meter_state.patterns
+
+    def logits_mask(self) -> np.ndarray:
+        """`TokenTable.logits_mask` for the target meter."""
+        return self.table.logits_mask(self.meter_state, self.target_meter)
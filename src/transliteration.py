@@ -0,0 +1,148 @@
+"""
+Table-driven Roman → Devanāgarī transliteration for the verifier's input scripts.
+
+`indic_transliteration.sanscript.transliterate` walks its input one candidate token at a
+time, slicing and shortening a window until a key matches. Here the same scheme tables
+are compiled once per script into a single longest-match regex and two lookup tables
+(a token's output after a consonant and elsewhere), so converting a text is one
+`findall` and one dict lookup per token. Output is identical to `transliterate`,
+including the shortcut, accent and oṃ handling (see `tests/test_transliteration.py`).
+
+For SLP1, whose letters are single ASCII characters, `slp1_pattern_lines` also scans
+laghu/guru weights straight from the text, without producing Devanāgarī at all.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+from . import scansion
+
+# `verifier.Script` values other than Devanāgarī, and their sanscript scheme names
+SCHEMES = {"iast": "iast", "slp1": "slp1", "hk": "hk"}
+
+def _trie_pattern(keys) -> str:
+    """A regex matching the longest of `keys` at a position, as a trie of alternations
+    (one alternative per distinct first character, rather than one per key)."""
+    children: Dict[str, list] = {}
+    for key in keys:
+        if key:
+            children.setdefault(key[0], []).append(key[1:])
+    branches = []
+    for ch, rests in sorted(children.items()):
+        rest = _trie_pattern(rests)
+        if not rest:
+            branches.append(re.escape(ch))
+        else:
+            branches.append("%s(?:%s)%s" % (re.escape(ch), rest, "?" if "" in rests else ""))
+    return "|".join(branches)
+
+class Transliterator:
+    """A compiled converter from one Roman scheme to Devanāgarī."""
+
+    def __init__(self, script: str):
+        from indic_transliteration import sanscript
+        from indic_transliteration.sanscript.schemes import roman
+
+        scheme_map = sanscript.SchemeMap(sanscript.SCHEMES[SCHEMES[script]],
+                                         sanscript.SCHEMES[sanscript.DEVANAGARI])
+        self.script = script
+        self._shortcuts = list((scheme_map.from_scheme.get("shortcuts") or {}).items())
+        virama = scheme_map.virama[""]
+        self._initial: Dict[str, str] = dict(scheme_map.non_marks_viraama)
+        self._after_consonant = {token: virama + out for token, out in scheme_map.non_marks_viraama.items()}
+        for token, out in scheme_map.vowels.items():
+            self._initial.setdefault(token, out)
+            self._after_consonant[token] = scheme_map.vowel_marks.get(token, "")
+        self._consonants = frozenset(scheme_map.consonants)
+        self._virama = virama
+        self._token_re = re.compile("(?:%s)|." % _trie_pattern(self._initial), re.DOTALL)
+
+        self._accent_re = None
+        self._accents = frozenset(scheme_map.accents.values())
+        if self._accents:
+            import regex
+            self._accent_re = regex.compile("([%s])([%s])" % (
+                "".join(self._accents), "".join(scheme_map.to_scheme["yogavaahas"])))
+        self._fix_om = (scheme_map.to_scheme.fix_om
+                        if scheme_map.from_scheme.name in roman.CAPITALIZABLE_SCHEME_IDS else None)
+
+    def __call__(self, text: str) -> str:
+        for key, shortcut in self._shortcuts:
+            if shortcut in key:
+                text = text.replace(key, shortcut)
+            text = text.replace(shortcut, key)
+        initial, after_consonant, consonants = self._initial, self._after_consonant, self._consonants
+        out = []
+        append = out.append
+        had_consonant = False
+        for token in self._token_re.findall(text):
+            if had_consonant:
+                mapped = after_consonant.get(token)
+                append(self._virama + token if mapped is None else mapped)
+            else:
+                append(initial.get(token, token))
+            had_consonant = token in consonants
+        if had_consonant:
+            append(self._virama)
+        result = "".join(out)
+        # Both rewrites are slow `regex` substitutions; skip them when they cannot match
+        if self._accent_re is not None and not self._accents.isdisjoint(result):
+            result = self._accent_re.sub("\\2\\1", result)
+        if self._fix_om is not None and "ओ" in result:
+            result = self._fix_om(result)
+        return result
+
+@lru_cache(maxsize=None)
+def get_transliterator(script: str) -> Transliterator:
+    """The compiled `Transliterator` for `script`, built once per process."""
+    return Transliterator(script)
+
+def transliterate(text: str, script: str) -> str:
+    """`text` in `script` ("iast", "slp1" or "hk") as Devanāgarī."""
+    return get_transliterator(script)(text)
+
+def transliterate_many(texts: Sequence[str], script: str) -> List[str]:
+    """`transliterate` over a batch; repeated texts are converted once."""
+    convert = get_transliterator(script)
+    converted = {text: convert(text) for text in dict.fromkeys(texts)}
+    return [converted[text] for text in texts]
+
+# SLP1 letters that map one-to-one onto Devanāgarī letters. Anything else that
+# `transliterate` would turn into a letter (nukta forms "k0", "r2", the "|" shortcut,
+# candrabindu "~", "AUM") sends the line down the Devanāgarī path instead.
+SLP1_LONG_VOWELS = "AIUFXeEoO"
+SLP1_VOWELS = "aiufx" + SLP1_LONG_VOWELS
+SLP1_CONSONANTS = "kKgGNcCjJYwWqQRtTdDnpPbBmyrlvSzshL"
+_SLP1_NOISE_RE = re.compile(r"[\s'.,;:!?\-13-9]+")
+_SLP1_LINE_RE = re.compile("[%s]*(?:[%s][MH]*[%s]*)*" % (SLP1_CONSONANTS, SLP1_VOWELS, SLP1_CONSONANTS))
+_SLP1_SYLLABLE_RE = re.compile("(?P<vowel>[%s])(?P<yogavaha>[MH]*)(?P<coda>[%s]*)" % (
+    SLP1_VOWELS, SLP1_CONSONANTS))
+
+def _slp1_pattern(letters: str) -> str:
+    weights = []
+    for match in _SLP1_SYLLABLE_RE.finditer(letters):
+        # All consonants before the next vowel but the last close this syllable; at the
+        # end of the line, all of them do
+        closed = len(match.group("coda")) - (match.end() < len(letters))
+        heavy = match.group("vowel") in SLP1_LONG_VOWELS or match.group("yogavaha") or closed > 0
+        weights.append("G" if heavy else "L")
+    return "".join(weights)
+
+def slp1_pattern_lines(lines: Sequence[str]) -> List[str]:
+    """'L'/'G' weight pattern of each SLP1 line, as `scansion.to_pattern_lines` gives for
+    its transliteration; lines with anything but plain letters and punctuation are
+    transliterated and scanned as Devanāgarī."""
+    patterns: List[str] = []
+    fallback: Dict[int, str] = {}
+    for i, line in enumerate(lines):
+        letters = _SLP1_NOISE_RE.sub("", line)
+        if "AUM" in letters or not _SLP1_LINE_RE.fullmatch(letters):
+            fallback[i] = transliterate(line, "slp1")
+            patterns.append("")
+        else:
+            patterns.append(_slp1_pattern(letters))
+    if fallback:
+        for i, pattern in zip(fallback, scansion.to_pattern_lines(list(fallback.values()))):
+            patterns[i] = pattern
+    return patterns
@@ -0,0 +1,176 @@
+"""
+A natively vectorized version of `SanskritMeterEnv`.
+
+Steps N episodes at once with one shared tokenizer and prompt table: token windows
+for all episodes are decoded with a single `tokenizer.batch_decode` call, all lines
+that need scanning are scanned with a single `verifier.syllabify_lines` call, and all
+episodes whose reward schedule fires are scored with a single
+`reward.calculate_rewards` call.
+"""
+
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from .env import load_config, load_prompts, load_tokenizer
+from .reward import REWARD_WEIGHTS, calculate_rewards
+from .scanner import REWARD_MODES, IncrementalMeterScanner, RewardMode, reward_due
+from .semantic import SemanticScorer
+from .verifier import syllabify_lines
+
+class SanskritMeterVectorEnv(VectorEnv):
+    """Runs `num_envs` Sanskrit meter episodes in lock-step.
+
+    Follows the gymnasium `VectorEnv` API with next-step autoreset: after a
+    sub-environment finishes, its next `step` call resets it and ignores the action.
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(
+        self,
+        num_envs: int,
+        model_name: str = "google/gemma-2b",
+        max_length: Optional[int] = None,
+        tokenizer: Any = None,
+        config: Any = None,
+        copy: bool = True,
+        semantic_scorer: Optional[SemanticScorer] = None,
+        reward_mode: RewardMode = "token",
+        shaping: float = 0.0,
+    ):
+        if reward_mode not in REWARD_MODES:
+            raise ValueError(f"Unknown reward_mode {reward_mode!r}")
+        self.num_envs = num_envs
+        self.copy = copy
+        # See `SanskritMeterEnv` for the reward schedule
+        self.reward_mode = reward_mode
+        self.shaping = shaping
+        # Episodes that finish in the same step are scored against their topics in one
+        # batch, reported as info["semantic_score"]
+        self.semantic_scorer = semantic_scorer
+
+        # One tokenizer and one prompt table for all sub-environments
+        self.tokenizer = tokenizer if tokenizer is not None else load_tokenizer(model_name)
+        self.prompts = load_prompts()
+        if max_length is None:
+            max_length = (config if config is not None else load_config(model_name)).max_position_embeddings
+        self.max_seq_len = max_length
+
+        vocab_size = self.tokenizer.vocab_size
+        self.single_action_space = spaces.Discrete(vocab_size)
+        self.single_observation_space = spaces.Dict({
+            "prompt_ids": spaces.Box(low=0, high=vocab_size, shape=(self.max_seq_len,), dtype=np.int32),
+            "generated_ids": spaces.Box(low=0, high=vocab_size, shape=(self.max_seq_len,), dtype=np.int32),
+            "attention_mask": spaces.Box(low=0, high=1, shape=(self.max_seq_len,), dtype=np.int32)
+        })
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        self._obs = {
+            key: np.zeros((num_envs, self.max_seq_len), dtype=np.int32)
+            for key in ("prompt_ids", "generated_ids", "attention_mask")
+        }
+        self._lengths = np.zeros(num_envs, dtype=np.int64)
+        self._autoreset = np.zeros(num_envs, dtype=np.bool_)
+        self._prompt_index = np.zeros(num_envs, dtype=np.int64)
+        self.scanners = [IncrementalMeterScanner(self.tokenizer) for _ in range(num_envs)]
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[Dict] = None,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        super().reset(seed=seed)
+        self._reset_envs(np.arange(self.num_envs))
+        self._autoreset[:] = False
+        return self._observation(), {}
+
+    def step(self, actions) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        terminations = np.zeros(self.num_envs, dtype=np.bool_)
+        truncations = np.zeros(self.num_envs, dtype=np.bool_)
+
+        resetting = np.flatnonzero(self._autoreset)
+        if len(resetting):
+            self._reset_envs(resetting)
+        stepping = np.flatnonzero(~self._autoreset)
+
+        # Append the new tokens and decode every episode's window in one call
+        windows = []
+        for i in stepping:
+            token_id = int(actions[i])
+            self._obs["generated_ids"][i, self._lengths[i]] = token_id
+            self._lengths[i] += 1
+            windows.extend(self.scanners[i].decode_window(token_id))
+        texts = self.tokenizer.batch_decode(windows) if windows else []
+
+        # Scan all pending lines of all episodes in one call
+        pending, counts = [], []
+        boundaries = [self.scanners[i].boundaries for i in stepping]
+        for k, i in enumerate(stepping):
+            scanner = self.scanners[i]
+            scanner.advance(texts[2 * k], texts[2 * k + 1])
+            lines = scanner.pending_lines()
+            pending.extend(lines)
+            counts.append(len(lines))
+        scans = syllabify_lines(pending) if pending else []
+
+        offset = 0
+        scored = []
+        for k, i in enumerate(stepping):
+            scanner = self.scanners[i]
+            scanner.apply_scan(scans[offset:offset + counts[k]])
+            offset += counts[k]
+            terminations[i] = (self._lengths[i] >= self.max_seq_len or
+                               int(actions[i]) == self.tokenizer.eos_token_id)
+            if reward_due(self.reward_mode, scanner.boundaries != boundaries[k], terminations[i]):
+                scored.append(i)
+            elif self.shaping:
+                rewards[i] = self.shaping * scanner.shaping_score()
+
+        # Score the poems of all episodes whose reward schedule fired in one call
+        if scored:
+            results = calculate_rewards(
+                [self.scanners[i].text for i in scored], [self.scanners[i].target_meter for i in scored],
+                [self.scanners[i].scans for i in scored],
+                [self.scanners[i].syllable_score() for i in scored] if REWARD_WEIGHTS["syllable"] else None)
+            rewards[scored] = [result["total_score"] for result in results]
+
+        self._autoreset = terminations | truncations
+        infos: Dict[str, Any] = {}
+        finished = np.flatnonzero(self._autoreset)
+        if self.semantic_scorer is not None and len(finished):
+            scores = np.zeros(self.num_envs)
+            scores[finished] = self.semantic_scorer.score(
+                [self.scanners[i].text for i in finished],
+                [self.prompts[self._prompt_index[i]]["topic"] for i in finished])
+            infos["semantic_score"], infos["_semantic_score"] = scores, self._autoreset.copy()
+        return self._observation(), rewards, terminations, truncations, infos
+
+    def _reset_envs(self, indices: np.ndarray) -> None:
+        """Draw new prompts for the sub-environments at `indices`."""
+        self._prompt_index[indices] = self.np_random.integers(len(self.prompts), size=len(indices))
+        prompt_texts = [self.prompts[j]["prompt"] for j in self._prompt_index[indices]]
+        encoded = self.tokenizer(prompt_texts, return_tensors="np", padding="max_length",
+                                 truncation=True, max_length=self.max_seq_len)
+        self._obs["prompt_ids"][indices] = encoded["input_ids"]
+        self._obs["attention_mask"][indices] = encoded["attention_mask"]
+        self._obs["generated_ids"][indices] = 0
+        self._lengths[indices] = 0
+        for i in indices:
+            self.scanners[i].reset(self.prompts[self._prompt_index[i]]["meter"])
+
+    def _observation(self) -> Dict[str, np.ndarray]:
+        return deepcopy(self._obs) if self.copy else self._obs
+
+    @property
+    def current_prompts(self) -> List[Dict[str, str]]:
+        """The prompt entry of each sub-environment's current episode."""
+        return [self.prompts[j] for j in self._prompt_index]
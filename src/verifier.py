@@ -1,33 +1,218 @@
 from __future__ import annotations
-from typing import Literal
-import chandas
-from indic_transliteration import sanscript
-from indic_transliteration.sanscript import transliterate
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Literal, Optional, Tuple
+from . import scansion, transliteration
+from .meters import METER_INDEX
 
 Script = Literal["devanagari", "iast", "slp1", "hk"]
+Backend = Literal["chandas", "native"]
+
+class LRUCache:
+    """A bounded, thread-safe least-recently-used cache with hit/miss/eviction counts.
+
+    Each process has its own instances; after a fork the child gets a copy of the
+    parent's entries and a fresh lock (see `_reinit_locks`).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._data), "maxsize": self.maxsize}
+
+# Line text (whitespace removed) -> weight pattern, and tuple of line patterns ->
+# (exact, accidental) meter names. Rollouts for one prompt repeat the same pādas a lot.
+# Both scansion backends produce identical patterns, so they share the line cache.
+# Line text -> `scansion.ScannedLine`, for callers that also need the syllables.
+# (script, poem) -> Devanāgarī, for poems not written in Devanāgarī.
+_line_cache = LRUCache(65536)
+_identify_cache = LRUCache(16384)
+_syllable_cache = LRUCache(65536)
+_transliteration_cache = LRUCache(16384)
+
+def _reinit_locks() -> None:
+    for cache in (_line_cache, _identify_cache, _syllable_cache, _transliteration_cache):
+        cache._lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_locks)
+
+def configure_cache(lines: Optional[int] = None, patterns: Optional[int] = None,
+                    syllables: Optional[int] = None, transliterations: Optional[int] = None) -> None:
+    """Set the maximum number of cached line scans, meter identifications,
+    syllabified lines and transliterated poems (0 disables)."""
+    if lines is not None:
+        _line_cache.resize(lines)
+    if patterns is not None:
+        _identify_cache.resize(patterns)
+    if syllables is not None:
+        _syllable_cache.resize(syllables)
+    if transliterations is not None:
+        _transliteration_cache.resize(transliterations)
+
+def cache_info() -> Dict[str, Dict[str, int]]:
+    """Hit/miss/eviction statistics of the verifier caches."""
+    return {"lines": _line_cache.stats(), "patterns": _identify_cache.stats(),
+            "syllables": _syllable_cache.stats(), "transliterations": _transliteration_cache.stats()}
+
+def cache_clear() -> None:
+    _line_cache.clear()
+    _identify_cache.clear()
+    _syllable_cache.clear()
+    _transliteration_cache.clear()
+
+def _line_key(line: str) -> str:
+    # Chandas ignores whitespace within a line, so this is an exact cache key
+    return "".join(line.split())
+
+def _chandas():
+    # Imported on first use: loading chandas' metrical data takes a few hundred ms, and
+    # the native backend and target-meter automata never need it.
+    import chandas
+    return chandas
 
 def _to_devanagari(text: str, script: Script) -> str:
-    """Ensure Devanāgarī input for Chandas."""
+    """Ensure Devanāgarī input for Chandas (see `src.transliteration`)."""
     if script == "devanagari":
         return text
-    mapping = {
-        "iast": sanscript.IAST,
-        "slp1": sanscript.SLP1,
-        "hk": sanscript.HK,
-    }[script]
-    return transliterate(text, mapping, sanscript.DEVANAGARI)
-
-def verify_meter(poem: str, expected_meter: str, script: Script = "devanagari", strict_match: bool = True) -> bool:
+    key = (script, text)
+    converted = _transliteration_cache.get(key)
+    if converted is None:
+        converted = transliteration.transliterate(text, script)
+        _transliteration_cache.put(key, converted)
+    return converted
+
+def split_lines(poem_deva: str) -> List[str]:
+    """Split a Devanāgarī poem into stripped, non-empty lines."""
+    return [ln.strip() for ln in poem_deva.splitlines() if ln.strip()]
+
+def scan_lines(lines: List[str], backend: Backend = "chandas") -> List[str]:
+    """Return the laghu/guru ('L'/'G') weight pattern of each line.
+
+    Chandas raises on a line with no complete syllable (e.g. a half-written 'स्' at the
+    start of a line during generation); such a line scans as the empty pattern.
+    `backend="native"` uses `src.scansion`, which gives identical patterns faster.
+    Results are cached per line, see `configure_cache`.
     """
-    Returns True iff `poem` is scanned by Chandas as `expected_meter`.
+    keys = [_line_key(ln) for ln in lines]
+    patterns = [_line_cache.get(key) for key in keys]
+    missing = [i for i, pattern in enumerate(patterns) if pattern is None]
+    if missing:
+        missing_lines = [lines[i] for i in missing]
+        if backend == "native":
+            scanned = scansion.to_pattern_lines(missing_lines)
+        else:
+            try:
+                scanned = _chandas().to_pattern_lines(missing_lines)
+            except ValueError:
+                scanned = [_scan_line(ln) for ln in missing_lines]
+        for i, pattern in zip(missing, scanned):
+            patterns[i] = pattern
+            _line_cache.put(keys[i], pattern)
+    return patterns
+
+def syllabify_lines(lines: List[str]) -> List[scansion.ScannedLine]:
+    """Syllables and weight pattern of each line, with the native engine.
+
+    Patterns are identical to `scan_lines`; use this when the syllables are needed too
+    (e.g. by the reward's repetition check), so lines are syllabified only once.
+    Results are cached per line, see `configure_cache`.
     """
-    poem_deva = _to_devanagari(poem, script)
-    lines = [ln.strip() for ln in poem_deva.splitlines() if ln.strip()]
-    patterns = chandas.to_pattern_lines(lines)
-    result = chandas.svat_identifier.IdentifyFromPatternLines(patterns)
-    
-    # Get the actual values, and check for exact or accidental
-    exact = list(result.get("exact", []))
-    accidental = list(result.get("accidental", []))
+    keys = [_line_key(ln) for ln in lines]
+    scans = [_syllable_cache.get(key) for key in keys]
+    missing = [i for i, scanned in enumerate(scans) if scanned is None]
+    if missing:
+        for i, scanned in zip(missing, scansion.syllabify_lines([lines[i] for i in missing])):
+            scans[i] = scanned
+            _syllable_cache.put(keys[i], scanned)
+    return scans
+
+def _scan_line(line: str) -> str:
+    try:
+        return _chandas().to_pattern_lines([line])[0]
+    except ValueError:
+        return ""
 
+def verify_patterns(patterns: List[str], expected_meter: str, strict_match: bool = True) -> bool:
+    """
+    Returns True iff the already-scanned line `patterns` are identified as `expected_meter`.
+
+    `expected_meter` is a chandas meter name, or one of the target meters in
+    `generate_dataset.METERS`; the latter are checked with their precompiled automaton
+    (`meters.METER_INDEX`) in one linear pass instead of a full chandas identification.
+    """
+    if expected_meter in METER_INDEX:
+        return METER_INDEX.match(expected_meter, patterns)
+    exact, accidental = _identify(patterns)
     return expected_meter in exact if strict_match else expected_meter in exact + accidental
+
+def _meter_name(match: Any) -> str:
+    # Chandas reports each match as a (name, details) pair
+    return match if isinstance(match, str) else match[0]
+
+def _identify(patterns: List[str]) -> Tuple[List[str], List[str]]:
+    key = tuple(patterns)
+    cached = _identify_cache.get(key)
+    if cached is not None:
+        return cached
+    result = _chandas().svat_identifier.IdentifyFromPatternLines(list(patterns))
+
+    # Get the actual values, and check for exact or accidental
+    cached = ([_meter_name(m) for m in result.get("exact", [])],
+              [_meter_name(m) for m in result.get("accidental", [])])
+    _identify_cache.put(key, cached)
+    return cached
+
+def verify_meter(poem: str, expected_meter: str, script: Script = "devanagari", strict_match: bool = True,
+                 backend: Backend = "chandas") -> bool:
+    """
+    Returns True iff `poem` is scanned by Chandas as `expected_meter`.
+    `backend` selects the syllabifier used for scanning, see `scan_lines`; with the
+    native backend, SLP1 poems are scanned without converting them to Devanāgarī.
+    """
+    if script == "slp1" and backend == "native":
+        patterns = transliteration.slp1_pattern_lines(split_lines(poem))
+        return verify_patterns(patterns, expected_meter, strict_match)
+    poem_deva = _to_devanagari(poem, script)
+    patterns = scan_lines(split_lines(poem_deva), backend=backend)
+    return verify_patterns(patterns, expected_meter, strict_match)
@@ -0,0 +1,6 @@
+import pytest
+from benchmarks.corpus import ByteTokenizer
+
+@pytest.fixture
+def byte_tokenizer():
+    return ByteTokenizer()
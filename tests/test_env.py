@@ -0,0 +1,90 @@
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.env import SanskritMeterEnv
+from src.prime_wrapper import PrimeSanskritMeterEnv
+
+def test_builds_from_shared_tokenizer_and_config(byte_tokenizer):
+    config = SimpleNamespace(max_position_embeddings=64)
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, config=config)
+    other = SanskritMeterEnv(tokenizer=byte_tokenizer, config=config)
+    assert not hasattr(env, "model")
+    assert env.prompts is other.prompts
+    assert env.observation_space["generated_ids"].shape == (64,)
+
+    env.reset(seed=0)
+    for token_id in byte_tokenizer.encode("धर्मो रक्षति\n"):
+        obs, reward, done, truncated, info = env.step(token_id)
+    assert env.scanner.text == "धर्मो रक्षति\n" and not done
+
+def test_prime_wrapper_sets_max_length(byte_tokenizer, monkeypatch):
+    monkeypatch.setattr("src.env.load_tokenizer", lambda name: byte_tokenizer)
+    env = PrimeSanskritMeterEnv(max_length=32)
+    assert env.unwrapped.max_seq_len == 32 and env.unwrapped.config is None
+    obs, _ = env.reset(seed=0)
+    assert obs["prompt_ids"].shape == (32,)
+
+def test_import_is_light():
+    code = "import sys, src.env; src.verify_meter('गा', 'अनुष्टुप्', backend='native'); print('chandas' in sys.modules or 'transformers' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+def test_observations_are_written_in_place(byte_tokenizer):
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=32, observation_mode="view")
+    obs, _ = env.reset(seed=0)
+    prompt_ids = obs["prompt_ids"].copy()
+    assert env.config is None and prompt_ids[0] != byte_tokenizer.pad_token_id
+
+    for token_id in (65, 66):
+        step_obs, *_ = env.step(token_id)
+    assert np.shares_memory(step_obs["generated_ids"], obs["generated_ids"])
+    assert not step_obs["generated_ids"].flags.writeable
+    assert (obs["prompt_ids"] == prompt_ids).all()
+    assert obs["generated_ids"][:3].tolist() == [65, 66, 0]
+
+    env.reset(seed=1)
+    assert not obs["generated_ids"].any()
+
+def test_copy_and_delta_modes(byte_tokenizer):
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=4)
+    obs, _ = env.reset(seed=0)
+    first, *_ = env.step(65)
+    assert not obs["generated_ids"].any() and first["generated_ids"][0] == 65
+
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=4, observation_mode="delta")
+    obs, info = env.reset(seed=0)
+    assert info["prompt_ids"].shape == (4,) and obs["position"][0] == 0
+    for position, token_id in enumerate((65, 66, 67, 68)):
+        obs, _, done, _, _ = env.step(token_id)
+        assert obs in env.observation_space
+        assert (obs["token_id"][0], obs["position"][0]) == (token_id, position)
+    assert done and env.generated_ids.tolist() == [65, 66, 67, 68]
+
+def test_reward_modes(byte_tokenizer):
+    text = "धर्मो रक्षति रक्षितः।\nधर्मो हन्ति"
+    ids = byte_tokenizer.encode(text)
+    runs = {}
+    for mode in ("token", "line", "terminal"):
+        env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=len(ids), reward_mode=mode)
+        env.reset(seed=0)
+        runs[mode] = [env.step(token_id)[1:] for token_id in ids]
+    evaluated = {mode: [i for i, step in enumerate(steps) if step[3]["reward_evaluated"]]
+                 for mode, steps in runs.items()}
+    assert len(evaluated["token"]) == len(ids)
+    # After the daṇḍa, after the newline, and on the final token
+    assert len(evaluated["line"]) == 3
+    assert evaluated["terminal"] == [len(ids) - 1]
+    assert runs["terminal"][-1][0] == runs["token"][-1][0]
+    assert all(runs["line"][i][0] == runs["token"][i][0] for i in evaluated["line"])
+    assert all(step[0] == 0.0 for step in runs["terminal"][:-1])
+
+def test_shaping_between_evaluations(byte_tokenizer):
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=64, reward_mode="terminal", shaping=0.1)
+    env.reset(seed=0)
+    env.scanner.reset("अनुष्टुप्")
+    for token_id in byte_tokenizer.encode("धर्मो"):
+        _, reward, _, _, info = env.step(token_id)
+    assert not info["reward_evaluated"] and reward == 0.1
@@ -0,0 +1,50 @@
+import csv
+
+from src.env import SanskritMeterEnv
+from src.instrumentation import CSVSink, Histogram, Instrumentation, PrometheusSink
+from src.reward import calculate_reward
+
+POEM = "धर्मो रक्षति रक्षितः\n"
+
+def test_step_timings_in_info_and_sinks(byte_tokenizer, tmp_path):
+    seen = []
+    instrumentation = Instrumentation(sinks=[seen.append, CSVSink(tmp_path / "steps.csv"),
+                                             PrometheusSink(tmp_path / "env.prom")], flush_every=0)
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=64, instrumentation=instrumentation)
+    env.reset(seed=0)
+    ids = byte_tokenizer.encode(POEM)
+    for token_id in ids:
+        _, _, _, _, info = env.step(token_id)
+    instrumentation.close()
+
+    assert {"decode", "scansion", "reward", "meter", "syllable", "style", "observation", "step"} <= set(info["timings"])
+    assert info["timings"]["step"] >= info["timings"]["reward"] >= info["timings"]["meter"] > 0
+    assert len(seen) == len(ids) and seen[-1] is info["timings"]
+    summary = instrumentation.summary()
+    assert summary["step"]["count"] == len(ids) and summary["step"]["p95"] > 0
+
+    with (tmp_path / "steps.csv").open() as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(ids) and abs(float(rows[-1]["step"]) - info["timings"]["step"]) < 1e-8
+    prom = (tmp_path / "env.prom").read_text()
+    assert f'sanskrit_rl_step_section_seconds_count{{section="step"}} {len(ids)}' in prom
+    assert 'section="decode",le="+Inf"' in prom
+
+def test_off_by_default(byte_tokenizer):
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=8)
+    env.reset(seed=0)
+    _, _, _, _, info = env.step(65)
+    assert env.instrumentation is None and "timings" not in info
+
+def test_reward_timings_do_not_change_scores():
+    timings = {}
+    assert calculate_reward(POEM, "अनुष्टुप्", topic="धर्मः (righteousness)", timings=timings) == \
+        calculate_reward(POEM, "अनुष्टुप्", topic="धर्मः (righteousness)")
+    assert set(timings) == {"scansion", "meter", "syllable", "semantic", "style", "originality"}
+
+def test_histogram_quantiles():
+    hist = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        hist.observe(value)
+    assert hist.counts == [1, 2, 1, 0] and hist.sum == 6.5
+    assert hist.quantile(0.5) == 1.5 and hist.quantile(1.0) == 4.0
@@ -0,0 +1,26 @@
+import pickle
+import random
+
+from src.keywords import AhoCorasick, normalize, topic_matcher
+from src.data.generate_dataset import TOPICS
+
+def test_finds_all_overlapping_matches():
+    matcher = AhoCorasick(["he", "she", "his", "hers"])
+    assert sorted(matcher.finditer("ushers")) == [(1, 1), (2, 0), (2, 3)]
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(100):
+        phrases = ["".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(5)]
+        text = "".join(rng.choice("ab") for _ in range(30))
+        matcher = AhoCorasick(phrases)
+        expected = sorted((i, k) for k, p in enumerate(matcher.phrases)
+                          for i in range(len(text)) if text.startswith(p, i))
+        assert sorted(matcher.finditer(text)) == expected
+
+def test_normalizes_and_pickles():
+    assert normalize("वसन्तः") == normalize("वसंतः")
+    assert normalize("\u0958") == normalize("\u0915\u093c")
+    matcher = topic_matcher(TOPICS[0])
+    assert topic_matcher(TOPICS[0]) is matcher
+    assert pickle.loads(pickle.dumps(matcher)).counts("शृङ्गारः") == matcher.counts("शृङ्गारः")
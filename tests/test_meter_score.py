@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+from src.meter_score import dense_meter_scores, levenshtein_batch
+from src.reward import calculate_reward, score_meter, score_meters
+
+MANDAKRANTA = "GGGGLLLLLGGLGGLGG"
+
+def reference_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, x in enumerate(a, start=1):
+        row = [i]
+        for j, y in enumerate(b, start=1):
+            row.append(min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (y not in (x, "."))))
+        prev = row
+    return prev[-1]
+
+def test_levenshtein_batch_matches_reference():
+    rng = random.Random(0)
+    patterns = ["".join(rng.choice("LG") for _ in range(rng.randint(0, 20))) for _ in range(500)]
+    templates = ["".join(rng.choice("LG.") for _ in range(rng.randint(0, 20))) for _ in range(500)]
+    expected = [reference_distance(a, b) for a, b in zip(patterns, templates)]
+    assert levenshtein_batch(patterns, templates).tolist() == expected
+
+def test_dense_scores_and_pada_breakdown():
+    one_off = MANDAKRANTA[:4] + MANDAKRANTA[5:]   # one syllable dropped
+    scores, padas = dense_meter_scores(
+        [[MANDAKRANTA] * 4, [MANDAKRANTA] * 2, [MANDAKRANTA] * 3 + [one_off], []], "मन्दाक्रान्ता")
+    assert np.allclose(scores, [1.0, 0.5, 1 - 1 / 68, 0.0])
+    assert np.allclose(padas[1], [1, 1, 0, 0])
+    assert np.allclose(padas[2], [1, 1, 1, 1 - 1 / 17])
+
+def test_calculate_reward_gives_partial_credit():
+    line = "कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः"
+    full = calculate_reward("\n".join([line] * 4), "मन्दाक्रान्ता")["meter_score"]
+    half = calculate_reward("\n".join([line] * 2), "मन्दाक्रान्ता")["meter_score"]
+    assert full == 1.0 and half == 0.5
+    assert calculate_reward("गा गा गा", "मन्दाक्रान्ता")["meter_score"] < half
+
+def test_batched_scores_report_pada_breakdown():
+    one_off = MANDAKRANTA[:4] + MANDAKRANTA[5:]
+    poems = [[MANDAKRANTA] * 4, [MANDAKRANTA] * 3 + [one_off], ["GG"]]
+    scores, padas = score_meters(poems, "मन्दाक्रान्ता")
+    assert scores.tolist() == [score_meter(p, "मन्दाक्रान्ता") for p in poems]
+    assert np.allclose(padas[0], 1) and np.allclose(padas[1], [1, 1, 1, 1 - 1 / 17])
+    scores, padas = score_meters(poems, "Mandākrāntā")
+    assert scores.tolist() == [1.0, 0.0, 0.0] and all(len(p) == 0 for p in padas)
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+from src.data.generate_dataset import METERS
+from src.meters import CHANDAS_NAMES, METER_INDEX, METER_TEMPLATES, PatternDFA
+from src.verifier import _identify
+
+def fill(template, rng):
+    return "".join(rng.choice("LG") if c == "." else c for c in template)
+
+def test_dfa_accepts_templates_with_wildcards():
+    dfa = PatternDFA(["....LGG.", "....LGL."])
+    assert dfa.accepts("GGGGLGLL") and dfa.accepts("LLLLLGGG")
+    assert not dfa.accepts("GGGGGGLL") and not dfa.accepts("GGGGLGL")
+    assert dfa.viable("LLLLLG") and not dfa.viable("LLLLG")
+    assert dfa.run("GGGGGGL") == (-1, 4)
+
+def test_templates_cover_target_meters():
+    assert set(METER_TEMPLATES) <= set(METERS)
+    assert set(CHANDAS_NAMES) == set(METER_TEMPLATES)
+
+@pytest.mark.parametrize("meter", sorted(METER_TEMPLATES))
+def test_match_agrees_with_chandas(meter):
+    rng = random.Random(0)
+    for _ in range(20):
+        # Chandas has no entry for mixed (upajāti) Jagatī, so fill each template once
+        fills = {t: fill(t, rng) for t in set(METER_TEMPLATES[meter][0])}
+        padas = [fills[t] for t in METER_TEMPLATES[meter][0]]
+        exact, _ = _identify(padas)
+        assert any(name in exact for name in CHANDAS_NAMES[meter])
+        assert METER_INDEX.match(meter, padas)
+        assert METER_INDEX.match(meter, [padas[0] + padas[1], padas[2] + padas[3]])
+        assert not METER_INDEX.match(meter, padas[:3])
+        assert METER_INDEX.viable(meter, padas[:3] + [padas[3][:4]])
+
+def test_prefix_score():
+    padas = ["GGGGLLLLLGGLGGLGG"] * 2
+    assert METER_INDEX.prefix_score("मन्दाक्रान्ता", padas + ["GGGG"]) == 1.0
+    assert METER_INDEX.prefix_score("मन्दाक्रान्ता", padas + ["GGGGGLLL"]) == 38 / 42
+    assert not METER_INDEX.viable("मन्दाक्रान्ता", padas + ["GGGGG"])
@@ -0,0 +1,49 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from src.plagiarism import PlagiarismIndex, _suffix_automaton, load_plagiarism_index
+from src.reward import calculate_reward
+
+CORPUS = [
+    "धर्मक्षेत्रे कुरुक्षेत्रे समवेता युयुत्सवः।\nमामकाः पाण्डवाश्चैव किमकुर्वत सञ्जय॥",
+    "वागर्थाविव सम्पृक्तौ वागर्थप्रतिपत्तये।\nजगतः पितरौ वन्दे पार्वतीपरमेश्वरौ॥",
+    "कर्मण्येवाधिकारस्ते मा फलेषु कदाचन।\nमा कर्मफलहेतुर्भूर्मा ते सङ्गोऽस्त्वकर्मणि॥",
+]
+ORIGINAL = "नवं वसन्तं कुसुमैः सुगन्धितं\nवनं विभाति मधुपैः प्रगुञ्जितम्"
+
+def test_scores_copies_and_original_poems():
+    index = PlagiarismIndex.build(CORPUS)
+    assert index.score(CORPUS[1]) == 0.0
+    assert index.score(ORIGINAL) == 1.0
+    # One copied half-verse out of two lines is a long shared run
+    half = CORPUS[0].split("\n")[0] + "\n" + ORIGINAL.split("\n")[0]
+    assert 0.0 < index.score(half) < 0.6
+
+def test_longest_common_matches_brute_force():
+    rng = random.Random(0)
+    corpus = [[rng.randrange(4) for _ in range(rng.randrange(1, 30))] for _ in range(20)]
+    sequence = [c for doc in corpus for c in doc + [-1]]
+    arrays = {**PlagiarismIndex.build([]).arrays, **_suffix_automaton(sequence)}
+    index = PlagiarismIndex([], arrays, ngram=4, min_copy=8)
+    for _ in range(50):
+        query = [rng.randrange(5) for _ in range(rng.randrange(1, 40))]
+        expected = max((j - i for doc in corpus for i in range(len(query)) for j in range(i + 1, len(query) + 1)
+                        if any(doc[k:k + j - i] == query[i:j] for k in range(len(doc)))), default=0)
+        assert index.longest_common(query) == expected
+
+def test_save_load_and_pickle(tmp_path):
+    PlagiarismIndex.build(CORPUS).save(tmp_path / "index")
+    index = load_plagiarism_index(tmp_path / "index")
+    assert isinstance(index.signatures, np.memmap)
+    assert pickle.loads(pickle.dumps(index)) is index
+    assert index.score(CORPUS[2]) == 0.0
+
+    weights = {"originality": 1.0}
+    reward = calculate_reward(CORPUS[2], "अनुष्टुप्", known_corpus=index, weights=weights)
+    assert reward["originality_score"] == 0.0
+    assert calculate_reward(ORIGINAL, "अनुष्टुप्", known_corpus=index, weights=weights)["originality_score"] == 1.0
+    with pytest.raises(TypeError, match="PlagiarismIndex.build"):
+        calculate_reward(ORIGINAL, "अनुष्टुप्", known_corpus=CORPUS, weights=weights)
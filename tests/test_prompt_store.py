@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src.data.generate_dataset import format_prompt
+from src.env import SanskritMeterEnv, load_prompts
+from src.meters import METER_TEMPLATES
+from src.prompt_store import PromptStore, write_prompt_store
+
+def test_env_samples_from_store_without_tokenizing(byte_tokenizer, tmp_path, monkeypatch):
+    prompts = load_prompts()
+    store = write_prompt_store(prompts, byte_tokenizer, tmp_path / "prompts.store")
+    store = PromptStore(store.path)
+    assert len(store) == len(prompts)
+    assert isinstance(store.token_ids, np.memmap)
+    assert store.entry(5) == {"topic": prompts[5]["topic"], "meter": prompts[5]["meter"]}
+    assert store.ids(5).tolist() == byte_tokenizer.encode(prompts[5]["prompt"])
+
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=128, prompt_store=store.path)
+    assert env.prompts is None
+    tokenize = type(byte_tokenizer).__call__
+    monkeypatch.setattr(type(byte_tokenizer), "__call__", None)   # reset must not tokenize
+    obs, _ = env.reset(seed=0)
+    expected = tokenize(byte_tokenizer, format_prompt(env.current_prompt), padding="max_length",
+                        truncation=True, max_length=128)
+    assert (obs["prompt_ids"] == expected["input_ids"][0]).all()
+    assert (obs["attention_mask"] == expected["attention_mask"][0]).all()
+    assert env.scanner.target_meter == env.current_prompt["meter"]
+
+def test_rejects_store_for_other_tokenizer(byte_tokenizer, tmp_path):
+    store = write_prompt_store(load_prompts()[:3], byte_tokenizer, tmp_path / "s")
+    byte_tokenizer.vocab_size = 300
+    with pytest.raises(ValueError):
+        SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=16, prompt_store=store)
+
+def test_skips_prompts_for_meters_without_template(byte_tokenizer, tmp_path):
+    prompts = load_prompts()
+    assert prompts and all(p["meter"] in METER_TEMPLATES for p in prompts)
+    unscorable = {**prompts[0], "meter": "प्रियदर्शिनी"}
+    store = write_prompt_store([unscorable, prompts[0], unscorable], byte_tokenizer, tmp_path / "s")
+    assert len(store) == 3 and store.scorable.tolist() == [1]
+    env = SanskritMeterEnv(tokenizer=byte_tokenizer, max_length=128, prompt_store=store)
+    for seed in range(5):
+        env.reset(seed=seed)
+        assert env.current_prompt["meter"] == prompts[0]["meter"]
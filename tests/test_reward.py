@@ -0,0 +1,49 @@
+from src import reward
+from src.reward import (calculate_reward, check_self_references, check_semantic_relevance,
+                        check_syllable_patterns)
+from src.scansion import syllabify_lines
+
+MEGHADUTA = (
+    "कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः\n"
+    "शापेनास्तङ्गमितमहिमा वर्षभोग्येण भर्तुः\n"
+)
+
+def test_penalizes_repeated_syllables():
+    assert check_syllable_patterns(MEGHADUTA) == 1.0
+    assert check_syllable_patterns("गा गा") == 1.0
+    assert check_syllable_patterns("गा गा गा") == 1.0 - 1 / 3
+    assert check_syllable_patterns("गा " * 16) == 1.0 - 15 / 16
+    # The same half-line twice: the second copy is repeated text
+    line = MEGHADUTA.split("\n")[0]
+    assert 0.4 < check_syllable_patterns(line + "\n" + line) < 0.6
+
+def test_repeated_fraction_counts_later_copies_once():
+    syllables = list("abcdxabcdyabcd")
+    # "abcd" recurs at 5 and 10; each copy covers 4 syllables
+    assert reward._repeated_fraction(syllables) == 8 / 14
+    assert reward._repeated_fraction(list("abcabc"), n=3) == 3 / 6
+
+def test_syllabifies_once(monkeypatch):
+    calls = []
+    original = reward.syllabify_lines
+    monkeypatch.setattr(reward, "syllabify_lines", lambda lines: calls.append(lines) or original(lines))
+    result = calculate_reward(MEGHADUTA, "मन्दाक्रान्ता")
+    assert len(calls) == 1
+    scans = syllabify_lines(MEGHADUTA.split("\n")[:2])
+    assert calculate_reward(MEGHADUTA, "मन्दाक्रान्ता", scans=scans) == result
+    assert len(calls) == 1
+
+def test_keyword_and_self_reference_checks():
+    topic = "वसन्तः (spring)"
+    assert check_semantic_relevance("वसंते कुसुमानि विकसन्ति", topic) == 1.0
+    assert check_semantic_relevance("मधुमासे कुसुमानि", topic) == 0.0
+    assert check_semantic_relevance("मधुमासे कुसुमानि", topic, {"कुसुम"}) == 1.0
+    assert check_semantic_relevance("वसन्तो " * 6, topic) == 0.5
+
+    assert check_self_references(MEGHADUTA) == 1.0
+    assert check_self_references("अयं श्लोकः") == 0.0
+    assert check_self_references("मन्दा\u200cक्रान्ता") == 0.5
+    assert check_self_references("इति श्लोकः। poem, score") == 0.0
+    # Whole words only, and no ordinary words
+    for text in ("अनुपद्यते", "जगती सर्वा प्रकाशते", "छन्दसा", "सहृदयः पुरुषः", "श्लोकार्थम्"):
+        assert check_self_references(text) == 1.0
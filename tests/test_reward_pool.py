@@ -0,0 +1,35 @@
+import multiprocessing
+
+import pytest
+from src.reward import calculate_reward
+from src.reward_pool import RewardPool, verify_meter_many
+from src.verifier import verify_meter
+
+MANDAKRANTA = (
+    "कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः\n"
+    "शापेनास्तङ्गमितमहिमा वर्षभोग्येण भर्तुः\n"
+    "यक्षश्चक्रे जनकतनयास्नानपुण्योदकेषु\n"
+    "स्निग्धच्छायातरुषु वसतिं रामगिर्याश्रमेषु\n"
+)
+PAIRS = [(MANDAKRANTA, "Mandākrāntā"), ("गा गा गा\nगा", "Mandākrāntā")] * 5
+
+@pytest.fixture(scope="module")
+def pool():
+    with RewardPool(num_workers=2, chunksize=3) as pool:
+        yield pool
+
+def test_results_in_input_order(pool):
+    expected = [verify_meter(poem, meter) for poem, meter in PAIRS]
+    assert pool.verify_meter_many(PAIRS) == expected
+    assert verify_meter_many(PAIRS, pool=pool) == verify_meter_many(PAIRS)
+
+def test_async_submit(pool):
+    future = pool.submit_reward(MANDAKRANTA, "Mandākrāntā")
+    assert pool.submit(MANDAKRANTA, "Mandākrāntā").result() == verify_meter(MANDAKRANTA, "Mandākrāntā")
+    assert future.result() == calculate_reward(MANDAKRANTA, "Mandākrāntā")
+    assert pool.calculate_reward_many(PAIRS[:3]) == [calculate_reward(*p) for p in PAIRS[:3]]
+
+def test_workers_do_not_load_chandas_up_front():
+    with RewardPool(num_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pool.warm_up()
+        assert not pool._executor.submit(eval, "'chandas' in __import__('sys').modules").result()
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from src.env import SanskritMeterEnv
+from src.prime_wrapper import PrimeSanskritMeterEnv
+from src.rollout import RolloutDriver, collect_rollouts
+
+POEM = "धर्मो रक्षति रक्षितः\nसत्यं वद धर्मं चर\n"
+
+def make_envs(tokenizer, n, reward_mode="external"):
+    ids = tokenizer.encode(POEM)
+    config = SimpleNamespace(max_position_embeddings=len(ids))
+    return [SanskritMeterEnv(tokenizer=tokenizer, config=config, reward_mode=reward_mode, shaping=0.1)
+            for _ in range(n)]
+
+class StubPolicy:
+    """Writes POEM on every env, in chunks of `chunk` tokens, after sleeping `latency`
+    seconds per batch; records when each call ran and its batch size."""
+
+    def __init__(self, tokenizer, envs, latency=0.0, chunk=5):
+        self.ids = tokenizer.encode(POEM)
+        self.envs = envs
+        self.latency = latency
+        self.chunk = chunk
+        self.calls = []
+
+    async def __call__(self, requests):
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        self.calls.append((start, time.perf_counter(), len(requests)))
+        return [self.ids[len(self.envs[r.slot].unwrapped.generated_ids):][:self.chunk] for r in requests]
+
+def test_line_scores_match_line_mode(byte_tokenizer):
+    envs = make_envs(byte_tokenizer, 3)
+    rollouts = collect_rollouts(envs, StubPolicy(byte_tokenizer, envs), 5, seed=0, score="line")
+    assert len(rollouts) == 5
+
+    reference = make_envs(byte_tokenizer, 1, reward_mode="line")[0]
+    ids = byte_tokenizer.encode(POEM)
+    for rollout in rollouts:
+        reference.reset()
+        reference.scanner.reset(rollout.prompt["meter"])
+        expected = [reference.step(token_id)[1] for token_id in ids]
+        assert rollout.text == POEM and list(rollout.token_ids) == ids
+        assert np.allclose(rollout.rewards, expected)
+        assert rollout.reward_info["total_score"] == rollout.rewards[-1]
+
+def test_reward_work_overlaps_policy_latency(byte_tokenizer):
+    envs = make_envs(byte_tokenizer, 2)
+    policy = StubPolicy(byte_tokenizer, envs, latency=0.02, chunk=8)
+    spans = []
+
+    class SlowExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            def timed():
+                start = time.perf_counter()
+                time.sleep(0.01)   # stands in for CPU-heavy scoring
+                result = fn(*args, **kwargs)
+                spans.append((start, time.perf_counter()))
+                return result
+            return super().submit(timed)
+
+    with SlowExecutor(1) as executor:
+        rollouts = collect_rollouts(envs, policy, 4, seed=0, reward_pool=executor, score="line")
+    assert len(rollouts) == 4 and len(spans) == 4 * POEM.count("\n")
+    overlapping = sum(any(s < end and start < e for start, end, _ in policy.calls) for s, e in spans)
+    assert overlapping >= len(spans) // 2
+    assert max(n for _, _, n in policy.calls) == 2   # episodes are batched
+
+class CountingEnv(SanskritMeterEnv):
+    """Counts episodes started and lines written, across episodes."""
+    resets = lines = 0
+
+    def reset(self, **kwargs):
+        self.resets += 1
+        return super().reset(**kwargs)
+
+    def step(self, action):
+        self.lines += action == ord("\n")
+        return super().step(action)
+
+def counting_envs(tokenizer, n):
+    config = SimpleNamespace(max_position_embeddings=len(tokenizer.encode(POEM)))
+    return [CountingEnv(tokenizer=tokenizer, config=config, reward_mode="external") for _ in range(n)]
+
+def test_backpressure_from_slow_rewards(byte_tokenizer):
+    envs = counting_envs(byte_tokenizer, 4)
+    scored, backlog = [], []
+
+    def slow_reward(fn):
+        backlog.append(sum(env.lines for env in envs) - len(scored))
+        time.sleep(0.005)
+        scored.append(fn())
+        return scored[-1]
+
+    class SlowExecutor(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            return super().submit(slow_reward, lambda: fn(*args, **kwargs))
+
+    with SlowExecutor(1) as executor:
+        rollouts = collect_rollouts(envs, StubPolicy(byte_tokenizer, envs, chunk=64), 8,
+                                    reward_pool=executor, score="line", max_pending_rewards=1)
+    assert len(rollouts) == 8
+    # Lines written but not scored: one being scored, one queued, one waiting per env
+    assert max(backlog) <= 1 + 1 + len(envs)
+
+def test_backpressure_from_slow_consumer(byte_tokenizer):
+    envs = counting_envs(byte_tokenizer, 2)
+    driver = RolloutDriver(envs, StubPolicy(byte_tokenizer, envs, chunk=64), max_finished=1)
+    ahead = []
+
+    async def consume():
+        consumed = 0
+        async for _ in driver.run(10):
+            consumed += 1
+            await asyncio.sleep(0.02)
+            ahead.append(sum(env.resets for env in envs) - consumed)
+
+    asyncio.run(consume())
+    assert len(ahead) == 10
+    # One rollout waiting for the consumer and one episode in progress per env
+    assert max(ahead) <= 1 + len(envs)
+
+def test_errors_and_validation(byte_tokenizer):
+    async def failing(requests):
+        raise RuntimeError("policy down")
+
+    with pytest.raises(RuntimeError, match="policy down"):
+        collect_rollouts(make_envs(byte_tokenizer, 2), failing, 2)
+    with pytest.raises(ValueError, match="reward_mode"):
+        RolloutDriver(make_envs(byte_tokenizer, 1, reward_mode="token"), failing)
+
+def test_prime_wrapper(byte_tokenizer, monkeypatch):
+    ids = byte_tokenizer.encode(POEM)
+    monkeypatch.setattr("src.env.load_tokenizer", lambda name: byte_tokenizer)
+    env = PrimeSanskritMeterEnv(max_length=len(ids), reward_mode="external")
+    rollouts = collect_rollouts([env], StubPolicy(byte_tokenizer, [env]), 2, seed=0)
+    assert [r.text for r in rollouts] == [POEM, POEM]
+    assert all(r.reward_info["total_score"] == r.rewards[-1] for r in rollouts)
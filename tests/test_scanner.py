@@ -0,0 +1,50 @@
+import pytest
+from src import reward
+from src.reward import calculate_reward, check_syllable_patterns
+from src.scanner import IncrementalMeterScanner
+from src.verifier import scan_lines, split_lines
+
+MANDAKRANTA = (
+    "कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः\n"
+    "शापेनास्तङ्गमितमहिमा वर्षभोग्येण भर्तुः\n"
+    "यक्षश्चक्रे जनकतनयास्नानपुण्योदकेषु\n"
+    "स्निग्धच्छायातरुषु वसतिं रामगिर्याश्रमेषु\n"
+)
+
+@pytest.mark.parametrize("poem", [MANDAKRANTA, "धर्मो रक्षति\r\nरक्षितः\n\n  गा गा\rगा"])
+def test_matches_full_rescan(byte_tokenizer, poem):
+    tokenizer = byte_tokenizer
+    scanner = IncrementalMeterScanner(tokenizer, "Mandākrāntā")
+    ids = tokenizer.encode(poem)
+    for i, token_id in enumerate(ids, start=1):
+        scanner.push(token_id)
+        text = tokenizer.decode(ids[:i])
+        if not text.endswith("�"):
+            assert scanner.text == text
+            assert scanner.patterns == scan_lines(split_lines(text))
+    assert scanner.reward() == calculate_reward(poem, "Mandākrāntā")
+
+def test_reset_clears_state(byte_tokenizer):
+    tokenizer = byte_tokenizer
+    scanner = IncrementalMeterScanner(tokenizer, "Mandākrāntā")
+    for token_id in tokenizer.encode(MANDAKRANTA):
+        scanner.push(token_id)
+    scanner.reset("Anuṣṭup (Śloka)")
+    assert scanner.text == "" and scanner.patterns == []
+    assert scanner.target_meter == "Anuṣṭup (Śloka)"
+
+def test_carries_syllable_repetition_state(byte_tokenizer, monkeypatch):
+    poem = MANDAKRANTA + "गा गा गा गा\n" + MANDAKRANTA.split("\n")[0] + "\nगा"
+    scanner = IncrementalMeterScanner(byte_tokenizer, "Mandākrāntā")
+    weights = {"syllable": 0.5}
+    for token_id in byte_tokenizer.encode(poem):
+        scanner.push(token_id)
+        assert scanner.syllable_score() == check_syllable_patterns(scanner.text)
+    assert scanner.reward(weights=weights) == calculate_reward(poem, "Mandākrāntā", weights=weights)
+
+    # Checks with weight 0 (the default for all but the meter) are not run
+    monkeypatch.setattr(reward, "check_self_references", lambda text: pytest.fail("style check ran"))
+    monkeypatch.setattr(reward, "check_syllable_patterns", lambda *args: pytest.fail("syllable check ran"))
+    result = scanner.reward()
+    assert result["style_score"] is None and result["syllable_score"] is None
+    assert result["total_score"] == result["meter_score"]
@@ -0,0 +1,56 @@
+import logging
+import random
+
+import pytest
+from src import scansion
+from src.verifier import _scan_line, verify_meter
+
+logging.getLogger().setLevel(logging.ERROR + 1)  # chandas logs CRITICAL before raising
+
+CONSONANTS = [chr(c) for c in range(0x915, 0x93A)] + [chr(c) for c in range(0x958, 0x960)] + ["ॹ"]
+INDEPENDENT_VOWELS = [chr(c) for c in range(0x904, 0x915)] + ["ॠ", "ॡ", "ॲ", "ꣾ"]
+VOWEL_SIGNS = [chr(c) for c in range(0x93A, 0x94D)] + ["ॎ", "ॕ", "ॗ", "ॢ", "ॣ"]
+OTHER = ["्", "्", "़", "ं", "ः", "ँ", "ᳩ", "॑", "꣠", " ", " ", "।", "॥", "ॐ", "a", "१", "\t", "ऽ"]
+
+def random_line(rng):
+    parts = []
+    for _ in range(rng.randint(0, 14)):
+        r = rng.random()
+        if r < 0.45:
+            parts.append(rng.choice(CONSONANTS) + (rng.choice(VOWEL_SIGNS) if rng.random() < 0.5 else ""))
+        elif r < 0.6:
+            parts.append(rng.choice(CONSONANTS) + "्")
+        elif r < 0.72:
+            parts.append(rng.choice(INDEPENDENT_VOWELS))
+        elif r < 0.8:
+            parts.append(rng.choice(VOWEL_SIGNS))
+        else:
+            parts.append(rng.choice(OTHER))
+    return "".join(parts)
+
+VERSES = [
+    "कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः",
+    "वागर्थाविव सम्पृक्तौ वागर्थप्रतिपत्तये।",
+    "जगतः पितरौ वन्दे पार्वतीपरमेश्वरौ॥",
+    "ॐ पूर्णमदः पूर्णमिदं पूर्णात्पूर्णमुदच्यते",
+    "तत् अपि स्वँ यँ",
+    "स्",
+]
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_chandas_on_regression_corpus(seed):
+    rng = random.Random(seed)
+    lines = VERSES + [random_line(rng) for _ in range(2000)]
+    assert scansion.to_pattern_lines(lines) == [_scan_line(ln) for ln in lines]
+
+def test_syllables_and_weights():
+    syllables = scansion.syllabify("धर्मो रक्षति रक्षितः")
+    assert syllables == ["धर्", "मो", "रक्", "ष", "ति", "रक्", "षि", "तः"]
+    assert "".join(map(scansion.syllable_weight, syllables)) == "GGGLLGLG"
+    with pytest.raises(ValueError):
+        scansion.syllabify("स्")
+
+def test_verify_meter_backend():
+    poem = "\n".join([VERSES[0], "शापेनास्तङ्गमितमहिमा वर्षभोग्येण भर्तुः",
+                      "यक्षश्चक्रे जनकतनयास्नानपुण्योदकेषु", "स्निग्धच्छायातरुषु वसतिं रामगिर्याश्रमेषु"])
+    assert verify_meter(poem, "Mandākrāntā", backend="native") == verify_meter(poem, "Mandākrāntā")
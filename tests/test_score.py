@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pytest
+from src.reward import calculate_reward
+from src.score import SCORE_COLUMNS, load_scores, main, score_file
+
+MANDAKRANTA = (
+    "कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः\n"
+    "शापेनास्तङ्गमितमहिमा वर्षभोग्येण भर्तुः\n"
+    "यक्षश्चक्रे जनकतनयास्नानपुण्योदकेषु\n"
+    "स्निग्धच्छायातरुषु वसतिं रामगिर्याश्रमेषु\n"
+)
+ROWS = [{"id": f"r{i}", "text": text, "meter": "मन्दाक्रान्ता", "topic": "मेघाः (clouds)"}
+        for i, text in enumerate([MANDAKRANTA, "गा गा गा\nगा", "मेघाः मेघाः मेघाः", ""] * 3)]
+
+@pytest.fixture
+def rollouts(tmp_path):
+    path = tmp_path / "rollouts.jsonl"
+    with path.open("w", encoding="utf-8") as f:
+        for row in ROWS:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return path
+
+def expected(weights=None):
+    return [calculate_reward(r["text"], r["meter"], topic=r["topic"], weights=weights) for r in ROWS]
+
+def test_scores_match_calculate_reward(rollouts, tmp_path):
+    state = score_file(rollouts, tmp_path / "out", chunk_size=5, workers=0, fmt="npz",
+                       weights={"syllable": 0.5})
+    assert (state["rows"], state["parts"], state["done"]) == (len(ROWS), 3, True)
+    scores = load_scores(tmp_path / "out")
+    assert scores["id"].tolist() == [r["id"] for r in ROWS]
+    assert scores["row"].tolist() == list(range(len(ROWS)))
+    for name in SCORE_COLUMNS:
+        # Components with weight 0 are not computed, and NaN
+        values = [np.nan if s[name] is None else s[name] for s in expected({"syllable": 0.5})]
+        assert np.allclose(scores[name], values, equal_nan=True)
+    assert np.isnan(scores["style_score"]).all() and not np.isnan(scores["syllable_score"]).any()
+
+def test_resumes_from_checkpoint(rollouts, tmp_path):
+    out = tmp_path / "out"
+    partial = score_file(rollouts, out, chunk_size=4, workers=0, fmt="npz", max_rows=4)
+    assert (partial["rows"], partial["done"]) == (4, False)
+    main([str(rollouts), str(out), "--format", "npz", "--chunk-size", "4", "--workers", "1"])
+    scores = load_scores(out)
+    assert scores["row"].tolist() == list(range(len(ROWS)))
+    assert np.allclose(scores["total_score"], [s["total_score"] for s in expected()])
+    with pytest.raises(ValueError):
+        score_file(rollouts, out, workers=0, fmt="npz", weights={"style": 1.0})
+
+def test_parquet_roundtrip(rollouts, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    source = tmp_path / "rollouts.parquet"
+    pq.write_table(pa.Table.from_pylist(ROWS), source, row_group_size=5)
+    score_file(source, tmp_path / "out", chunk_size=4, workers=0, max_rows=6)
+    score_file(source, tmp_path / "out", chunk_size=4, workers=0)
+    scores = load_scores(tmp_path / "out")
+    assert np.allclose(scores["meter_score"], [s["meter_score"] for s in expected()])
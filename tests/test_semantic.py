@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.reward import check_semantic_relevance
+from src.semantic import HashingEncoder, SemanticScorer
+from src.vector_env import SanskritMeterVectorEnv
+
+TOPICS = ["वसन्तः (spring)", "युद्धम् (battle)", "सागरः (ocean)"]
+
+class CountingEncoder(HashingEncoder):
+    def __init__(self):
+        super().__init__(dim=256)
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return super().encode(texts)
+
+def test_hashing_encoder_is_deterministic():
+    a = HashingEncoder().encode(["वसन्ते कुसुमानि", "रणे"])
+    assert a.shape == (2, 1024)
+    assert (a == HashingEncoder().encode(["वसंते कुसुमानि", "रणे"])).all()
+
+def test_topics_are_embedded_once_and_persisted(tmp_path):
+    encoder = CountingEncoder()
+    scorer = SemanticScorer(encoder, topics=TOPICS, cache_dir=tmp_path)
+    scores = scorer.score(["वसन्ते कुसुमानि विकसन्ति", "युद्धे वीराः"] * 2, TOPICS[:2] * 2)
+    assert scores.shape == (4,) and ((0 <= scores) & (scores <= 1)).all()
+    assert encoder.calls[0] == TOPICS and len(encoder.calls) == 2
+
+    again = CountingEncoder()
+    reloaded = SemanticScorer(again, topics=TOPICS, cache_dir=tmp_path)
+    assert again.calls == []
+    assert np.allclose(reloaded.score(["युद्धे वीराः"], [TOPICS[1]]), scores[1])
+    sims = reloaded.similarities(["वसन्ते वसन्तः"])
+    assert sims.argmax() == 0
+    assert [p.name for p in tmp_path.iterdir()] == [scorer.cache_path.name]   # no temporary files left
+
+def test_submissions_are_scored_in_batches():
+    encoder = CountingEncoder()
+    scorer = SemanticScorer(encoder, topics=TOPICS, cache_dir=None, batch_size=3)
+    futures = [scorer.submit("सागरे तरङ्गाः", TOPICS[2]) for _ in range(4)]
+    assert [f.done() for f in futures] == [True, True, True, False]
+    scorer.flush()
+    assert len(encoder.calls) == 3   # topics, then two batches of poems
+    assert futures[3].result() == futures[0].result() > 0
+
+def test_semantic_relevance_blends_keywords_and_embeddings():
+    scorer = SemanticScorer(topics=TOPICS, cache_dir=None)
+    with_keyword = check_semantic_relevance("वसन्ते कुसुमानि", TOPICS[0], scorer=scorer)
+    assert 0.5 < with_keyword < 1.0
+    assert check_semantic_relevance("रणे वीराः", TOPICS[0], scorer=scorer) < 0.5
+
+def test_vector_env_scores_finished_episodes(byte_tokenizer):
+    envs = SanskritMeterVectorEnv(2, tokenizer=byte_tokenizer, max_length=64,
+                                  semantic_scorer=SemanticScorer(cache_dir=None))
+    envs.reset(seed=0)
+    _, _, terminations, _, info = envs.step(np.array([byte_tokenizer.eos_token_id, 65]))
+    assert info["_semantic_score"].tolist() == [True, False]
+    assert info["semantic_score"].shape == (2,)
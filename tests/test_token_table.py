@@ -0,0 +1,143 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from src import scansion
+from src.env import SanskritMeterEnv
+from src.meters import METER_INDEX
+from src.scanner import IncrementalMeterScanner
+from src.token_table import MeterState, TableMeterScanner, TokenTable, load_token_table, tokenizer_hash
+from src.verifier import split_lines
+
+from test_scansion import VERSES, random_line
+
+MANDAKRANTA = ["कश्चित्कान्ताविरहगुरुणा स्वाधिकारात्प्रमत्तः", "शापेनास्तङ्गमितमहिमा वर्षभोग्येण भर्तुः",
+               "यक्षश्चक्रे जनकतनयास्नानपुण्योदकेषु", "स्निग्धच्छायातरुषु वसतिं रामगिर्याश्रमेषु"]
+
+class PieceTokenizer:
+    """Greedy longest-match over a small vocabulary of Devanāgarī pieces, with one token
+    per UTF-8 byte for anything else (like SentencePiece byte fallback)."""
+
+    PIECES = ["क", "का", "कि", "र्", "र", "म", "मि", "ति", "त्", "त", "स्", "स", "षि", "तः", "धर्", "मो",
+              "रक्", "ष", "ं", "्", "अ", "आ", "े", "ो", "ा", " ", "\n", " \n", "।", "॥\n", "hello", "क्ष"]
+
+    def __init__(self):
+        self.vocab_size = 256 + len(self.PIECES)
+
+    def piece(self, token_id):
+        return bytes([token_id]) if token_id < 256 else self.PIECES[token_id - 256].encode()
+
+    def encode(self, text):
+        ids, pos = [], 0
+        while pos < len(text):
+            best = max((p for p in self.PIECES if text.startswith(p, pos)), key=len, default=None)
+            if best is None:
+                ids.extend(text[pos].encode())
+                pos += 1
+            else:
+                ids.append(256 + self.PIECES.index(best))
+                pos += len(best)
+        return ids
+
+    def decode(self, ids):
+        return b"".join(self.piece(i) for i in ids).decode("utf-8", errors="replace")
+
+    def batch_decode(self, sequences):
+        return [self.decode(ids) for ids in sequences]
+
+def test_automaton_matches_scansion():
+    rng = random.Random(0)
+    extra = ["\n", "\r\n", "  \n", "क्अ्", "ꣽ", "᳐", "hello"]
+    for _ in range(3000):
+        text = "".join(random_line(rng) + rng.choice(extra) for _ in range(rng.randint(1, 4)))
+        state = MeterState(None, None)
+        state.feed_text(text)
+        assert state.patterns == [s.pattern for s in scansion.syllabify_lines(split_lines(text))], text
+
+@pytest.fixture(scope="module")
+def piece_table():
+    return TokenTable.build(PieceTokenizer())
+
+def test_push_matches_decoding_scanner(piece_table):
+    tokenizer = PieceTokenizer()
+    rng = random.Random(1)
+    for text in VERSES + MANDAKRANTA + ["\n".join(random_line(rng) for _ in range(3)) for _ in range(200)]:
+        state, scanner = MeterState(piece_table, tokenizer), IncrementalMeterScanner(tokenizer)
+        for token_id in tokenizer.encode(text):
+            state.push(token_id)
+            scanner.push(token_id)
+            assert state.patterns == scanner.patterns and state.boundaries == scanner.boundaries, text
+
+def test_cached_by_tokenizer_hash(tmp_path):
+    tokenizer = PieceTokenizer()
+    table = load_token_table(tokenizer, cache_dir=tmp_path)
+    path = tmp_path / tokenizer_hash(tokenizer)
+    assert (path / "meta.json").exists() and load_token_table(tokenizer, cache_dir=tmp_path) is table
+    loaded = TokenTable.load(path)
+    assert isinstance(loaded.class_next, np.memmap)
+    assert np.array_equal(loaded.class_emit, table.class_emit) and loaded.surface(256 + 14) == "धर्"
+    assert tokenizer_hash(tokenizer) != tokenizer_hash(SimpleNamespace(vocab_size=258, decode=lambda ids: "x"))
+    with pytest.raises(FileExistsError):
+        table.save(path)
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]   # no temporary directories left
+
+def test_logits_mask(piece_table):
+    tokenizer = PieceTokenizer()
+    meter = "मन्दाक्रान्ता"
+    state = MeterState(piece_table, tokenizer)
+    ids = tokenizer.encode(MANDAKRANTA[0] + "\n")
+    for token_id in ids:
+        assert state.viable(meter)
+        mask = piece_table.logits_mask(state, meter)
+        assert mask[token_id]
+        state.push(token_id)
+    # The second pāda starts GGGG. "कि" after "शा" completes the guru शा and is
+    # allowed; a second "कि" would complete the laghu कि and is masked.
+    for token_id in tokenizer.encode("शा"):
+        state.push(token_id)
+    mask = piece_table.logits_mask(state, meter)
+    kika = tokenizer.encode("कि")[0]
+    assert mask[kika] and mask[tokenizer.encode("hello")[0]]
+    state.push(kika)
+    assert not piece_table.logits_mask(state, meter)[kika]
+    assert piece_table.logits_mask(state, "unknown meter").all()
+
+def test_env_with_token_table(byte_tokenizer):
+    poem = "\n".join(MANDAKRANTA) + "\n"
+    ids = byte_tokenizer.encode(poem)
+    config = SimpleNamespace(max_position_embeddings=len(ids) + 1)
+    plain = SanskritMeterEnv(tokenizer=byte_tokenizer, config=config, reward_mode="line", shaping=0.1)
+    tabled = SanskritMeterEnv(tokenizer=byte_tokenizer, config=config, reward_mode="line", shaping=0.1,
+                              token_table=TokenTable.build(byte_tokenizer))
+    assert isinstance(tabled.scanner, TableMeterScanner)
+    for env in (plain, tabled):
+        env.reset(seed=0)
+        env.scanner.reset("मन्दाक्रान्ता")
+    for token_id in ids:
+        expected = plain.step(token_id)[1]
+        assert tabled.step(token_id)[1] == expected
+        assert tabled.scanner.patterns == plain.scanner.patterns
+    assert tabled.scanner.text == plain.scanner.text and METER_INDEX.match("मन्दाक्रान्ता", tabled.scanner.patterns)
+
+def test_text_is_decoded_incrementally(piece_table):
+    decoded = []
+
+    class CountingTokenizer(PieceTokenizer):
+        def decode(self, ids):
+            decoded.append(len(ids))
+            return super().decode(ids)
+
+    tokenizer = CountingTokenizer()
+    rng = random.Random(2)
+    text = "\n".join(VERSES + MANDAKRANTA) + "\nꣽक्अ्\n"
+    ids = tokenizer.encode(text)
+    tabled, plain = TableMeterScanner(tokenizer, piece_table), IncrementalMeterScanner(PieceTokenizer())
+    for token_id in ids:
+        tabled.push(token_id)
+        plain.push(token_id)
+        if rng.random() < 0.5:
+            assert tabled.text == plain.text and tabled.scans == plain.scans
+    assert tabled.text == plain.text == text
+    # Each id is decoded a bounded number of times, however often the text is read
+    assert sum(decoded) < 10 * len(ids)
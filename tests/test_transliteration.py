@@ -0,0 +1,41 @@
+import random
+
+import pytest
+from indic_transliteration import sanscript
+from src import scansion, transliteration
+from src.verifier import verify_meter
+
+MEGHADUTA_SLP1 = "\n".join([
+    "kaScitkAntAvirahaguruRA svADikArAtpramattaH",
+    "SApenAstaNgamitamahimA varzaBogyeRa BartuH",
+    "yakzaScakre janakatanayAsnAnapuRyodakezu",
+    "snigDacCAyAtaruzu vasatiM rAmagiryASramezu",
+])
+
+def random_text(rng, script):
+    scheme_map = sanscript.SchemeMap(sanscript.SCHEMES[script], sanscript.SCHEMES[sanscript.DEVANAGARI])
+    tokens = sorted(set(scheme_map.vowels) | set(scheme_map.non_marks_viraama))
+    tokens += [" ", "\n", ",", "-", "ॐ", "|", "~", "oṃ", "OM", "AUM"]
+    return "".join(rng.choice(tokens) for _ in range(rng.randint(0, 16)))
+
+@pytest.mark.parametrize("script", ["iast", "slp1", "hk"])
+def test_matches_sanscript(script):
+    rng = random.Random(0)
+    texts = [random_text(rng, script) for _ in range(3000)]
+    texts.append(sanscript.transliterate(MEGHADUTA_SLP1, sanscript.SLP1, script))
+    expected = [sanscript.transliterate(text, script, sanscript.DEVANAGARI) for text in texts]
+    assert [transliteration.transliterate(text, script) for text in texts] == expected
+    assert transliteration.transliterate_many(texts, script) == expected
+
+def test_slp1_patterns_match_devanagari_scansion():
+    rng = random.Random(1)
+    letters = transliteration.SLP1_VOWELS + transliteration.SLP1_CONSONANTS + "MH '.|~0-"
+    lines = MEGHADUTA_SLP1.split("\n") + ["tat api", "s", "kH", ""]
+    lines += ["".join(rng.choice(letters) for _ in range(rng.randint(0, 16))) for _ in range(5000)]
+    expected = scansion.to_pattern_lines([sanscript.transliterate(ln, sanscript.SLP1, sanscript.DEVANAGARI)
+                                          for ln in lines])
+    assert transliteration.slp1_pattern_lines(lines) == expected
+
+def test_verify_meter_slp1():
+    assert verify_meter(MEGHADUTA_SLP1, "मन्दाक्रान्ता", script="slp1", backend="native")
+    assert verify_meter(MEGHADUTA_SLP1, "Mandākrāntā", script="slp1")
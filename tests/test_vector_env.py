@@ -0,0 +1,44 @@
+import numpy as np
+from src import vector_env
+from src.reward import calculate_reward
+from src.vector_env import SanskritMeterVectorEnv
+
+LINE = "धर्मो रक्षति रक्षितः\n"
+
+def test_steps_all_envs_with_shared_state(byte_tokenizer):
+    envs = SanskritMeterVectorEnv(3, tokenizer=byte_tokenizer, max_length=64)
+    obs, _ = envs.reset(seed=0)
+    assert obs["prompt_ids"].shape == (3, 64)
+    assert all(s.tokenizer is envs.tokenizer for s in envs.scanners)
+
+    ids = byte_tokenizer.encode(LINE)
+    for token_id in ids:
+        obs, rewards, terminations, truncations, _ = envs.step(np.full(3, token_id))
+    assert not terminations.any()
+    assert (obs["generated_ids"][:, :len(ids)] == ids).all()
+    for scanner, prompt, reward in zip(envs.scanners, envs.current_prompts, rewards):
+        assert scanner.text == LINE
+        assert reward == calculate_reward(LINE, prompt["meter"])["total_score"]
+
+def test_autoresets_on_next_step(byte_tokenizer):
+    envs = SanskritMeterVectorEnv(2, tokenizer=byte_tokenizer, max_length=64)
+    envs.reset(seed=0)
+    _, _, terminations, _, _ = envs.step(np.array([byte_tokenizer.eos_token_id, 65]))
+    assert terminations.tolist() == [True, False]
+    obs, rewards, terminations, _, _ = envs.step(np.array([66, 66]))
+    assert rewards[0] == 0.0 and not terminations.any()
+    assert obs["generated_ids"][0, 0] == 0
+    assert envs.scanners[1].text == "AB"
+
+def test_scores_fired_envs_in_one_call(byte_tokenizer, monkeypatch):
+    batches = []
+    original = vector_env.calculate_rewards
+    monkeypatch.setattr(vector_env, "calculate_rewards",
+                        lambda texts, *args: batches.append(len(texts)) or original(texts, *args))
+    envs = SanskritMeterVectorEnv(3, tokenizer=byte_tokenizer, max_length=64, reward_mode="line")
+    envs.reset(seed=0)
+    for token_id in byte_tokenizer.encode(LINE):
+        _, rewards, _, _, _ = envs.step(np.full(3, token_id))
+    assert batches == [3]
+    for prompt, reward in zip(envs.current_prompts, rewards):
+        assert reward == calculate_reward(LINE, prompt["meter"])["total_score"]
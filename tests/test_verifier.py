@@ -1,10 +1,13 @@
 import pytest, textwrap
-from sanskrit_meter_rl.verifier import verify_meter
+from src import verifier
+from src.verifier import verify_meter
 
 GOOD_ANUSHTUPH = textwrap.dedent("""
-    धर्मो रक्षति रक्षितः
-    धर्मो हन्ति निहन्यते
-    """)  # quick fake example; should scan as Anuṣṭubh
+    धर्मक्षेत्रे कुरुक्षेत्रे
+    समवेता युयुत्सवः
+    मामकाः पाण्डवाश्चैव
+    किमकुर्वत सञ्जय
+    """)  # Bhagavad Gītā 1.1, one pāda per line; a full śloka scans as Anuṣṭubh
 
 BAD_ANUSHTUPH = "गा गा गा\nगा"
 
@@ -13,3 +16,15 @@ def test_passes_correct_meter():
 
 def test_fails_wrong_meter():
     assert not verify_meter(BAD_ANUSHTUPH, "Anuṣṭup (Śloka)")
+
+def test_cache_hits_and_eviction():
+    verifier.cache_clear()
+    verifier.configure_cache(lines=2)
+    try:
+        assert verifier.scan_lines(["धर्मो रक्षति", "गा गा"]) == ["GGGLL", "GG"]
+        assert verifier.scan_lines(["धर्मो  रक्षति"]) == ["GGGLL"]   # same line modulo spaces
+        verifier.scan_lines(["रक्षितः"])
+        stats = verifier.cache_info()["lines"]
+        assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 3, 1, 2)
+    finally:
+        verifier.configure_cache(lines=65536)